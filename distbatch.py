@@ -0,0 +1,171 @@
+# distbatch.py – detector de distribuciones sin interfaz (API + línea de comandos)
+# ---------------------------------------------------------------------------------------------
+# Mismo flujo que distribution.py (get_candidate_distributions → ajuste → summarize_results)
+# sobre muchos archivos y columnas, para tareas programadas. Solo importa distfit, distio y
+# distcache: ni streamlit ni matplotlib.
+# + fit_files(): archivos o patrones glob + selectores de columnas → tabla larga de ajustes
+# + summary_table(): una fila por archivo y columna con la ganadora y el AIC de cada candidata
+# + main(): línea de comandos, resultados en JSON, CSV o Parquet
+# ---------------------------------------------------------------------------------------------
+# Ejemplo
+#   python distbatch.py "datos/*.parquet" -c "costo_*" -c dias -o ajustes.parquet --summary resumen.csv
+# ---------------------------------------------------------------------------------------------
+
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import distio
+from distcache import RUTA_POR_DEFECTO, FitCache
+from distfit import batch_matrix, fit_columns, prepare_columns
+
+MAX_VALORES_LOTE = 20_000_000  # valores únicos acumulados antes de lanzar un lote de ajustes
+
+
+def expand_paths(patterns: Sequence[str]) -> List[str]:
+    """Archivos que coinciden con los patrones (o rutas literales), sin duplicados y ordenados."""
+    rutas = []
+    for patron in patterns:
+        encontrados = sorted(glob.glob(patron, recursive=True)) or ([patron] if os.path.isfile(patron) else [])
+        rutas += [r for r in encontrados if os.path.isfile(r)]
+    return list(dict.fromkeys(rutas))
+
+
+def select_columns(available: Sequence[str], selectors: Optional[Sequence[str]]) -> List[str]:
+    """Columnas que coinciden con algún selector (nombre exacto o patrón fnmatch); todas si no hay selectores."""
+    if not selectors:
+        return list(available)
+    return [c for c in available if any(c == s or fnmatch.fnmatchcase(c, s) for s in selectors)]
+
+
+def _lotes(rutas: Sequence[str], selectors, errores: List[dict]) -> Iterator[Dict[Tuple[str, str], tuple]]:
+    """Muestras comprimidas {(archivo, columna): ...} agrupadas hasta MAX_VALORES_LOTE valores."""
+    lote, tam = {}, 0
+    for ruta in rutas:
+        fmt = distio.file_format(ruta)
+        try:
+            columnas = select_columns(distio.list_columns(ruta, fmt), selectors)
+            muestras = prepare_columns(distio.read_columns(ruta, fmt, columnas)) if columnas else {}
+        except Exception as err:
+            errores.append({"archivo": ruta, "columna": None, "distribution": None, "error": f"error leyendo → {err}"})
+            continue
+        for col, m in muestras.items():
+            lote[ruta, col] = m
+            tam += m[0].size
+        if tam >= MAX_VALORES_LOTE:
+            yield lote
+            lote, tam = {}, 0
+    if lote:
+        yield lote
+
+
+def fit_files(
+    patterns: Sequence[str],
+    columns: Optional[Sequence[str]] = None,
+    timeout: Optional[float] = 30.0,
+    n_workers: Optional[int] = None,
+    n_boot: int = 0,
+    seed: int = 12345,
+    cache: Optional[FitCache] = None,
+    progress: Optional[Callable[[str, str, Dict[str, object]], None]] = None,
+) -> pd.DataFrame:
+    """Ajusta las candidatas de cada columna numérica de cada archivo.
+
+    Devuelve una tabla larga (archivo, columna, distribution, params, aic, …,
+    error), ordenada por archivo, columna y AIC. Los archivos se leen y
+    ajustan por lotes para acotar la memoria; dentro de un lote todas las
+    parejas columna × distribución comparten el grupo de `n_workers` procesos.
+    Los archivos que no se pueden leer quedan como una fila con `error`.
+    `progress` recibe (archivo, columna, resultado) por cada ajuste terminado.
+    """
+    filas: List[dict] = []
+    for lote in _lotes(expand_paths(patterns), columns, filas):
+        for (ruta, col), res in fit_columns(lote, timeout, n_workers, n_boot, seed, cache):
+            filas.append({"archivo": ruta, "columna": col, **res})
+            if progress:
+                progress(ruta, col, res)
+    tabla = pd.DataFrame(filas, columns=list(dict.fromkeys(["archivo", "columna", "distribution", "params", "k",
+                                                             "loglik", "aic", "bic",
+                                                             *(k for f in filas for k in f)])))
+    return tabla.sort_values(["archivo", "columna", "aic"], na_position="last").reset_index(drop=True)
+
+
+def summary_table(fits: pd.DataFrame) -> pd.DataFrame:
+    """Una fila por archivo y columna: ganadora, su AIC y valor p, y el AIC de cada candidata."""
+    ok = fits.dropna(subset=["columna", "distribution"])
+    # los campos ausentes en una distribución (NaN al formar la tabla) se quitan de cada registro
+    resultados = {clave: [{k: v for k, v in r.items() if not (isinstance(v, float) and np.isnan(v))}
+                          for r in g.to_dict("records")]
+                  for clave, g in ok.groupby(["archivo", "columna"], sort=False)}
+    matriz = batch_matrix(resultados)
+    if matriz.empty:
+        return matriz
+    claves = pd.DataFrame(matriz.pop("columna").tolist(), columns=["archivo", "columna"])
+    return pd.concat([claves, matriz], axis=1)
+
+
+def write_table(tabla: pd.DataFrame, ruta: str) -> None:
+    """Guarda la tabla en JSON (registros), CSV o Parquet según la extensión."""
+    ext = os.path.splitext(ruta.lower())[1]
+    if "params" in tabla:
+        tabla = tabla.copy()
+        # listas en JSON; texto JSON en CSV/Parquet para que la columna sea de un solo tipo
+        tabla["params"] = tabla["params"].map(lambda p: list(p) if isinstance(p, (tuple, list)) else None)
+        if ext != ".json":
+            tabla["params"] = tabla["params"].map(lambda p: json.dumps(p) if p is not None else None)
+    if ext == ".json":
+        tabla.to_json(ruta, orient="records", indent=1, force_ascii=False)
+    elif ext in (".parquet", ".pq"):
+        tabla.to_parquet(ruta, index=False)
+    else:
+        tabla.to_csv(ruta, index=False)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(
+        description="Ajusta distribuciones candidatas a las columnas numéricas de uno o más archivos "
+                    "(CSV, Excel, Parquet, Feather/Arrow, .npy).")
+    ap.add_argument("files", nargs="+", help="archivos o patrones glob (entre comillas para usar **)")
+    ap.add_argument("-c", "--columns", action="append",
+                    help="columna o patrón fnmatch (repetible); por defecto todas las numéricas")
+    ap.add_argument("-o", "--output", default="ajustes.csv", help="tabla larga de ajustes (.json, .csv o .parquet)")
+    ap.add_argument("--summary", help="tabla resumen por archivo y columna (.json, .csv o .parquet)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="procesos en paralelo (por defecto, nº de CPU)")
+    ap.add_argument("--timeout", type=float, default=30.0, help="tiempo máximo por distribución en segundos")
+    ap.add_argument("--n-boot", type=int, default=0, help="réplicas bootstrap de bondad de ajuste (0 = sin GOF)")
+    ap.add_argument("--seed", type=int, default=12345, help="semilla del bootstrap")
+    ap.add_argument("--cache", default=os.environ.get("DISTFIT_CACHE", RUTA_POR_DEFECTO),
+                    help="archivo SQLite de la caché de ajustes")
+    ap.add_argument("--no-cache", action="store_true", help="no leer ni guardar ajustes en caché")
+    ap.add_argument("-q", "--quiet", action="store_true", help="no informar el avance")
+    args = ap.parse_args(argv)
+
+    if not expand_paths(args.files):
+        print("No se encontraron archivos.", file=sys.stderr)
+        return 2
+
+    def avance(ruta, col, res):
+        estado = res["error"] if "error" in res else f"AIC = {res['aic']:.2f}"
+        print(f"{ruta} · {col} · {res['distribution']}: {estado}", file=sys.stderr)
+
+    fits = fit_files(args.files, args.columns, args.timeout, args.workers, args.n_boot, args.seed,
+                     cache=None if args.no_cache else FitCache(args.cache),
+                     progress=None if args.quiet else avance)
+    write_table(fits, args.output)
+    if args.summary:
+        write_table(summary_table(fits), args.summary)
+    errores = int(fits["error"].notna().sum()) if "error" in fits else 0
+    if not args.quiet:
+        print(f"{len(fits) - errores} ajustes, {errores} errores → {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
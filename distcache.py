@@ -0,0 +1,109 @@
+# distcache.py – caché persistente de ajustes de distribuciones
+# ---------------------------------------------------------------------------------------------
+# + FitCache: resultados de fit_distribution / gof_bootstrap (parámetros, loglik, AIC/BIC,
+#   estadísticos de bondad de ajuste) en memoria y en un archivo SQLite
+#   · clave = huella de los datos (distfit.data_hash) + distribución + réplicas/semilla del bootstrap + versión
+#     de scipy, numpy y de los estimadores (distfit.FIT_VERSION)
+#   · LRU acotado: nº de entradas en memoria y bytes en disco
+#   Cambiar solo una opción de presentación (p. ej. alpha) ya no vuelve a ajustar nada.
+# ---------------------------------------------------------------------------------------------
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import scipy
+
+from distfit import FIT_VERSION
+
+RUTA_POR_DEFECTO = os.path.join(os.path.expanduser("~"), ".cache", "distfit", "ajustes.sqlite")
+VERSION = f"scipy {scipy.__version__} | numpy {np.__version__} | distfit {FIT_VERSION}"
+
+
+class FitCache:
+    """Resultados de ajuste por (datos, distribución, bootstrap, versión).
+
+    Las lecturas buscan primero en memoria (OrderedDict con a lo más
+    `max_memoria` entradas) y luego en SQLite; al superar `max_bytes` en disco
+    se eliminan las entradas usadas hace más tiempo. Con `ruta=None` la caché
+    es solo en memoria. Es segura entre hilos (sesiones de Streamlit) y entre
+    procesos que compartan el archivo.
+    """
+
+    def __init__(self, ruta: Optional[str] = RUTA_POR_DEFECTO, max_memoria: int = 1024,
+                 max_bytes: int = 64 << 20, version: str = VERSION):
+        self.ruta = ruta
+        self.max_memoria = max_memoria
+        self.max_bytes = max_bytes
+        self.version = version
+        self._memoria: "OrderedDict[str, Dict[str, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if ruta:
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+            self._db = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS ajustes (clave TEXT PRIMARY KEY, valor TEXT NOT NULL, "
+                "bytes INTEGER NOT NULL, usado REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ajustes_usado ON ajustes (usado)")
+            self._db.commit()
+
+    def key(self, digest: str, dist_name: str, n_boot: int = 0, seed: int = 12345) -> str:
+        boot = f"{n_boot}/{seed}" if n_boot > 0 else "0"
+        return hashlib.blake2b(f"{digest}|{dist_name}|{boot}|{self.version}".encode(), digest_size=16).hexdigest()
+
+    def get(self, clave: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            if clave in self._memoria:
+                self._memoria.move_to_end(clave)
+                return dict(self._memoria[clave])
+            if self._db is None:
+                return None
+            fila = self._db.execute("SELECT valor FROM ajustes WHERE clave = ?", (clave,)).fetchone()
+            if fila is None:
+                return None
+            self._db.execute("UPDATE ajustes SET usado = ? WHERE clave = ?", (time.time(), clave))
+            self._db.commit()
+            res = json.loads(fila[0])
+            res["params"] = tuple(res["params"])
+            self._recordar(clave, res)
+            return dict(res)
+
+    def put(self, clave: str, res: Dict[str, object]) -> None:
+        with self._lock:
+            self._recordar(clave, dict(res))
+            if self._db is None:
+                return
+            valor = json.dumps(res)
+            self._db.execute("INSERT OR REPLACE INTO ajustes VALUES (?, ?, ?, ?)",
+                             (clave, valor, len(valor), time.time()))
+            total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM ajustes").fetchone()[0]
+            if total > self.max_bytes:
+                # LRU en disco: se borran las más antiguas hasta quedar bajo el límite
+                sobra = total - self.max_bytes
+                for clave_vieja, tam in self._db.execute("SELECT clave, bytes FROM ajustes ORDER BY usado").fetchall():
+                    if sobra <= 0:
+                        break
+                    self._db.execute("DELETE FROM ajustes WHERE clave = ?", (clave_vieja,))
+                    sobra -= tam
+            self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memoria.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM ajustes")
+                self._db.commit()
+
+    def _recordar(self, clave: str, res: Dict[str, object]) -> None:
+        self._memoria[clave] = res
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
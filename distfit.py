@@ -0,0 +1,1318 @@
+# distfit.py – ajuste de distribuciones candidatas sin dependencias de interfaz
+# ---------------------------------------------------------------------------------------------
+# Funciones de ajuste usadas por distribution.py (Streamlit). No importa streamlit ni
+# matplotlib, así que puede importarse desde procesos hijos, scripts o tareas programadas.
+# + fit_candidates(): ajuste en paralelo, un proceso por candidata, con tiempo máximo por
+#   distribución y cancelación (los procesos pendientes se terminan al cerrar el iterador)
+# + parse_numbers(): texto pegado → valores, vectorizado (pyarrow/pandas), con coma decimal,
+#   separador de miles y recuento de fragmentos descartados
+# + compress_sample(): verosimilitudes, AIC/BIC y KS como sumas ponderadas sobre valores
+#   únicos (datos con muchos empates: conteos, días de estancia, costos redondeados)
+# + FAST_FITS: estimadores de máxima verosimilitud cerrados o por Newton; el optimizador
+#   genérico de scipy (.fit) queda solo como respaldo: gamma, lognorm y weibull_min se ajustan
+#   con loc = 0 (k = 2, LOC_CERO) y no con loc libre; el respaldo da el punto de partida en a lo más
+#   MAX_EXPANDIDA datos y se termina con la −log-verosimilitud ponderada sobre valores únicos
+# + COMPOSITE_MODELS: inflación de ceros (zip, zinb), valla en cero (hurdle_gamma,
+#   hurdle_lognorm) y mezclas de k componentes, ajustadas con un EM vectorizado
+# + gof_bootstrap(): KS / Anderson–Darling / Cramér–von Mises (continuas) y χ² (discretas y datos
+#   enteros) con valores p por bootstrap paramétrico, reajustando las réplicas en lotes, con
+#   empates por redondeo reproducidos en las réplicas y a lo más MAX_GOF_N observaciones
+# + fit_candidates(cache=...): reutiliza ajustes guardados (distcache.FitCache)
+# + prepare_columns() / fit_columns() / batch_matrix(): modo por lotes, muchas columnas en el mismo grupo de
+#   procesos y matriz columna × distribución con la ganadora
+# + fit_adaptive(): muestras muy grandes, ranking en una submuestra estratificada, descarte
+#   con cota de confianza del ΔAIC y reajuste de las finalistas con todos los datos
+# + quantile_sketch() / model_curves(): histograma con densidad, QQ y PP de las mejores candidatas
+#   desde una rejilla fija de cuantiles, con costo independiente de n
+# ---------------------------------------------------------------------------------------------
+
+import hashlib
+import io
+import multiprocessing as mp
+import os
+import queue
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from scipy.optimize import minimize
+from scipy.special import digamma, logsumexp, polygamma
+
+# Subir al cambiar estimadores o estadísticos: invalida los ajustes guardados en distcache
+FIT_VERSION = "7"
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Funciones de ajuste
+# ──────────────────────────────────────────────────────────────────────────────
+
+_SEPARADORES = b",;\t\r\n "
+_PATRON_NUMERO = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def parse_numbers(text: str, decimal: str = ".", thousands: Optional[str] = None) -> Tuple[np.ndarray, int]:
+    """Valores finitos del texto pegado y número de fragmentos descartados.
+
+    Separadores: coma, punto y coma, tabulador, salto de línea y espacio,
+    salvo el que se use como `decimal` o `thousands` (p. ej. decimal=","
+    y thousands="." para "1.234,5"). El texto se normaliza con un solo
+    bytes.translate (separadores → salto de línea, se borra el separador de
+    miles y la coma decimal pasa a punto) y se convierte con el lector CSV
+    de pyarrow (o pandas si no está instalado), sin lista de fragmentos en
+    Python. Los fragmentos no numéricos, nan e inf se cuentan como descartados.
+    """
+    if decimal == thousands:
+        raise ValueError("El separador decimal y el de miles deben ser distintos")
+    propios = {c.encode() for c in (decimal, thousands) if c}
+    seps = bytes(c for c in _SEPARADORES if bytes([c]) not in propios)
+    tabla = bytes.maketrans(seps + (b"," if decimal == "," else b""), b"\n" * len(seps) + (b"." if decimal == "," else b""))
+    buf = (text or "").encode().translate(tabla, thousands.encode() if thousands else b"")
+    if not buf.strip(b"\n"):
+        return np.array([]), 0
+    col = _parse_lines(buf)
+    ok = np.isfinite(col)
+    return (col if ok.all() else col[ok]), int(col.size - ok.sum())
+
+
+def _parse_lines(buf: bytes) -> np.ndarray:
+    """Un número por línea → float64 (NaN en las líneas que no son números)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pacsv
+    except ImportError:
+        serie = pd.read_csv(io.BytesIO(buf), header=None, names=["v"], skip_blank_lines=True).iloc[:, 0]
+        return pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float)
+    lectura = pacsv.ReadOptions(column_names=["v"], block_size=1 << 24)
+    try:
+        tabla = pacsv.read_csv(io.BytesIO(buf), read_options=lectura,
+                               convert_options=pacsv.ConvertOptions(column_types={"v": pa.float64()}))
+        return tabla.column(0).to_numpy(zero_copy_only=False)
+    except pa.ArrowInvalid:
+        # algún fragmento no es número: se lee como texto y los que no cumplen el patrón quedan nulos
+        texto = pacsv.read_csv(io.BytesIO(buf), read_options=lectura,
+                               convert_options=pacsv.ConvertOptions(column_types={"v": pa.string()})).column(0)
+        valido = pc.match_substring_regex(texto, _PATRON_NUMERO)
+        numeros = pc.if_else(valido, texto, pa.scalar(None, pa.string())).cast(pa.float64())
+        return numeros.to_numpy(zero_copy_only=False)
+
+
+def parse_text_input(text: str, decimal: str = ".", thousands: Optional[str] = None) -> np.ndarray:
+    return parse_numbers(text, decimal, thousands)[0]
+
+
+MIN_FRACCION_CEROS = 0.05      # fracción de ceros desde la que gamma/lognorm/weibull_min ceden a las vallas
+
+
+def get_candidate_distributions(data: np.ndarray, counts: Optional[np.ndarray] = None) -> List[str]:
+    """Candidatas según el soporte de los datos (`data` puede ser valores únicos con sus `counts`)."""
+    cand = ["norm"]
+    if np.all(data >= 0):
+        cand += ["expon", "gamma", "lognorm", "weibull_min", "triang", "uniform", "pareto"]
+    if np.all((0 <= data) & (data <= 1)):
+        cand.append("beta")
+    entera = np.all(np.mod(data, 1) == 0)
+    if entera:
+        cand += ["poisson", "nbinom", "geom"]
+    masa_en_cero = np.all(data >= 0) and np.any(data == 0)
+    if masa_en_cero:
+        # Una masa en cero degenera los ajustes continuos de soporte positivo (loc < 0 y
+        # densidad sin cota en 0, con AIC arbitrariamente bajo): desde MIN_FRACCION_CEROS se
+        # usan solo modelos de valla; con algún cero aislado se conservan, con loc libre
+        pesos = np.ones(data.shape) if counts is None else np.asarray(counts, dtype=float)
+        if pesos[data == 0].sum() >= MIN_FRACCION_CEROS * pesos.sum():
+            cand = [d for d in cand if d not in ("gamma", "lognorm", "weibull_min")]
+        if np.any(data > 0):
+            cand += ["hurdle_gamma", "hurdle_lognorm"] + (["zip", "zinb"] if entera else [])
+    # Mezclas continuas solo con datos continuos sin masa en cero: con valores repetidos una
+    # componente colapsaría sobre ellos (densidad sin cota); en datos enteros, mezclas de Poisson
+    if np.unique(data).size >= _MIN_DISTINTOS_MEZCLA and (entera or not masa_en_cero):
+        familias = ["poisson"] if entera else ["norm"] + (["gamma", "lognorm"] if np.all(data > 0) else [])
+        cand += [f"mix{k}_{f}" for f in familias for k in (2, 3)]
+    seen, ordered = set(), []
+    for d in cand:
+        if d not in seen:
+            seen.add(d)
+            ordered.append(d)
+    return ordered
+
+
+_MAX_RANGO_BINCOUNT = 10_000_000
+
+
+def data_hash(*arrays: np.ndarray) -> str:
+    """Huella BLAKE2b del contenido (tipo, forma y bytes) de uno o más arrays."""
+    h = hashlib.blake2b(digest_size=16)
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        h.update(f"{a.dtype.str}{a.shape}".encode())
+        h.update(memoryview(a).cast("B"))
+    return h.hexdigest()
+
+
+def compress_sample(data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Valores únicos ordenados y su frecuencia (bincount si son enteros de rango acotado)."""
+    data = np.asarray(data, dtype=float)
+    if data.size == 0:
+        return data, np.array([], dtype=np.int64)
+    lo, hi = data.min(), data.max()
+    if hi - lo < _MAX_RANGO_BINCOUNT and np.all(data == np.floor(data)):
+        counts = np.bincount((data - lo).astype(np.int64))
+        idx = np.flatnonzero(counts)
+        return idx + lo, counts[idx]
+    return np.unique(data, return_counts=True)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Estimadores rápidos: reciben valores x y frecuencias w, y devuelven (parámetros
+# en el orden de scipy, nº de parámetros libres) o None si no aplican a los datos,
+# y entonces se usa dist.fit. Reducen sobre el último eje: con x de forma
+# (réplicas, n) y w = 1 ajustan todas las réplicas bootstrap de una vez.
+# ──────────────────────────────────────────────────────────────────────────────
+
+FAST_FITS: Dict[str, Callable[[np.ndarray, np.ndarray], Optional[Tuple[tuple, int]]]] = {}
+
+# Familias cuyo estimador rápido fija loc = 0 (k = 2): el modelo habitual de costos y tiempos,
+# distinto del .fit de scipy con loc libre (k = 3). Sin él (datos con ceros) se ajusta loc libre;
+# cada resultado lo indica en "loc_cero".
+LOC_CERO = ("gamma", "lognorm", "weibull_min")
+
+_NEWTON_TOL = 1e-10
+_NEWTON_MAX_ITER = 100
+
+
+def _fast_fit(dist_name: str):
+    def registrar(fn):
+        FAST_FITS[dist_name] = fn
+        return fn
+    return registrar
+
+
+def _media(x, w):
+    x, w = np.broadcast_arrays(x, w)
+    return (w * x).sum(axis=-1) / w.sum(axis=-1)
+
+
+def _media_var(x, w):
+    m = _media(x, w)
+    return m, _media((x - m[..., None]) ** 2, w)
+
+
+def _newton(valor, paso_fn, tol_rel=_NEWTON_TOL):
+    """Newton elemento a elemento con valores positivos (si el paso cruza 0, se divide por 2)."""
+    for _ in range(_NEWTON_MAX_ITER):
+        paso = paso_fn(valor)
+        valor = np.where(valor - paso > 0, valor - paso, valor / 2)
+        if np.all(np.abs(paso) < tol_rel * valor):
+            break
+    return valor
+
+
+@_fast_fit("norm")
+def _fit_norm(x, w):
+    m, v = _media_var(x, w)
+    return (m, np.sqrt(v)), 2
+
+
+@_fast_fit("expon")
+def _fit_expon(x, w):
+    lo = x.min(axis=-1)
+    return (lo, _media(x, w) - lo), 2
+
+
+@_fast_fit("uniform")
+def _fit_uniform(x, w):
+    lo = x.min(axis=-1)
+    return (lo, x.max(axis=-1) - lo), 2
+
+
+@_fast_fit("lognorm")
+def _fit_lognorm(x, w):
+    # Localización fija en 0: media y desviación de log(x)
+    if x.min() <= 0:
+        return None
+    m, v = _media_var(np.log(x), w)
+    return (np.sqrt(v), 0.0 * m, np.exp(m)), 2
+
+
+@_fast_fit("gamma")
+def _fit_gamma(x, w):
+    # Localización fija en 0: Newton sobre log(a) − ψ(a) = log(media) − media(log x)
+    if x.min() <= 0:
+        return None
+    m = _media(x, w)
+    s = np.log(m) - _media(np.log(x), w)
+    if np.any(s <= 0):
+        return None
+    a0 = (3 - s + np.sqrt((s - 3) ** 2 + 24 * s)) / (12 * s)
+    a = _newton(a0, lambda a: (np.log(a) - digamma(a) - s) / (1 / a - polygamma(1, a)))
+    return (a, 0.0 * m, m / a), 2
+
+
+@_fast_fit("weibull_min")
+def _fit_weibull_min(x, w):
+    # Localización fija en 0: Newton sobre la ecuación de verosimilitud perfilada de c
+    if x.min() <= 0:
+        return None
+    lx = np.log(x)
+    lx_max = lx.max(axis=-1, keepdims=True)
+    lx_media, lx_var = _media_var(lx, w)
+
+    def paso(c):
+        e = np.exp(c[..., None] * (lx - lx_max))
+        a = _media(e * lx, w) / _media(e, w)
+        b = _media(e * lx * lx, w) / _media(e, w)
+        return (1 / c + lx_media - a) / (-1 / c ** 2 - (b - a * a))
+
+    c = _newton(1.2 / np.maximum(np.sqrt(lx_var), 1e-12), paso)
+    escala = np.exp(lx_max[..., 0] + np.log(_media(np.exp(c[..., None] * (lx - lx_max)), w)) / c)
+    return (c, 0.0 * c, escala), 2
+
+
+@_fast_fit("poisson")
+def _fit_poisson(x, w):
+    return (_media(x, w),), 1
+
+
+@_fast_fit("geom")
+def _fit_geom(x, w):
+    # Soporte 1, 2, …; con ceros se desplaza a 0, 1, … (loc = −1)
+    loc = np.where(np.where(w > 0, x, np.inf).min(axis=-1) >= 1, 0.0, -1.0)
+    return (1 / (_media(x, w) - loc), loc), 1
+
+
+@_fast_fit("nbinom")
+def _fit_nbinom(x, w):
+    # Newton sobre r con p perfilado (p = r / (r + media)); sin sobredispersión
+    # el MLE tiende a Poisson y r se acota
+    n = np.broadcast_to(w, np.broadcast_shapes(x.shape, np.shape(w))).sum(axis=-1)
+    m, v = _media_var(x, w)
+    if np.any(m <= 0):
+        return None
+    sobre = v > m
+
+    def paso(r):
+        rr = r[..., None]
+        score = (w * digamma(x + rr)).sum(axis=-1) - n * digamma(r) + n * np.log(r / (r + m))
+        hess = (w * polygamma(1, x + rr)).sum(axis=-1) - n * polygamma(1, r) + n * m / (r * (r + m))
+        return np.where(sobre, score / hess, 0.0)
+
+    r = _newton(np.where(sobre, m * m / np.where(sobre, v - m, 1.0), 1e8), paso)
+    return (r, r / (r + m)), 2
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Modelos compuestos para costos y utilización: inflación de ceros (zip, zinb),
+# valla en cero (hurdle_gamma, hurdle_lognorm) y mezclas finitas de k componentes
+# (mix2_norm, mix3_gamma, …). Parámetros en una tupla plana, con θ en el orden
+# de scipy de la familia base:
+#   cero / valla: (π0, *θ)          mezcla: (π1 … πk, *θ1, …, *θk)
+# ──────────────────────────────────────────────────────────────────────────────
+
+COMPOSITE_MODELS: Dict[str, Tuple[str, str, int]] = {
+    "zip": ("cero", "poisson", 1),
+    "zinb": ("cero", "nbinom", 1),
+    "hurdle_gamma": ("valla", "gamma", 1),
+    "hurdle_lognorm": ("valla", "lognorm", 1),
+    **{f"mix{k}_{f}": ("mezcla", f, k) for f in ("norm", "gamma", "lognorm", "poisson") for k in (2, 3)},
+}
+_ANCHO = {"norm": 2, "gamma": 3, "lognorm": 3, "poisson": 1, "nbinom": 2}   # parámetros en scipy
+_LIBRES = {"norm": 2, "gamma": 2, "lognorm": 2, "poisson": 1, "nbinom": 2}  # parámetros estimados
+
+EM_MAX_ITER = 500
+EM_TOL = 1e-8                  # parada: cambio relativo de la log-verosimilitud en todos los reinicios
+EM_REINICIOS = 4
+_PISO_VAR = 1e-4               # varianza mínima de una componente, relativa a la de los datos
+_MIN_DISTINTOS_MEZCLA = 10
+
+
+def _log_intervalo(dist, x: np.ndarray, *params) -> np.ndarray:
+    """log P(x − ½ < X ≤ x + ½) de una continua; en la cola superior con la función de supervivencia."""
+    with np.errstate(all="ignore"):
+        bajo = dist.logcdf(x + 0.5, *params)
+        bajo = bajo + np.log1p(-np.exp(dist.logcdf(x - 0.5, *params) - bajo))
+        alto = dist.logsf(x - 0.5, *params)
+        alto = alto + np.log1p(-np.exp(dist.logsf(x + 0.5, *params) - alto))
+    return np.where(x >= dist.median(*params), alto, bajo)
+
+
+def _logf_base(familia: str, theta, x: np.ndarray, entera: bool = False) -> np.ndarray:
+    dist = getattr(stats, familia)
+    with np.errstate(all="ignore"):
+        if isinstance(dist, stats.rv_discrete):
+            return dist.logpmf(x, *theta)
+        return _log_intervalo(dist, x, *theta) if entera else dist.logpdf(x, *theta)
+
+
+def composite_logf(dist_name: str, params, x: np.ndarray, entera: bool = False) -> np.ndarray:
+    """log f(x) de un modelo compuesto (masa en cero + densidad, o mezcla); ver _logf() para `entera`."""
+    tipo, familia, k = COMPOSITE_MODELS[dist_name]
+    params = np.asarray(params, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if tipo == "mezcla":
+            pesos, theta = params[:k], params[k:].reshape(k, _ANCHO[familia])
+            logf = _logf_base(familia, tuple(theta.T[..., None]), x, entera)
+            return logsumexp(np.log(pesos)[:, None] + logf, axis=0)
+        pi0, theta = params[0], params[1:]
+        en_cero = np.where(x == 0, np.log(pi0), -np.inf)
+        resto = np.log1p(-pi0) + _logf_base(familia, theta, x, entera)
+        if tipo == "valla":
+            return np.where(x == 0, en_cero, resto)
+        return np.logaddexp(en_cero, resto)
+
+
+def composite_rvs(dist_name: str, params, size, rng: np.random.Generator) -> np.ndarray:
+    """Muestra del modelo compuesto: componente (o cero) al azar y luego la familia base."""
+    tipo, familia, k = COMPOSITE_MODELS[dist_name]
+    dist = getattr(stats, familia)
+    params = np.asarray(params, dtype=float)
+    if tipo == "mezcla":
+        pesos, theta = params[:k], params[k:].reshape(k, _ANCHO[familia])
+        comp = rng.choice(k, size=size, p=pesos / pesos.sum())
+        x = np.empty(size)
+        for j in range(k):
+            sel = comp == j
+            x[sel] = dist.rvs(*theta[j], size=int(sel.sum()), random_state=rng)
+        return x
+    x = dist.rvs(*params[1:], size=size, random_state=rng).astype(float)
+    return np.where(rng.random(size) < params[0], 0.0, x)
+
+
+def _m_paso(familia: str, x: np.ndarray, w: np.ndarray, piso: float, piso_log: float) -> tuple:
+    """Estimadores ponderados por componente (reducen sobre el último eje), con pisos de varianza."""
+    if familia == "norm":
+        m, v = _media_var(x, w)
+        return m, np.sqrt(np.maximum(v, piso))
+    if familia == "lognorm":
+        m, v = _media_var(np.log(x), w)
+        return np.sqrt(np.maximum(v, piso_log)), 0.0 * m, np.exp(m)
+    if familia == "gamma":
+        m = _media(x, w)
+        s = np.maximum(np.log(m) - _media(np.log(x), w), piso_log / 2)
+        a0 = (3 - s + np.sqrt((s - 3) ** 2 + 24 * s)) / (12 * s)
+        a = _newton(a0, lambda a: (np.log(a) - digamma(a) - s) / (1 / a - polygamma(1, a)))
+        return a, 0.0 * m, m / a
+    if familia == "poisson":
+        return (np.maximum(_media(x, w), 1e-8),)
+    ajuste = FAST_FITS[familia](x, w)
+    if ajuste is None:
+        raise ValueError(f"no se pudo estimar la componente {familia}")
+    return ajuste[0]
+
+
+def _resp_iniciales(x, w, k, cero, reinicios, rng) -> np.ndarray:
+    """Responsabilidades (reinicios, componentes, n): cortes por cuantiles ponderados.
+
+    El primer reinicio usa cuantiles equiespaciados y el resto cortes al azar;
+    con masa en cero, la componente 0 toma la mitad de cada cero.
+    """
+    orden = np.argsort(x, kind="stable")
+    acum = np.empty_like(w, dtype=float)
+    acum[orden] = (np.cumsum(w[orden]) - w[orden] / 2) / w.sum()
+    cortes = np.sort(rng.random((reinicios, k - 1)), axis=1)
+    cortes[0] = np.arange(1, k) / k
+    grupo = (acum[None, :] > cortes[:, :, None]).sum(axis=1)                   # (reinicios, n)
+    resp = 0.9 * (grupo[:, None, :] == np.arange(k)[None, :, None]) + 0.1 / k  # (reinicios, k, n)
+    if not cero:
+        return resp
+    r0 = np.where(x == 0, rng.uniform(0.2, 0.8, (reinicios, 1)), 0.0)
+    r0[0] = np.where(x == 0, 0.5, 0.0)
+    return np.concatenate([r0[:, None, :], resp * (1 - r0)[:, None, :]], axis=1)
+
+
+def _em(familia: str, k: int, cero: bool, x: np.ndarray, w: np.ndarray, inicio=None,
+        reinicios: int = EM_REINICIOS, seed: int = 12345) -> Tuple[np.ndarray, tuple, float]:
+    """EM vectorizado: todos los reinicios y componentes en arrays (reinicios, componentes, n).
+
+    Cada iteración calcula las responsabilidades con logsumexp y reestima
+    pesos y parámetros de todas las componentes de todos los reinicios a la
+    vez; se detiene cuando ningún reinicio mejora más que EM_TOL. Con
+    `inicio` (pesos, θ) se parte de esos valores con un solo reinicio.
+    Devuelve pesos, θ (un array por parámetro) y log-verosimilitud del mejor.
+    """
+    n_tot = w.sum()
+    piso = _PISO_VAR * max(_media_var(x, w)[1], 1e-12)
+    piso_log = _PISO_VAR * max(_media_var(np.log(x), w)[1], 1e-12) if x.min() > 0 else 0.0
+    componentes = k + cero
+    reinicios = 1 if inicio is not None else max(1, min(reinicios, MAX_ELEMENTOS // (componentes * x.size)))
+    en_cero = np.where(x == 0, 0.0, -np.inf)
+
+    def m_paso(resp):
+        wk = w * resp
+        return wk.sum(axis=-1) / n_tot, _m_paso(familia, x, wk[:, cero:, :], piso, piso_log)
+
+    if inicio is not None:
+        pesos, theta = np.asarray(inicio[0], dtype=float)[None, :], tuple(np.asarray(p, dtype=float)[None, :]
+                                                                          for p in inicio[1])
+    else:
+        pesos, theta = m_paso(_resp_iniciales(x, w, k, cero, reinicios, np.random.default_rng(seed)))
+    ll_prev = np.full(reinicios, -np.inf)
+    for _ in range(EM_MAX_ITER):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logp = _logf_base(familia, tuple(p[..., None] for p in theta), x)
+            if cero:
+                logp = np.concatenate([np.broadcast_to(en_cero, (reinicios, 1, x.size)), logp], axis=1)
+            logp = np.log(pesos)[..., None] + logp
+        lse = logsumexp(logp, axis=1)
+        ll = (w * lse).sum(axis=-1)
+        if np.all(np.abs(ll - ll_prev) <= EM_TOL * (1 + np.abs(ll))):
+            break
+        ll_prev = ll
+        pesos, theta = m_paso(np.exp(logp - lse[:, None, :]))
+    mejor = int(np.nanargmax(np.where(np.isfinite(ll), ll, np.nan)))
+    return pesos[mejor], tuple(p[mejor] for p in theta), float(ll[mejor])
+
+
+def fit_composite(dist_name: str, x: np.ndarray, w: np.ndarray, inicio=None,
+                  seed: int = 12345) -> Optional[Tuple[tuple, int]]:
+    """Ajuste de un modelo compuesto: valla por fórmula cerrada, inflación de ceros y mezclas por EM.
+
+    Devuelve (parámetros, nº de parámetros libres) o None si el modelo no
+    aplica a los datos. `inicio` (tupla plana de parámetros) arranca el EM
+    desde un ajuste previo, p. ej. el de una submuestra.
+    """
+    tipo, familia, k = COMPOSITE_MODELS[dist_name]
+    x = np.asarray(x, dtype=float)
+    w = np.asarray(w, dtype=float)
+    positivos = x > 0
+    if tipo == "valla":
+        if positivos.all() or not positivos.any():
+            return None
+        ajuste = FAST_FITS[familia](x[positivos], w[positivos])
+        if ajuste is None:
+            return None
+        pi0 = w[~positivos].sum() / w.sum()
+        return (float(pi0), *(float(p) for p in ajuste[0])), 1 + ajuste[1]
+    if tipo == "cero":
+        if positivos.all() or not positivos.any():
+            return None
+    elif familia in ("gamma", "lognorm") and not positivos.all():
+        return None
+    ancho = _ANCHO[familia]
+    if inicio is not None:
+        inicio = np.asarray(inicio, dtype=float)
+        if tipo == "cero":
+            inicio = (np.array([inicio[0], 1 - inicio[0]]), tuple(inicio[1:, None]))
+        else:
+            inicio = (inicio[:k], tuple(inicio[k:].reshape(k, ancho).T))
+    pesos, theta, _ = _em(familia, k, tipo == "cero", x, w, inicio, seed=seed)
+    if tipo == "cero":
+        return (float(pesos[0]), *(float(p[0]) for p in theta)), 1 + _LIBRES[familia]
+    # componentes ordenadas por su media, para que los parámetros se lean igual en cada ajuste
+    orden = np.argsort(getattr(stats, familia).mean(*theta))
+    theta = np.column_stack([p[orden] for p in theta])
+    return (*(float(p) for p in pesos[orden]), *(float(p) for p in theta.ravel())), k - 1 + k * _LIBRES[familia]
+
+
+def _logf(dist_name: str, entera: bool = False) -> Callable:
+    """log f(valores, *params) para una distribución de scipy o un modelo compuesto.
+
+    Con `entera` las continuas se evalúan como probabilidad del intervalo
+    unitario alrededor de cada valor, en la misma escala que las discretas
+    (poisson, zip, …). Solo se usa para las columnas *_int de muestras
+    enteras; loglik/AIC/BIC son siempre la verosimilitud maximizada
+    (densidad en continuas).
+    """
+    if dist_name in COMPOSITE_MODELS:
+        return lambda v, *p: composite_logf(dist_name, p, v, entera)
+    dist = getattr(stats, dist_name)
+    if isinstance(dist, stats.rv_discrete):
+        return dist.logpmf
+    return (lambda v, *p: _log_intervalo(dist, v, *p)) if entera else dist.logpdf
+
+
+def _es_entera(values: np.ndarray) -> bool:
+    return bool(np.all(np.mod(values, 1) == 0))
+
+
+_BLOQUE_LOGLIK = 1 << 20  # valores únicos por bloque al evaluar la verosimilitud
+
+
+def loglik_weighted(dist_name: str, params, values: np.ndarray, counts: np.ndarray,
+                    entera: bool = False) -> float:
+    """Log-verosimilitud Σ w·log f(x) sobre valores únicos, por bloques (memoria constante).
+
+    Con `entera`, las continuas usan la probabilidad del intervalo unitario (ver _logf).
+    """
+    logf = _logf(dist_name, entera)
+    total = 0.0
+    try:
+        for i in range(0, values.size, _BLOQUE_LOGLIK):
+            total += float(np.dot(counts[i:i + _BLOQUE_LOGLIK], logf(values[i:i + _BLOQUE_LOGLIK], *params)))
+    except Exception:
+        return -np.inf
+    return -np.inf if np.isnan(total) else total
+
+
+def fit_distribution(dist_name: str, data: np.ndarray, counts: Optional[np.ndarray] = None) -> Dict[str, object]:
+    """Ajuste MLE y AIC/BIC; con `counts`, `data` son los valores únicos de la muestra."""
+    if counts is None:
+        data, counts = compress_sample(data)
+    if dist_name in COMPOSITE_MODELS:
+        ajuste = fit_composite(dist_name, data, counts)
+        if ajuste is None:
+            raise ValueError("el modelo no aplica a estos datos")
+        params, k = ajuste
+    else:
+        rapido = FAST_FITS.get(dist_name)
+        ajuste = rapido(data, counts) if rapido else None
+        if ajuste is not None:
+            params, k = tuple(float(p) for p in ajuste[0]), ajuste[1]
+        else:
+            params, k = _fit_generico(dist_name, data, counts)
+    return _resultado(dist_name, params, k, data, counts, ajuste is not None)
+
+
+MAX_EXPANDIDA = 20_000         # datos que se expanden para el .fit de scipy (punto de partida)
+
+
+def _fit_generico(dist_name: str, values: np.ndarray, counts: np.ndarray) -> Tuple[tuple, int]:
+    """Respaldo sin estimador rápido: scipy .fit y, si hubo que submuestrear, −log-verosimilitud ponderada.
+
+    scipy necesita la muestra expandida; con más de MAX_EXPANDIDA datos se
+    expande una submuestra estratificada de ese tamaño y su ajuste es el
+    inicio de _minimizar_nll() sobre todos los valores únicos.
+    """
+    dist = getattr(stats, dist_name)
+    sub_v, sub_c = stratified_subsample(values, counts, MAX_EXPANDIDA)
+    params = tuple(float(p) for p in dist.fit(np.repeat(sub_v, sub_c)))
+    if sub_v is not values:
+        if isinstance(dist, stats.rv_continuous) and not np.isfinite(loglik_weighted(dist_name, params, values, counts)):
+            params = _cubrir(dist, params, values)
+        params = _minimizar_nll(dist_name, values, counts, params)
+    return params, len(params)
+
+
+def _cubrir(dist, params: tuple, values: np.ndarray) -> tuple:
+    """Mueve loc/escala para que el soporte incluya los extremos que la submuestra no tenía."""
+    lo, hi = dist.support(*params)
+    margen = 1e-6 * max(values[-1] - values[0], 1.0)
+    nuevo_lo = min(lo, values[0] - margen) if np.isfinite(lo) else lo
+    nuevo_hi = max(hi, values[-1] + margen) if np.isfinite(hi) else hi
+    *formas, loc, escala = params
+    if np.isfinite(lo) and np.isfinite(hi):
+        factor = (nuevo_hi - nuevo_lo) / (hi - lo)
+        loc, escala = nuevo_lo - (lo - loc) * factor, escala * factor
+    else:
+        loc += (nuevo_lo - lo) if np.isfinite(lo) else (nuevo_hi - hi) if np.isfinite(hi) else 0.0
+    return (*formas, float(loc), float(escala))
+
+
+def _minimizar_nll(dist_name: str, values: np.ndarray, counts: np.ndarray, inicio) -> tuple:
+    """Nelder–Mead sobre −Σ conteo·log f(valor) desde `inicio`; en las discretas loc queda fijo."""
+    inicio = np.asarray(inicio, dtype=float)
+    discreta = isinstance(getattr(stats, dist_name), stats.rv_discrete)
+    libres = inicio[:-1] if discreta else inicio
+
+    def nll(x):
+        p = (*x, inicio[-1]) if discreta else x
+        ll = loglik_weighted(dist_name, p, values, counts)
+        return -ll if np.isfinite(ll) else np.inf
+
+    opt = minimize(nll, libres, method="Nelder-Mead",
+                   options={"xatol": 1e-8, "fatol": 1e-6, "maxiter": 400 * libres.size})
+    mejor = opt.x if opt.fun <= nll(libres) else libres
+    return tuple(float(p) for p in ((*mejor, inicio[-1]) if discreta else mejor))
+
+
+def _resultado(dist_name: str, params, k: int, values: np.ndarray, counts: np.ndarray, fast: bool) -> Dict[str, object]:
+    """loglik/AIC/BIC de los parámetros ajustados; en muestras enteras también en escala de intervalos.
+
+    loglik, aic y bic son la verosimilitud que se maximizó (densidad en las
+    continuas); "loc_cero" marca los ajustes con loc fija en 0 (LOC_CERO). Si todos los valores son enteros se agregan loglik_int,
+    aic_int y bic_int, con las continuas evaluadas como probabilidad del
+    intervalo unitario: es la escala en que se comparan con las discretas y
+    los modelos de conteo compuestos (en estas coinciden con loglik/aic/bic).
+    """
+    n = counts.sum()
+    loglik = loglik_weighted(dist_name, params, values, counts)
+    res = {"distribution": dist_name, "params": params, "k": k, "loglik": loglik, "aic": 2 * k - 2 * loglik,
+           "bic": k * np.log(n) - 2 * loglik, "fast": fast, "loc_cero": fast and dist_name in LOC_CERO}
+    if _es_entera(values):
+        ll_int = loglik_weighted(dist_name, params, values, counts, entera=True)
+        res.update(loglik_int=ll_int, aic_int=2 * k - 2 * ll_int, bic_int=k * np.log(n) - 2 * ll_int)
+    return res
+
+
+def summarize_results(res):
+    return pd.DataFrame(res).sort_values("aic").reset_index(drop=True)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Bondad de ajuste por bootstrap paramétrico
+# ──────────────────────────────────────────────────────────────────────────────
+
+MAX_ELEMENTOS = 1 << 22        # tamaño máximo de un lote de réplicas (réplicas × n)
+MAX_BOOT_GENERICO = 100        # réplicas si el reajuste necesita el optimizador genérico
+MAX_GOF_N = 5_000              # observaciones (submuestra estratificada) en la bondad de ajuste
+_MIN_ESPERADO = 5.0            # frecuencia esperada mínima por intervalo en χ²
+_MAX_DECIMALES = 6             # resolución máxima reconocida al redondear réplicas (10⁻⁶)
+
+
+def _edf_stats(u: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """KS, Cramér–von Mises y Anderson–Darling por fila de u = F(x) ordenado."""
+    n = u.shape[-1]
+    u = np.clip(u, 1e-300, 1 - 1e-16)
+    i = np.arange(1, n + 1)
+    ks = np.maximum((i / n - u).max(axis=-1), (u - (i - 1) / n).max(axis=-1))
+    cvm = 1 / (12 * n) + ((u - (2 * i - 1) / (2 * n)) ** 2).sum(axis=-1)
+    ad = -n - ((2 * i - 1) * (np.log(u) + np.log1p(-u[..., ::-1]))).sum(axis=-1) / n
+    return ks, cvm, ad
+
+
+def _edf_stats_pesos(u: np.ndarray, counts: np.ndarray) -> Tuple[float, float, float]:
+    """_edf_stats() de la muestra expandida, calculado sobre valores únicos con frecuencias.
+
+    En cada grupo de empates las posiciones i = a+1 … a+c entran por sus
+    sumas Σ(2i − 1) y Σ(2i − 1)², así no hace falta np.repeat.
+    """
+    n = counts.sum()
+    u = np.clip(u, 1e-300, 1 - 1e-16)
+    hasta = np.cumsum(counts).astype(float)
+    desde = hasta - counts
+    ks = max((hasta / n - u).max(), (u - desde / n).max())
+    s1 = counts * (2 * desde + counts)
+    s2 = (hasta * (2 * hasta - 1) * (2 * hasta + 1) - desde * (2 * desde - 1) * (2 * desde + 1)) / 3
+    cvm = 1 / (12 * n) + (counts * u ** 2 - u * s1 / n + s2 / (4 * n ** 2)).sum()
+    ad = -n - (s1 * np.log(u) + (2 * n * counts - s1) * np.log1p(-u)).sum() / n
+    return float(ks), float(cvm), float(ad)
+
+
+def _resolucion(values: np.ndarray, counts: np.ndarray) -> Optional[float]:
+    """Paso de redondeo de los datos (10⁻ᵈ) si hay valores repetidos; None si no hay empates o no se reconoce."""
+    if values.size == counts.sum():
+        return None
+    for d in range(_MAX_DECIMALES + 1):
+        escalado = values * 10.0 ** d
+        if np.all(np.abs(escalado - np.round(escalado)) <= 1e-9 * np.maximum(1.0, np.abs(escalado))):
+            return 10.0 ** -d
+    return None
+
+
+def _cdf_reticula(dist_name: str) -> Callable:
+    """P(X ≤ k) en los enteros: cdf(k) en discretas; cdf(k + ½) en continuas (intervalo unitario)."""
+    d = 0.0 if _es_discreta(dist_name) else 0.5
+    return lambda k, *p: _cdf(dist_name, p, k + d)
+
+
+def _chi2_bins(cdf: Callable, params, values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Límites superiores (inclusive) de intervalos enteros con frecuencia esperada ≥ 5.
+
+    `cdf` da P(X ≤ k) en los enteros (ver _cdf_reticula). Los intervalos
+    extremos absorben las colas; el último queda abierto.
+    """
+    n = counts.sum()
+    ks = np.arange(values.min(), values.max() + 1)
+    F = cdf(ks, *params)
+    esperado = n * np.diff(F, prepend=0.0)
+    esperado[-1] = n * (1 - (F[-2] if ks.size > 1 else 0.0))
+    cortes, acumulado = [], 0.0
+    for k, e in zip(ks, esperado):
+        acumulado += e
+        if acumulado >= _MIN_ESPERADO:
+            cortes.append(k)
+            acumulado = 0.0
+    # El último corte sobra: o cierra el final del soporte, o deja un resto < 5
+    # que se une al intervalo anterior
+    return np.asarray(cortes[:-1], dtype=float)
+
+
+def _chi2_stat(F: np.ndarray, observado: np.ndarray) -> np.ndarray:
+    """χ² por fila; `F` = P(X ≤ corte) (réplicas × cortes o cortes), `observado` réplicas × intervalos."""
+    n = observado.sum(axis=-1, keepdims=True)
+    prob = np.diff(F, prepend=0.0, append=1.0, axis=-1)
+    esperado = np.maximum(n * prob, 1e-300)
+    return ((observado - esperado) ** 2 / esperado).sum(axis=-1)
+
+
+def _reajustar(dist_name: str, dist, params, x: np.ndarray, fast: bool) -> tuple:
+    """Parámetros por réplica (tupla de arrays) con el mismo estimador que el ajuste original."""
+    if fast:
+        if isinstance(dist, stats.rv_discrete):
+            # Réplicas enteras → frecuencias por fila sobre el soporte común
+            lo, hi = x.min(), x.max()
+            filas = np.arange(x.shape[0])[:, None] * (hi - lo + 1)
+            w = np.bincount((x - lo + filas).astype(np.int64).ravel(), minlength=int(x.shape[0] * (hi - lo + 1)))
+            x, w = np.arange(lo, hi + 1), w.reshape(x.shape[0], -1)
+        else:
+            w = 1.0
+        ajuste = FAST_FITS[dist_name](x, w)
+        if ajuste is not None:
+            return tuple(np.broadcast_to(p, np.shape(w)[:1] or x.shape[:1]) for p in ajuste[0])
+    *formas, loc, escala = params  # arranque desde el ajuste original
+    return tuple(np.array(col) for col in zip(*(dist.fit(fila, *formas, loc=loc, scale=escala) for fila in x)))
+
+
+def _pit_compuesto(dist_name: str, params, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """u = F(x) para KS/CvM/AD; en una valla continua, F de la familia base sobre x > 0.
+
+    El átomo en cero se ajusta exacto (π0 = proporción de ceros) y dominaría
+    KS, así que la prueba continua se hace solo sobre la parte positiva.
+    """
+    tipo, familia, _ = COMPOSITE_MODELS[dist_name]
+    if tipo == "valla":
+        sel = x > 0
+        return sel, getattr(stats, familia).cdf(x[sel], *params[1:])
+    return np.ones(x.shape, dtype=bool), composite_cdf(dist_name, params, x)
+
+
+def _reajustar_compuesto(dist_name: str, params, X: np.ndarray) -> Tuple[np.ndarray, list]:
+    """EM por réplica desde el ajuste original; se descartan las réplicas en que el modelo no aplica."""
+    ajustes = [fit_composite(dist_name, *compress_sample(fila), inicio=params) for fila in X]
+    validas = [i for i, a in enumerate(ajustes) if a is not None]
+    return X[validas], [ajustes[i][0] for i in validas]
+
+
+def gof_bootstrap(
+    dist_name: str,
+    params,
+    values: np.ndarray,
+    counts: np.ndarray,
+    k: int,
+    fast: bool = True,
+    n_boot: int = 1000,
+    seed: int = 12345,
+) -> Dict[str, float]:
+    """Estadísticos de bondad de ajuste y valores p por bootstrap paramétrico.
+
+    `k` (parámetros libres) y `fast` (estimador rápido o genérico) vienen del
+    resultado de fit_distribution.
+
+    Con más de MAX_GOF_N observaciones la prueba (estadísticos y parámetros)
+    se hace en una muestra aleatoria simple de ese tamaño (gof_n), así el
+    costo es O(n_boot · MAX_GOF_N) y no crece con la muestra.
+
+    Discretas, y continuas sobre datos enteros: χ² con intervalos enteros de
+    frecuencia esperada ≥ 5 (las continuas con la probabilidad del intervalo
+    unitario y réplicas redondeadas al entero). Continuas: KS,
+    Anderson–Darling y Cramér–von Mises; si los datos tienen empates por
+    redondeo (p. ej. a centavos) las réplicas se redondean al mismo paso, así
+    la distribución de referencia tiene los mismos empates. Cada réplica se
+    simula con los parámetros ajustados y se reajusta con el mismo estimador
+    (el valor p incluye la estimación), en lotes de a lo más MAX_ELEMENTOS
+    valores. Si el reajuste requiere el optimizador genérico, o el EM de un
+    modelo compuesto (simulado con composite_rvs), se usan MAX_BOOT_GENERICO
+    réplicas.
+    """
+    compuesto = dist_name in COMPOSITE_MODELS
+    dist = None if compuesto else getattr(stats, dist_name)
+    discreta = _es_discreta(dist_name)
+    if compuesto or not fast:
+        n_boot = min(n_boot, MAX_BOOT_GENERICO)
+    rng = np.random.default_rng(seed)
+    if counts.sum() > MAX_GOF_N:
+        # muestra aleatoria simple (no estratificada: la prueba necesita su variabilidad muestral)
+        # y parámetros reajustados en ella, igual que en cada réplica
+        pos = rng.choice(int(counts.sum()), MAX_GOF_N, replace=False)
+        x = np.sort(values[np.searchsorted(np.cumsum(counts), pos, side="right")])
+        if compuesto:
+            ajuste = fit_composite(dist_name, *compress_sample(x), inicio=params)
+            params = ajuste[0] if ajuste is not None else params
+        else:
+            params = tuple(float(p[0]) for p in _reajustar(dist_name, dist, params, x[None, :], fast))
+        values, counts = compress_sample(x)
+    n = int(counts.sum())
+    lote = max(1, MAX_ELEMENTOS // n)
+    reticula = discreta or _es_entera(values)
+    paso = None if reticula else _resolucion(values, counts)
+    positiva = not discreta and values[0] > 0 and (
+        compuesto or dist.support(*params)[0] >= 0)
+
+    if reticula:
+        cdf = _cdf_reticula(dist_name)
+        cortes = _chi2_bins(cdf, params, values, counts)
+        if cortes.size == 0:
+            return {"chi2": np.nan, "chi2_df": 0, "chi2_p": np.nan, "gof_boot": 0, "gof_n": n}
+        K = cortes.size + 1
+        obs = np.bincount(np.searchsorted(cortes, values), weights=counts, minlength=K)
+        t_obs = _chi2_stat(cdf(cortes, *params), obs)
+    elif compuesto:
+        sel, u = _pit_compuesto(dist_name, params, values)
+        t_obs = np.array(_edf_stats_pesos(u, counts[sel]))
+    else:
+        t_obs = np.array(_edf_stats_pesos(dist.cdf(values, *params), counts))
+
+    excede = np.zeros(1 if reticula else 3)
+    validas = 0
+    for inicio in range(0, n_boot, lote):
+        b = min(lote, n_boot - inicio)
+        if compuesto:
+            X = composite_rvs(dist_name, params, (b, n), rng)
+        else:
+            X = dist.rvs(*params, size=(b, n), random_state=rng).astype(float)
+        if reticula and not discreta:
+            X = np.ceil(X - 0.5)            # intervalo (k − ½, k + ½] → k
+        elif paso is not None:
+            X = np.round(X / paso) * paso
+        if positiva:
+            # el redondeo puede dar ceros que los datos no tienen (y que los ajustes con loc = 0 no admiten)
+            X = X[(X > 0).all(axis=1)]
+        if compuesto:
+            X, p_filas = _reajustar_compuesto(dist_name, params, X)
+        if X.shape[0] == 0:
+            continue
+        b = X.shape[0]
+        validas += b
+        if not reticula:
+            X.sort(axis=1)
+        if compuesto and not reticula:
+            # parámetros (y en vallas, número de positivos) distintos por réplica: fila a fila
+            t_b = np.array([_edf_stats(_pit_compuesto(dist_name, p, fila)[1]) for p, fila in zip(p_filas, X)]).T
+            excede += (t_b >= t_obs[:, None]).sum(axis=1)
+            continue
+        if compuesto:
+            F = np.array([cdf(cortes, *p) for p in p_filas])
+        else:
+            p_b = [p[:, None] for p in _reajustar(dist_name, dist, params, X, fast)]
+            F = cdf(cortes, *p_b) if reticula else dist.cdf(X, *p_b)
+        if reticula:
+            idx = np.searchsorted(cortes, X) + K * np.arange(b)[:, None]
+            O = np.bincount(idx.ravel(), minlength=b * K).reshape(b, K)
+            excede += (_chi2_stat(F, O) >= t_obs).sum()
+        else:
+            excede += (np.array(_edf_stats(F)) >= t_obs[:, None]).sum(axis=1)
+
+    p = (1 + excede) / (validas + 1) if validas else np.full(excede.size, np.nan)
+    if reticula:
+        return {"chi2": float(t_obs), "chi2_df": K - 1 - k, "chi2_p": float(p[0]), "gof_boot": validas, "gof_n": n}
+    return {"ks": float(t_obs[0]), "ks_p": float(p[0]), "cvm": float(t_obs[1]), "cvm_p": float(p[1]),
+            "ad": float(t_obs[2]), "ad_p": float(p[2]), "gof_boot": validas, "gof_n": n}
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Modo adaptativo: ordenar en una submuestra y reajustar solo las finalistas
+# ──────────────────────────────────────────────────────────────────────────────
+
+SUBMUESTRA = 100_000           # tamaño por defecto de la submuestra estratificada
+UMBRAL_AIC = 10.0              # ΔAIC a partir del cual una candidata no tiene respaldo
+MAX_FINALISTAS = 3             # candidatas que se reajustan con todos los datos
+
+
+def stratified_subsample(values: np.ndarray, counts: np.ndarray, m: int,
+                         seed: int = 12345) -> Tuple[np.ndarray, np.ndarray]:
+    """Submuestra estratificada por cuantiles de tamaño m, ya comprimida.
+
+    La muestra ordenada se divide en m estratos de igual frecuencia y se
+    sortea una observación en cada uno, así la submuestra cubre las colas
+    igual que el centro. Trabaja sobre (valores únicos, frecuencias).
+    """
+    n = int(counts.sum())
+    if m >= n:
+        return values, counts
+    rng = np.random.default_rng(seed)
+    pos = ((np.arange(m) + rng.random(m)) * (n / m)).astype(np.int64)
+    idx = np.searchsorted(np.cumsum(counts), pos, side="right")
+    sub, frec = np.unique(idx, return_counts=True)
+    return values[sub], frec.astype(counts.dtype)
+
+
+def _logf_obs(dist_name: str, params, values: np.ndarray) -> np.ndarray:
+    with np.errstate(all="ignore"):
+        return _logf(dist_name)(values, *params)
+
+
+def screen_candidates(
+    resultados: Sequence[Dict[str, object]],
+    values: np.ndarray,
+    counts: np.ndarray,
+    n_total: int,
+    umbral: float = UMBRAL_AIC,
+    confianza: float = 0.99,
+    max_finalistas: int = MAX_FINALISTAS,
+) -> Tuple[Dict[str, float], List[Dict[str, object]]]:
+    """Cota inferior del ΔAIC con todos los datos de cada candidata frente a la mejor, y finalistas.
+
+    Con d = log f_mejor(x) − log f_j(x) en la submuestra (media μ, desviación
+    σ, m observaciones), el ΔAIC con N datos es ≈ 2Nμ + 2(k_j − k_mejor) y se
+    acota por debajo con μ − z·σ/√m (prueba de Vuong). Devuelve la cota por
+    candidata y las finalistas: las de cota < `umbral`, a lo más
+    `max_finalistas` por AIC en la submuestra (la mejor siempre lo es).
+    """
+    ok = sorted((r for r in resultados if "error" not in r and np.isfinite(r["aic"])), key=lambda r: r["aic"])
+    if not ok:
+        return {}, []
+    mejor = ok[0]
+    m = counts.sum()
+    z = stats.norm.ppf(confianza)
+    l_mejor = _logf_obs(mejor["distribution"], mejor["params"], values)
+    cotas = {}
+    for r in ok:
+        d = l_mejor - _logf_obs(r["distribution"], r["params"], values)
+        if r is mejor:
+            cotas[r["distribution"]] = -np.inf
+            continue
+        if not np.all(np.isfinite(d)):
+            # la candidata da densidad 0 a valores observados (o la mejor a los suyos)
+            cotas[r["distribution"]] = np.inf if np.any(d == np.inf) else -np.inf
+            continue
+        mu = np.dot(counts, d) / m
+        sd = np.sqrt(np.dot(counts, (d - mu) ** 2) / max(m - 1, 1))
+        cotas[r["distribution"]] = 2 * n_total * (mu - z * sd / np.sqrt(m)) + 2 * (r["k"] - mejor["k"])
+    return cotas, [r for r in ok if cotas[r["distribution"]] < umbral][:max_finalistas]
+
+
+def refine_fit(dist_name: str, values: np.ndarray, counts: np.ndarray, inicio) -> Dict[str, object]:
+    """Ajuste con todos los datos partiendo de los parámetros de la submuestra.
+
+    Los estimadores rápidos son exactos y se aplican tal cual; los modelos
+    compuestos repiten el EM desde `inicio` con un solo reinicio; para el resto
+    se minimiza la −log-verosimilitud ponderada (evaluada por bloques, sin
+    expandir la muestra) con Nelder–Mead desde `inicio`. En las discretas
+    el desplazamiento loc queda fijo.
+    """
+    if dist_name in COMPOSITE_MODELS:
+        ajuste = fit_composite(dist_name, values, counts, inicio)
+        if ajuste is None:
+            raise ValueError("el modelo no aplica a estos datos")
+        params, k = ajuste
+        return _resultado(dist_name, params, k, values, counts, True)
+    rapido = FAST_FITS.get(dist_name)
+    ajuste = rapido(values, counts) if rapido else None
+    if ajuste is not None:
+        params, k = tuple(float(p) for p in ajuste[0]), ajuste[1]
+    else:
+        params = _minimizar_nll(dist_name, values, counts, inicio)
+        k = len(params)
+    return _resultado(dist_name, params, k, values, counts, ajuste is not None)
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Ajuste en paralelo con tiempo máximo por distribución
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _fit_and_test(dist_name: str, values: np.ndarray, counts: np.ndarray, n_boot: int, seed: int,
+                  inicio=None) -> Dict[str, object]:
+    if inicio is not None:
+        return refine_fit(dist_name, values, counts, inicio)
+    res = fit_distribution(dist_name, values, counts)
+    if n_boot > 0:
+        res.update(gof_bootstrap(dist_name, res["params"], values, counts, res["k"], res["fast"], n_boot, seed))
+    return res
+
+
+def _fit_worker(cola, tarea, dist_name: str, *args) -> None:
+    try:
+        cola.put((tarea, _fit_and_test(dist_name, *args), None))
+    except Exception as err:
+        cola.put((tarea, None, f"error en ajuste → {err}"))
+
+
+def fit_candidates(
+    data: np.ndarray,
+    dists: Sequence[str],
+    timeout: Optional[float] = 30.0,
+    n_workers: Optional[int] = None,
+    counts: Optional[np.ndarray] = None,
+    n_boot: int = 0,
+    seed: int = 12345,
+    cache=None,
+) -> Iterator[Dict[str, object]]:
+    """Ajusta cada distribución y entrega los resultados a medida que terminan.
+
+    La muestra se comprime una vez en valores únicos y frecuencias (salvo que
+    ya venga comprimida en `data` + `counts`), que es lo que reciben los procesos.
+    Con n_boot > 0 cada proceso también calcula gof_bootstrap() de su candidata.
+
+    Cada candidata corre en su propio proceso (a lo más `n_workers` a la vez);
+    si supera `timeout` segundos se termina y se entrega
+    {"distribution": ..., "error": ...}, igual que si el ajuste falla. Con
+    n_workers=1 el ajuste es secuencial en este proceso y no hay tiempo
+    máximo. Cerrar el iterador antes de agotarlo termina los procesos vivos.
+
+    Con `cache` (distcache.FitCache) los ajustes ya guardados para la misma
+    muestra se entregan primero sin lanzar procesos, y los nuevos se guardan;
+    los errores y tiempos excedidos no se guardan.
+    """
+    values, counts = compress_sample(data) if counts is None else (np.asarray(data, dtype=float), counts)
+    for _, res in _fit_tasks({None: (values, counts, list(dists))}, timeout, n_workers, n_boot, seed, cache):
+        yield res
+
+
+def fit_adaptive(
+    data: np.ndarray,
+    dists: Sequence[str],
+    timeout: Optional[float] = 30.0,
+    n_workers: Optional[int] = None,
+    counts: Optional[np.ndarray] = None,
+    n_boot: int = 0,
+    seed: int = 12345,
+    cache=None,
+    submuestra: int = SUBMUESTRA,
+    umbral: float = UMBRAL_AIC,
+    max_finalistas: int = MAX_FINALISTAS,
+) -> Iterator[Dict[str, object]]:
+    """Ajuste en dos fases para muestras grandes.
+
+    1. Todas las candidatas se ajustan (y, con n_boot > 0, se evalúan con
+       gof_bootstrap) en una submuestra estratificada de `submuestra` datos.
+    2. Las que screen_candidates() descarta con confianza se entregan con
+       AIC NaN, su AIC en la submuestra ("aic_sub") y la cota del ΔAIC
+       ("delta_aic_min"); las finalistas se reajustan con todos los datos
+       desde los parámetros de la submuestra (refine_fit) y conservan la
+       bondad de ajuste calculada en la submuestra.
+
+    Si la muestra no supera el tamaño de la submuestra equivale a
+    fit_candidates(). Tiempo máximo, procesos y caché funcionan igual en
+    ambas fases.
+    """
+    values, counts = compress_sample(data) if counts is None else (np.asarray(data, dtype=float), counts)
+    n_total = int(counts.sum())
+    if n_total <= submuestra:
+        yield from fit_candidates(values, dists, timeout, n_workers, counts, n_boot, seed, cache)
+        return
+    sub_v, sub_c = stratified_subsample(values, counts, submuestra, seed)
+    fase1 = []
+    for res in fit_candidates(sub_v, dists, timeout, n_workers, sub_c, n_boot, seed, cache):
+        if "error" in res:
+            yield res
+        else:
+            fase1.append(res)
+    cotas, finalistas = screen_candidates(fase1, sub_v, sub_c, n_total, umbral, max_finalistas=max_finalistas)
+    orden = sorted(fase1, key=lambda r: r["aic"])
+    ajuste = ("params", "k", "loglik", "aic", "bic", "fast", "loglik_int", "aic_int", "bic_int")
+    gof = {r["distribution"]: {k: v for k, v in r.items() if k not in ajuste} for r in fase1}
+    nombres = {r["distribution"] for r in finalistas}
+    for r in orden:
+        if r["distribution"] not in nombres:
+            yield {**r, **{c: np.nan for c in ajuste[2:5] + ajuste[6:] if c in r}, "aic_sub": r["aic"],
+                   "delta_aic_min": float(cotas.get(r["distribution"], np.nan)), "submuestra": submuestra}
+    inicios = {r["distribution"]: r["params"] for r in finalistas}
+    aic_sub = {r["distribution"]: r["aic"] for r in finalistas}
+    for _, res in _fit_tasks({None: (values, counts, list(inicios))}, timeout, n_workers, 0, seed, cache, inicios):
+        d = res["distribution"]
+        if "error" in res:
+            yield res
+        else:
+            yield {**gof[d], **res, "aic_sub": aic_sub[d], "submuestra": submuestra}
+
+
+def prepare_columns(columns: Dict[str, np.ndarray]) -> Dict[str, Tuple[np.ndarray, np.ndarray, List[str]]]:
+    """Muestra comprimida y candidatas por columna (se omiten las columnas vacías)."""
+    muestras = {}
+    for col, data in columns.items():
+        values, counts = compress_sample(np.asarray(data, dtype=float))
+        if values.size:
+            muestras[col] = (values, counts, get_candidate_distributions(values, counts))
+    return muestras
+
+
+def fit_columns(
+    muestras: Dict[str, Tuple[np.ndarray, np.ndarray, List[str]]],
+    timeout: Optional[float] = 30.0,
+    n_workers: Optional[int] = None,
+    n_boot: int = 0,
+    seed: int = 12345,
+    cache=None,
+) -> Iterator[Tuple[str, Dict[str, object]]]:
+    """Ajusta las candidatas de varias columnas (de prepare_columns) con un solo grupo de procesos.
+
+    Cada par (columna, distribución) es una tarea, así que los núcleos se
+    reparten entre columnas aunque cada una tenga pocas candidatas. Entrega
+    (columna, resultado) a medida que terminan; tiempo máximo, errores y
+    caché funcionan como en fit_candidates().
+    """
+    yield from _fit_tasks(muestras, timeout, n_workers, n_boot, seed, cache)
+
+
+def _fit_tasks(muestras, timeout, n_workers, n_boot, seed, cache,
+               inicios=None) -> Iterator[Tuple[object, Dict[str, object]]]:
+    """Resuelve {etiqueta: (values, counts, dists)} desde la caché y luego en paralelo.
+
+    Con `inicios` ({distribución: parámetros}) cada tarea es un refine_fit()
+    partiendo de esos parámetros, guardado en la caché con una clave que
+    incluye la huella de los parámetros de partida.
+    """
+    claves = {}
+    tareas = []
+    for etiqueta, (values, counts, dists) in muestras.items():
+        digest = data_hash(values, counts) if cache is not None else None
+        for d in dists:
+            if cache is not None:
+                # el refinado depende de los parámetros de partida (y de la submuestra que los dio)
+                nombre = f"{d}|refinado|{data_hash(np.asarray(inicios[d], dtype=float))}" if inicios else d
+                claves[etiqueta, d] = cache.key(digest, nombre, n_boot, seed)
+                res = cache.get(claves[etiqueta, d])
+                if res is not None:
+                    yield etiqueta, res
+                    continue
+            tareas.append((etiqueta, d))
+    for (etiqueta, d), res in _run_pending(muestras, tareas, timeout, n_workers, n_boot, seed, inicios):
+        if cache is not None and "error" not in res:
+            cache.put(claves[etiqueta, d], res)
+        yield etiqueta, res
+
+
+def _run_pending(muestras, tareas, timeout, n_workers, n_boot, seed,
+                 inicios=None) -> Iterator[Tuple[tuple, Dict[str, object]]]:
+    inicios = inicios or {}
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers <= 1:
+        for etiqueta, d in tareas:
+            values, counts, _ = muestras[etiqueta]
+            try:
+                yield (etiqueta, d), _fit_and_test(d, values, counts, n_boot, seed, inicios.get(d))
+            except Exception as err:
+                yield (etiqueta, d), {"distribution": d, "error": f"error en ajuste → {err}"}
+        return
+
+    cola = mp.Queue()
+    pendientes = list(tareas)
+    activos = {}  # (etiqueta, distribución) → (proceso, inicio)
+    try:
+        while pendientes or activos:
+            while pendientes and len(activos) < n_workers:
+                tarea = pendientes.pop(0)
+                values, counts, _ = muestras[tarea[0]]
+                p = mp.Process(target=_fit_worker, daemon=True,
+                               args=(cola, tarea, tarea[1], values, counts, n_boot, seed, inicios.get(tarea[1])))
+                p.start()
+                activos[tarea] = (p, time.monotonic())
+
+            try:
+                tarea, res, err = cola.get(timeout=0.05)
+            except queue.Empty:
+                ahora = time.monotonic()
+                for tarea, (p, inicio) in list(activos.items()):
+                    if timeout is not None and ahora - inicio > timeout:
+                        p.terminate()
+                        p.join()
+                        del activos[tarea]
+                        yield tarea, {"distribution": tarea[1], "error": f"tiempo máximo excedido ({timeout:g} s)"}
+                    elif not p.is_alive() and p.exitcode != 0:
+                        del activos[tarea]
+                        yield tarea, {"distribution": tarea[1], "error": f"el proceso terminó con código {p.exitcode}"}
+                continue
+
+            if tarea not in activos:  # ya descartada por tiempo
+                continue
+            activos.pop(tarea)[0].join()
+            yield tarea, (res if err is None else {"distribution": tarea[1], "error": err})
+    finally:
+        for p, _ in activos.values():
+            p.terminate()
+        for p, _ in activos.values():
+            p.join()
+        cola.close()
+
+
+def batch_matrix(resultados: Dict[str, List[Dict[str, object]]]) -> pd.DataFrame:
+    """Matriz columna × distribución con el AIC, la ganadora y su valor p de bondad de ajuste.
+
+    El valor p es χ² para discretas y Anderson–Darling para continuas
+    (NaN si no se calculó el bootstrap).
+    """
+    filas = []
+    for col, res in resultados.items():
+        ok = [r for r in res if "error" not in r]
+        fila = {"columna": col, **{r["distribution"]: r["aic"] for r in ok}}
+        if ok:
+            mejor = min(ok, key=lambda r: r["aic"])
+            p = mejor.get("chi2_p", np.nan)
+            p = mejor.get("ad_p", np.nan) if pd.isna(p) else p
+            fila.update(ganadora=mejor["distribution"], aic_ganadora=mejor["aic"], gof_p=p)
+        filas.append(fila)
+    tabla = pd.DataFrame(filas)
+    for c in ("ganadora", "aic_ganadora", "gof_p"):
+        if c not in tabla:
+            tabla[c] = np.nan
+    dists = [c for c in tabla.columns if c not in ("columna", "ganadora", "aic_ganadora", "gof_p")]
+    return tabla[["columna", "ganadora", "aic_ganadora", "gof_p", *dists]]
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Diagnóstico gráfico: histograma con densidad, QQ y PP sobre una rejilla fija
+# de cuantiles. El resumen se calcula una vez desde la muestra comprimida y se
+# reutiliza para todas las candidatas, así el costo de cada gráfico no depende de n.
+# ──────────────────────────────────────────────────────────────────────────────
+
+QQ_PUNTOS = 200                # cuantiles de la rejilla (QQ y PP)
+HIST_BINS = 50                 # intervalos del histograma en datos continuos
+HIST_RANGO = (0.001, 0.999)    # el histograma cubre estos cuantiles (colas largas de costos)
+_PUNTOS_DENSIDAD = 400
+_MAX_ENTEROS_HIST = 100        # rango máximo para barras de ancho unitario en datos enteros
+
+
+def quantile_sketch(values: np.ndarray, counts: np.ndarray, n_quantiles: int = QQ_PUNTOS,
+                    n_bins: int = HIST_BINS) -> Dict[str, object]:
+    """Resumen de la muestra para los gráficos de diagnóstico.
+
+    Cuantiles empíricos exactos en las posiciones (i − ½)/m, la función de
+    distribución empírica en ellos y un histograma normalizado como densidad
+    (barras de ancho 1 si los datos son enteros de rango corto). Se obtiene
+    de la muestra comprimida, que se combina entre bloques sumando
+    frecuencias, en O(valores únicos).
+    """
+    n = counts.sum()
+    acumulado = np.cumsum(counts)
+    probs = (np.arange(1, n_quantiles + 1) - 0.5) / n_quantiles
+    quantiles = values[np.searchsorted(acumulado, probs * n)]
+    ecdf = acumulado[np.searchsorted(values, quantiles)] / n
+    entera = _es_entera(values)
+    if entera and values[-1] - values[0] <= _MAX_ENTEROS_HIST:
+        edges = np.arange(values[0] - 0.5, values[-1] + 1.0)
+    else:
+        lo, hi = values[np.searchsorted(acumulado, np.array(HIST_RANGO) * n)]
+        edges = np.linspace(lo, hi if hi > lo else lo + 1.0, n_bins + 1)
+    frec, _ = np.histogram(values, bins=edges, weights=counts)
+    return {"n": int(n), "probs": probs, "quantiles": quantiles, "ecdf": ecdf, "edges": edges,
+            "density": frec / (n * np.diff(edges)), "entera": entera}
+
+
+def composite_cdf(dist_name: str, params, x: np.ndarray) -> np.ndarray:
+    """F(x) de un modelo compuesto (masa en cero + distribución base, o mezcla)."""
+    tipo, familia, k = COMPOSITE_MODELS[dist_name]
+    dist = getattr(stats, familia)
+    params = np.asarray(params, dtype=float)
+    if tipo == "mezcla":
+        pesos, theta = params[:k], params[k:].reshape(k, _ANCHO[familia])
+        return pesos @ dist.cdf(x, *theta.T[..., None])
+    pi0 = params[0]
+    return pi0 * (x >= 0) + (1 - pi0) * dist.cdf(x, *params[1:])
+
+
+def _cdf(dist_name: str, params, x: np.ndarray) -> np.ndarray:
+    if dist_name in COMPOSITE_MODELS:
+        return composite_cdf(dist_name, params, x)
+    return getattr(stats, dist_name).cdf(x, *params)
+
+
+def _es_discreta(dist_name: str) -> bool:
+    familia = COMPOSITE_MODELS[dist_name][1] if dist_name in COMPOSITE_MODELS else dist_name
+    return isinstance(getattr(stats, familia), stats.rv_discrete)
+
+
+def _ppf(dist_name: str, params, probs: np.ndarray, lo: float, hi: float) -> np.ndarray:
+    """Cuantiles del modelo; los compuestos por bisección vectorizada sobre la rejilla."""
+    if dist_name not in COMPOSITE_MODELS:
+        return getattr(stats, dist_name).ppf(probs, *params)
+    ancho = max(hi - lo, 1.0)
+    while _cdf(dist_name, params, np.array([lo]))[0] > probs[0] and ancho < 1e12:
+        lo -= ancho
+        ancho *= 2
+    while _cdf(dist_name, params, np.array([hi]))[0] < probs[-1] and ancho < 1e12:
+        hi += ancho
+        ancho *= 2
+    a, b = np.full(probs.size, lo), np.full(probs.size, hi)
+    for _ in range(60):
+        medio = (a + b) / 2
+        arriba = _cdf(dist_name, params, medio) >= probs
+        a, b = np.where(arriba, a, medio), np.where(arriba, medio, b)
+    # discretas: el menor entero con F(x) ≥ p
+    return np.ceil(b - 1e-9) if _es_discreta(dist_name) else b
+
+
+def model_curves(dist_name: str, params, sketch: Dict[str, object],
+                 n_puntos: int = _PUNTOS_DENSIDAD) -> Dict[str, np.ndarray]:
+    """Densidad sobre el rango del histograma, cuantiles teóricos (QQ) y F en los cuantiles empíricos (PP).
+
+    Solo evalúa el modelo en la rejilla del resumen: O(QQ_PUNTOS + n_puntos)
+    por candidata, sin volver a recorrer la muestra.
+    """
+    edges, q = sketch["edges"], sketch["quantiles"]
+    if _es_discreta(dist_name) and sketch["entera"]:
+        x = np.arange(np.ceil(edges[0]), np.floor(edges[-1]) + 1)
+    else:
+        x = np.linspace(edges[0], edges[-1], n_puntos)
+        if dist_name in COMPOSITE_MODELS and COMPOSITE_MODELS[dist_name][0] == "valla":
+            x = x[x > 0]  # la masa en cero queda en la barra del histograma
+    with np.errstate(all="ignore"):
+        densidad = np.exp(_logf(dist_name)(x, *params))
+        return {"x": x, "density": np.nan_to_num(densidad, nan=0.0, posinf=0.0),
+                "qq": _ppf(dist_name, params, sketch["probs"], float(q[0]), float(q[-1])),
+                "pp": _cdf(dist_name, params, q)}
@@ -0,0 +1,394 @@
+# distglm.py – regresión GLM por IRLS para las familias sugeridas por el detector de distribuciones
+# ---------------------------------------------------------------------------------------------
+# + fit_glm(X, y, family, link): IRLS (Fisher scoring) sobre arrays de NumPy o memmap. Las filas
+#   se recorren por bloques y en cada iteración solo se acumulan X'WX (p×p) y X'Wz (p): nunca se
+#   copia ni se pondera la matriz completa.
+# + Familias: gaussian, gamma, poisson, negbin (θ por máxima verosimilitud), beta (precisión φ
+#   por máxima verosimilitud), binomial (Y ∈ {0, 1}) y lognormal (Gaussian sobre log Y, con AIC
+#   en la escala de Y para compararlo con las demás).
+# + fit_two_part(X, y, positive): modelo de dos partes para Y ≥ 0 con ceros (valla): logit de
+#   P(Y > 0) con todas las filas y gamma o lognormal con las filas Y > 0; AIC de la suma.
+# + Resultado: coeficientes con errores estándar robustos (sándwich HC0) y del modelo, AIC, BIC,
+#   log-verosimilitud y devianza. Sin streamlit ni matplotlib.
+# ---------------------------------------------------------------------------------------------
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+from scipy.linalg import LinAlgError, solve
+from scipy.special import digamma, expit, logit, polygamma
+
+MAX_ELEMENTOS = 1 << 22        # elementos por bloque de filas (filas × columnas)
+IRLS_MAX_ITER = 100
+IRLS_TOL = 1e-10
+_MU_MIN = 1e-10
+
+# enlace → (g(μ), μ(η), dμ/dη)
+LINKS = {
+    "identity": (lambda mu: mu, lambda eta: eta, lambda eta: np.ones_like(eta)),
+    "log": (np.log, np.exp, np.exp),
+    "inverse": (lambda mu: 1 / mu, lambda eta: 1 / eta, lambda eta: -1 / eta ** 2),
+    "sqrt": (np.sqrt, lambda eta: eta ** 2, lambda eta: 2 * eta),
+    "logit": (logit, expit, lambda eta: expit(eta) * expit(-eta)),
+    "probit": (stats.norm.ppf, stats.norm.cdf, stats.norm.pdf),
+    "cloglog": (lambda mu: np.log(-np.log1p(-mu)), lambda eta: -np.expm1(-np.exp(eta)),
+                lambda eta: np.exp(eta - np.exp(eta))),
+}
+
+# familia → (enlaces admitidos, el primero es el canónico o el habitual)
+FAMILIES = {
+    "gaussian": ("identity", "log", "inverse"),
+    "lognormal": ("identity",),
+    "gamma": ("log", "inverse", "identity"),
+    "poisson": ("log", "sqrt", "identity"),
+    "negbin": ("log", "sqrt", "identity"),
+    "beta": ("logit", "probit", "cloglog"),
+    "binomial": ("logit", "probit", "cloglog"),
+}
+
+# modelo de dos partes → familia de la parte positiva
+TWO_PART = {"hurdle_gamma": "gamma", "hurdle_lognormal": "lognormal"}
+
+
+def _validar(family: str, y: np.ndarray) -> None:
+    if family in ("gamma", "lognormal") and np.any(y <= 0):
+        raise ValueError(f"La familia {family} requiere Y > 0")
+    if family in ("poisson", "negbin") and np.any(y < 0):
+        raise ValueError(f"La familia {family} requiere Y ≥ 0")
+    if family == "beta" and np.any((y <= 0) | (y >= 1)):
+        raise ValueError("La regresión beta requiere 0 < Y < 1")
+    if family == "binomial" and np.any((y != 0) & (y != 1)):
+        raise ValueError("La regresión binomial requiere Y ∈ {0, 1}")
+
+
+def _acotar(family: str, mu: np.ndarray) -> np.ndarray:
+    if family in ("beta", "binomial"):
+        return np.clip(mu, _MU_MIN, 1 - _MU_MIN)
+    if family in ("gamma", "poisson", "negbin"):
+        return np.maximum(mu, _MU_MIN)
+    return mu
+
+
+def _pesos(family: str, y, mu, dmu, extra) -> Tuple[np.ndarray, np.ndarray]:
+    """Peso de trabajo W = (dμ/dη)²/V(μ) y score u = (y − μ)·(dμ/dη)/V(μ) por observación.
+
+    Con ellos la información es Σ W·x·x' y el score Σ u·x; z = η + u/W es
+    la respuesta de trabajo del IRLS. En beta, W y u incluyen la precisión φ.
+    """
+    if family == "beta":
+        a, b = mu * extra, (1 - mu) * extra
+        w = extra ** 2 * (polygamma(1, a) + polygamma(1, b)) * dmu ** 2
+        u = extra * (logit(y) - (digamma(a) - digamma(b))) * dmu
+        return w, u
+    if family in ("gaussian", "lognormal"):
+        var = np.ones_like(mu)
+    elif family == "gamma":
+        var = mu ** 2
+    elif family == "poisson":
+        var = mu
+    elif family == "binomial":
+        var = mu * (1 - mu)
+    else:
+        var = mu + mu ** 2 / extra
+    return dmu ** 2 / var, (y - mu) * dmu / var
+
+
+def _devianza(family: str, y, mu, extra) -> np.ndarray:
+    """Devianza por observación (en beta, −2·log-verosimilitud)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if family in ("gaussian", "lognormal"):
+            return (y - mu) ** 2
+        if family == "gamma":
+            return -2 * (np.log(y / mu) - (y - mu) / mu)
+        ylog = np.where(y > 0, y * np.log(y / mu), 0.0)
+        if family == "poisson":
+            return 2 * (ylog - (y - mu))
+        if family == "negbin":
+            return 2 * (ylog - (y + extra) * np.log((y + extra) / (mu + extra)))
+        if family == "binomial":
+            return -2 * np.where(y > 0, np.log(mu), np.log1p(-mu))
+        return -2 * stats.beta.logpdf(y, mu * extra, (1 - mu) * extra)
+
+
+def _score_extra(family: str, y, mu, extra) -> Tuple[float, float]:
+    """Score y derivada segunda de la log-verosimilitud respecto de θ (negbin) o φ (beta)."""
+    if family == "negbin":
+        t = extra
+        s = digamma(y + t) - digamma(t) + np.log(t) + 1 - np.log(t + mu) - (y + t) / (t + mu)
+        h = polygamma(1, y + t) - polygamma(1, t) + 1 / t - 2 / (t + mu) + (y + t) / (t + mu) ** 2
+    else:
+        f = extra
+        s = (digamma(f) - mu * digamma(mu * f) - (1 - mu) * digamma((1 - mu) * f)
+             + mu * np.log(y) + (1 - mu) * np.log1p(-y))
+        h = polygamma(1, f) - mu ** 2 * polygamma(1, mu * f) - (1 - mu) ** 2 * polygamma(1, (1 - mu) * f)
+    return float(s.sum()), float(h.sum())
+
+
+def _bloques(n: int, p: int):
+    paso = max(1, MAX_ELEMENTOS // max(p, 1))
+    for i in range(0, n, paso):
+        yield slice(i, min(i + paso, n))
+
+
+def _diseno(X, filas: slice, intercept: bool) -> np.ndarray:
+    xb = np.asarray(X[filas], dtype=float)
+    return np.column_stack([np.ones(xb.shape[0]), xb]) if intercept else xb
+
+
+def _lotes(X, y, p: int, intercept: bool, mask=None):
+    """Pares (diseño, respuesta) por bloque de filas; con `mask`, solo las filas marcadas del bloque."""
+    for filas in _bloques(y.size, p):
+        xb, yb = _diseno(X, filas, intercept), y[filas]
+        if mask is not None:
+            sel = mask[filas]
+            xb, yb = xb[sel], yb[sel]
+        yield xb, yb
+
+
+def _pasada(X, y, beta, family, link, extra, intercept, meat=False, mask=None):
+    """Una pasada por bloques: X'WX, X'Wz, devianza y score de θ/φ (y la carne del sándwich)."""
+    _, inversa, deriv = LINKS[link]
+    p = beta.size
+    xtwx = np.zeros((p, p))
+    xtwz = np.zeros(p)
+    carne = np.zeros((p, p)) if meat else None
+    dev = s_extra = h_extra = 0.0
+    for xb, yb in _lotes(X, y, p, intercept, mask):
+        eta = xb @ beta
+        with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+            mu = _acotar(family, inversa(eta))
+            w, u = _pesos(family, yb, mu, deriv(eta), extra)
+        z = eta + u / w
+        xtwx += xb.T @ (xb * w[:, None])
+        xtwz += xb.T @ (w * z)
+        dev += float(_devianza(family, yb, mu, extra).sum())
+        if meat:
+            carne += xb.T @ (xb * (u * u)[:, None])
+        if family in ("negbin", "beta"):
+            s, h = _score_extra(family, yb, mu, extra)
+            s_extra += s
+            h_extra += h
+    return xtwx, xtwz, dev, s_extra, h_extra, carne
+
+
+def _resolver(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    try:
+        return solve(a, b, assume_a="pos")
+    except (LinAlgError, ValueError):
+        return np.linalg.lstsq(a, b, rcond=None)[0]
+
+
+def _loglik(family: str, X, y, beta, link, extra, intercept, mask=None) -> Tuple[float, Optional[float]]:
+    """Log-verosimilitud en la escala de Y y dispersión estimada (σ² o φ de gamma, si corresponde)."""
+    _, inversa, _ = LINKS[link]
+    n = y.size if mask is None else int(mask.sum())
+    ll = dev = 0.0
+    for xb, yb in _lotes(X, y, beta.size, intercept, mask):
+        mu = _acotar(family, inversa(xb @ beta))
+        if family in ("gaussian", "lognormal", "gamma"):
+            dev += float(_devianza(family, yb, mu, extra).sum())
+        elif family == "poisson":
+            ll += float(stats.poisson.logpmf(yb, mu).sum())
+        elif family == "negbin":
+            ll += float(stats.nbinom.logpmf(yb, extra, extra / (extra + mu)).sum())
+        elif family == "binomial":
+            ll -= 0.5 * float(_devianza(family, yb, mu, extra).sum())
+        else:
+            ll += float(stats.beta.logpdf(yb, mu * extra, (1 - mu) * extra).sum())
+    if family in ("gaussian", "lognormal"):
+        s2 = dev / n
+        return -0.5 * n * (np.log(2 * np.pi * s2) + 1), s2
+    if family == "gamma":
+        # forma ν por máxima verosimilitud dada μ: log ν − ψ(ν) = D/(2n), D = devianza
+        c = dev / (2 * n)
+        nu = (3 - c + np.sqrt((c - 3) ** 2 + 24 * c)) / (12 * c) if c > 0 else 1e10
+        for _ in range(50):
+            paso = (np.log(nu) - digamma(nu) - c) / (1 / nu - float(polygamma(1, nu)))
+            nu = nu - paso if nu - paso > 0 else nu / 2
+            if abs(paso) <= 1e-12 * nu:
+                break
+        for xb, yb in _lotes(X, y, beta.size, intercept, mask):
+            mu = _acotar(family, inversa(xb @ beta))
+            ll += float(stats.gamma.logpdf(yb, nu, scale=mu / nu).sum())
+        return ll, 1 / nu
+    return ll, None
+
+
+def _pearson(X, y, beta, family, link, intercept, mask=None) -> float:
+    _, inversa, _ = LINKS[link]
+    total = 0.0
+    for xb, yb in _lotes(X, y, beta.size, intercept, mask):
+        mu = _acotar(family, inversa(xb @ beta))
+        var = mu ** 2 if family == "gamma" else 1.0
+        total += float(((yb - mu) ** 2 / var).sum())
+    return total
+
+
+def fit_glm(
+    X,
+    y,
+    family: str = "gaussian",
+    link: Optional[str] = None,
+    names: Optional[Sequence[str]] = None,
+    intercept: bool = True,
+    max_iter: int = IRLS_MAX_ITER,
+    tol: float = IRLS_TOL,
+    mask: Optional[np.ndarray] = None,
+) -> Dict[str, object]:
+    """Ajusta un GLM por IRLS acumulando X'WX por bloques de filas.
+
+    `X` (n × p, array o memmap, sin columna de unos si intercept=True) solo
+    se lee por bloques de a lo más MAX_ELEMENTOS elementos. Con `mask`
+    (booleano de largo n) el modelo usa solo las filas marcadas: se
+    descartan dentro de cada bloque, sin copiar X. En negbin y
+    beta el parámetro adicional (θ o φ) se actualiza con un paso de Newton
+    por iteración, alternando con los coeficientes. Si la devianza empeora,
+    el paso de los coeficientes se reduce a la mitad.
+
+    Devuelve {"family", "link", "coef" (DataFrame), "loglik", "aic", "bic",
+    "deviance", "dispersion", "n", "k", "iterations", "converged"}. Los
+    errores estándar robustos son el sándwich HC0 (X'WX)⁻¹ (Σ u²·x·x') (X'WX)⁻¹;
+    los del modelo, φ·(X'WX)⁻¹ con φ de Pearson en gaussian y gamma.
+    """
+    link = link or FAMILIES[family][0]
+    if link not in FAMILIES[family]:
+        raise ValueError(f"Enlace {link} no disponible para la familia {family}")
+    g, _, _ = LINKS[link]
+    y = np.asarray(y, dtype=float)
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            raise ValueError("La máscara no selecciona ninguna fila")
+        # las filas fuera de la máscara no entran en ningún bloque; se rellenan con un valor válido
+        y = np.where(mask, y, y[mask.argmax()])
+    _validar(family, y)
+    jacobiano = 0.0
+    if family == "lognormal":
+        jacobiano = float(np.log(y if mask is None else y[mask]).sum())
+        y = np.log(y)
+    n = y.size if mask is None else int(mask.sum())
+    p = X.shape[1] + intercept
+    names = list(names) if names is not None else [f"x{j}" for j in range(1, X.shape[1] + 1)]
+    names = ["(Intercepto)"] * intercept + names
+
+    # Inicio: μ0 entre y y su media (dentro del soporte), primera iteración con η0 = g(μ0)
+    activas = y if mask is None else y[mask]
+    media = activas.mean()
+    extra = 1.0
+    if family == "beta":
+        extra = max(media * (1 - media) / max(activas.var(), 1e-12) - 1, 0.1)
+    _, _, deriv = LINKS[link]
+    xtwx = np.zeros((p, p))
+    xtwz = np.zeros(p)
+    for xb, yb in _lotes(X, y, p, intercept, mask):
+        mu0 = _acotar(family, (yb + media) / 2)
+        eta0 = g(mu0)
+        w, u = _pesos(family, yb, mu0, deriv(eta0), extra)
+        xtwx += xb.T @ (xb * w[:, None])
+        xtwz += xb.T @ (w * (eta0 + u / w))
+    beta = _resolver(xtwx, xtwz)
+
+    dev_prev, beta_prev = np.inf, None
+    convergio = False
+    for it in range(1, max_iter + 1):
+        xtwx, xtwz, dev, s_extra, h_extra, _ = _pasada(X, y, beta, family, link, extra, intercept, mask=mask)
+        mitades = 0
+        # con θ/φ la devianza cambia también por el paso de ese parámetro: solo se exige que sea finita
+        while beta_prev is not None and mitades < 30 and not (
+                dev <= dev_prev * (1 + 1e-8) + 1e-12 or family in ("negbin", "beta") and np.isfinite(dev)):
+            beta = (beta + beta_prev) / 2
+            xtwx, xtwz, dev, s_extra, h_extra, _ = _pasada(X, y, beta, family, link, extra, intercept, mask=mask)
+            mitades += 1
+        if not np.isfinite(dev):
+            raise ValueError(f"El IRLS no encontró valores válidos de μ con el enlace {link}")
+        paso_extra = 0.0
+        if family in ("negbin", "beta") and h_extra < 0:
+            paso_extra = s_extra / h_extra
+            extra = extra - paso_extra if extra - paso_extra > 0 else extra / 2
+        if abs(dev - dev_prev) <= tol * (abs(dev) + 0.1) and abs(paso_extra) <= 1e-8 * extra:
+            convergio = True
+            break
+        dev_prev, beta_prev = dev, beta
+        beta = _resolver(xtwx, xtwz)
+
+    xtwx, _, dev, _, _, carne = _pasada(X, y, beta, family, link, extra, intercept, meat=True, mask=mask)
+    inv = np.linalg.pinv(xtwx)
+    robusta = inv @ carne @ inv
+    phi = 1.0
+    if family in ("gaussian", "lognormal", "gamma"):
+        phi = _pearson(X, y, beta, family, link, intercept, mask) / max(n - p, 1)
+
+    ll, disp = _loglik(family, X, y, beta, link, extra, intercept, mask)
+    ll -= jacobiano
+    k = p + (family not in ("poisson", "binomial"))
+    ee = np.sqrt(np.clip(np.diag(robusta), 0, None))
+    zval = beta / ee
+    zq = stats.norm.ppf(0.975)
+    coef = pd.DataFrame({
+        "Variable": names,
+        "Coeficiente": beta,
+        "EE robusto": ee,
+        "z": zval,
+        "p": 2 * stats.norm.sf(np.abs(zval)),
+        "IC 95% inf.": beta - zq * ee,
+        "IC 95% sup.": beta + zq * ee,
+        "EE modelo": np.sqrt(np.clip(np.diag(phi * inv), 0, None)),
+    })
+    if family in ("negbin", "beta"):
+        dispersion = ("θ" if family == "negbin" else "φ", float(extra))
+    elif disp is not None:
+        dispersion = ("σ²" if family in ("gaussian", "lognormal") else "φ", float(disp))
+    else:
+        dispersion = (None, None)
+    return {
+        "family": family, "link": link, "coef": coef, "loglik": ll, "aic": 2 * k - 2 * ll,
+        "bic": k * np.log(n) - 2 * ll, "deviance": dev if family != "beta" else np.nan,
+        "dispersion": dispersion, "n": n, "k": k, "iterations": it, "converged": convergio,
+    }
+
+
+def fit_two_part(
+    X,
+    y,
+    positive: str = "gamma",
+    link: Optional[str] = None,
+    names: Optional[Sequence[str]] = None,
+    intercept: bool = True,
+    max_iter: int = IRLS_MAX_ITER,
+    tol: float = IRLS_TOL,
+) -> Dict[str, object]:
+    """Modelo de dos partes (valla en cero) para Y ≥ 0 con ceros y positivos.
+
+    Parte 1: logit de P(Y > 0) con todas las filas. Parte 2: GLM `positive`
+    ("gamma" o "lognormal", enlace `link`) con las filas Y > 0, elegidas con
+    la máscara de fit_glm() sin copiar X. Las dos
+    verosimilitudes se factorizan, así la log-verosimilitud, k, AIC y BIC
+    son sumas y se comparan con los de fit_glm() en la escala de Y.
+
+    Devuelve las claves de fit_glm() (family "two_part", coef con la columna
+    "Parte") más "parts": (resultado logit, resultado positivo).
+    """
+    if positive not in TWO_PART.values():
+        raise ValueError(f"Parte positiva {positive} no disponible (use gamma o lognormal)")
+    y = np.asarray(y, dtype=float)
+    if np.any(y < 0):
+        raise ValueError("El modelo de dos partes requiere Y ≥ 0")
+    pos = y > 0
+    if pos.all() or not pos.any():
+        raise ValueError("El modelo de dos partes requiere ceros y valores positivos en Y")
+    logit_ = fit_glm(X, pos.astype(float), "binomial", "logit", names, intercept, max_iter, tol)
+    positiva = fit_glm(X, y, positive, link, names, intercept, max_iter, tol, mask=pos)
+    ll = logit_["loglik"] + positiva["loglik"]
+    k = logit_["k"] + positiva["k"]
+    n = y.size
+    coef = pd.concat([logit_["coef"].assign(Parte="P(Y > 0)"), positiva["coef"].assign(Parte="Y | Y > 0")],
+                     ignore_index=True)
+    return {
+        "family": "two_part", "link": positiva["link"], "coef": coef[["Parte", *logit_["coef"].columns]],
+        "loglik": ll, "aic": 2 * k - 2 * ll, "bic": k * np.log(n) - 2 * ll, "deviance": np.nan,
+        "dispersion": positiva["dispersion"], "n": n, "k": k,
+        "iterations": logit_["iterations"] + positiva["iterations"],
+        "converged": logit_["converged"] and positiva["converged"], "parts": (logit_, positiva),
+    }
@@ -0,0 +1,278 @@
+# distio.py – lectura de una sola columna numérica para el detector de distribuciones
+# ---------------------------------------------------------------------------------------------
+# + list_columns(): solo lee el encabezado / esquema (y una muestra de filas en CSV para
+#   reconocer las columnas numéricas)
+# + read_column(): carga únicamente la columna elegida
+#   · CSV por bloques (usecols + chunksize) en un array float prealocado
+#   · Parquet por lotes de pyarrow en un array prealocado con el nº de filas del metadato
+#   · Feather / Arrow IPC con memory map (sin copia si la columna no tiene nulos)
+#   · .npy con np.load(mmap_mode="r")
+#   El pico de memoria queda cerca del tamaño de esa columna. Sin streamlit ni matplotlib.
+# + read_columns(): varias columnas en una sola pasada (modo por lotes)
+# + read_matrix(): varias columnas alineadas por fila (matriz de diseño para distglm), solo las
+#   filas completas
+# ---------------------------------------------------------------------------------------------
+
+import importlib
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FORMATOS = {
+    ".csv": "csv", ".txt": "csv",
+    ".xlsx": "excel", ".xls": "excel",
+    ".parquet": "parquet", ".pq": "parquet",
+    ".feather": "feather", ".arrow": "feather", ".ipc": "feather",
+    ".npy": "npy",
+}
+
+_FILAS_MUESTRA = 1_000          # filas leídas en CSV para detectar columnas numéricas
+_BLOQUE_BYTES = 1 << 24         # lectura por bloques al contar líneas
+
+
+def file_format(name: str) -> str:
+    """Formato según la extensión ('csv' si no se reconoce)."""
+    return FORMATOS.get(os.path.splitext(str(name).lower())[1], "csv")
+
+
+def _pyarrow(modulo: str = "pyarrow"):
+    try:
+        return importlib.import_module(modulo)
+    except ImportError as err:
+        raise ImportError("Para leer Parquet/Feather instale pyarrow: pip install pyarrow") from err
+
+
+def _es_ruta(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _abrir_ipc(source):
+    """Lector Arrow IPC (Feather v2); una ruta se abre con memory map."""
+    pa = _pyarrow()
+    return pa.ipc.open_file(pa.memory_map(os.fspath(source)) if _es_ruta(source) else source)
+
+
+def _rebobinar(source) -> None:
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def _npy_columns(arr: np.ndarray) -> List[str]:
+    if arr.dtype.names:
+        return [n for n in arr.dtype.names if np.issubdtype(arr.dtype[n], np.number)]
+    return ["valor"] if arr.ndim == 1 else [f"col_{j}" for j in range(arr.shape[1])]
+
+
+def list_columns(source, fmt: str) -> List[str]:
+    """Columnas numéricas del archivo sin cargar los datos."""
+    if fmt == "csv":
+        muestra = pd.read_csv(source, nrows=_FILAS_MUESTRA)
+        _rebobinar(source)
+        return muestra.select_dtypes(include=[np.number]).columns.tolist()
+    if fmt == "excel":
+        muestra = pd.read_excel(source, nrows=_FILAS_MUESTRA)
+        _rebobinar(source)
+        return muestra.select_dtypes(include=[np.number]).columns.tolist()
+    if fmt == "npy":
+        arr = np.load(source, mmap_mode="r") if _es_ruta(source) else np.load(source)
+        _rebobinar(source)
+        return _npy_columns(arr)
+    pa = _pyarrow()
+    if fmt == "parquet":
+        esquema = _pyarrow("pyarrow.parquet").ParquetFile(source).schema_arrow
+    else:
+        esquema = _abrir_ipc(source).schema
+    _rebobinar(source)
+    return [c.name for c in esquema if pa.types.is_integer(c.type) or pa.types.is_floating(c.type)
+            or pa.types.is_decimal(c.type)]
+
+
+def _count_lines(source) -> int:
+    """Número de saltos de línea (cota superior de filas) leyendo por bloques."""
+    total = 0
+    fh = open(source, "rb") if _es_ruta(source) else source
+    try:
+        while True:
+            bloque = fh.read(_BLOQUE_BYTES)
+            if not bloque:
+                break
+            total += bloque.count(b"\n")
+    finally:
+        if fh is not source:
+            fh.close()
+        _rebobinar(source)
+    return total
+
+
+def _append_valid(out: np.ndarray, pos: int, valores: np.ndarray) -> int:
+    """Copia los valores finitos de un bloque en out[pos:] y devuelve la nueva posición."""
+    valores = valores[np.isfinite(valores)]
+    out[pos:pos + valores.size] = valores
+    return pos + valores.size
+
+
+def read_column(
+    source,
+    fmt: str,
+    column: str,
+    chunksize: int = 1_000_000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> np.ndarray:
+    """Valores finitos de una columna como float64, leyendo solo esa columna.
+
+    En CSV y Parquet el array se preasigna (líneas del archivo o filas del
+    metadato) y se llena bloque a bloque; los nulos y no numéricos se
+    descartan sin copias intermedias del archivo completo. `progress` recibe
+    las filas leídas hasta el momento.
+    """
+    return read_columns(source, fmt, [column], chunksize, progress)[column]
+
+
+def read_columns(
+    source,
+    fmt: str,
+    columns: List[str],
+    chunksize: int = 1_000_000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, np.ndarray]:
+    """Como read_column() para varias columnas, con una sola pasada por el archivo."""
+    if fmt == "csv":
+        filas = _count_lines(source) + 1
+        out = {c: np.empty(filas) for c in columns}
+        pos = dict.fromkeys(columns, 0)
+        leidas = 0
+        for bloque in pd.read_csv(source, usecols=columns, chunksize=chunksize):
+            for c in columns:
+                pos[c] = _append_valid(out[c], pos[c], pd.to_numeric(bloque[c], errors="coerce").to_numpy(dtype=float))
+            leidas += len(bloque)
+            if progress:
+                progress(leidas)
+        return {c: out[c][:pos[c]] for c in columns}
+
+    if fmt == "excel":
+        tabla = pd.read_excel(source, usecols=columns)
+        return {c: pd.to_numeric(tabla[c], errors="coerce").dropna().to_numpy(dtype=float) for c in columns}
+
+    if fmt == "npy":
+        arr = np.load(source, mmap_mode="r") if _es_ruta(source) else np.load(source)
+        nombres = _npy_columns(arr)
+        return {c: _copy_finite(arr[c] if arr.dtype.names else
+                                (arr if arr.ndim == 1 else arr[:, nombres.index(c)]), chunksize, progress)
+                for c in columns}
+
+    if fmt == "parquet":
+        pf = _pyarrow("pyarrow.parquet").ParquetFile(source, memory_map=_es_ruta(source))
+        out = {c: np.empty(pf.metadata.num_rows) for c in columns}
+        pos = dict.fromkeys(columns, 0)
+        leidas = 0
+        for lote in pf.iter_batches(batch_size=chunksize, columns=columns):
+            for c in columns:
+                col = lote.column(lote.schema.get_field_index(c))
+                pos[c] = _append_valid(out[c], pos[c], col.to_numpy(zero_copy_only=False).astype(float, copy=False))
+            leidas += lote.num_rows
+            if progress:
+                progress(leidas)
+        return {c: out[c][:pos[c]] for c in columns}
+
+    # Feather / Arrow IPC: con memory map la columna no se copia a RAM
+    lector = _abrir_ipc(source)
+    return {c: _ipc_column(lector, c, chunksize, progress) for c in columns}
+
+
+def _ipc_column(lector, column: str, chunksize: int, progress: Optional[Callable[[int], None]]) -> np.ndarray:
+    j = lector.schema.get_field_index(column)
+    lotes = [lector.get_batch(i).column(j) for i in range(lector.num_record_batches)]
+    if len(lotes) == 1 and lotes[0].null_count == 0:
+        return _copy_finite(lotes[0].to_numpy(zero_copy_only=False), chunksize, progress)
+    out = np.empty(sum(len(c) for c in lotes))
+    pos = leidas = 0
+    for c in lotes:
+        pos = _append_valid(out, pos, c.to_numpy(zero_copy_only=False).astype(float, copy=False))
+        leidas += len(c)
+        if progress:
+            progress(leidas)
+    return out[:pos]
+
+
+def _copy_finite(col: np.ndarray, chunksize: int, progress: Optional[Callable[[int], None]]) -> np.ndarray:
+    """Devuelve la columna tal cual si ya es float64 finita; si no, una copia filtrada por bloques."""
+    n = col.shape[0]
+    if col.dtype == np.float64 and all(np.isfinite(col[i:i + chunksize]).all() for i in range(0, n, chunksize)):
+        if progress:
+            progress(n)
+        return col
+    out = np.empty(n)
+    pos = 0
+    for i in range(0, n, chunksize):
+        pos = _append_valid(out, pos, np.asarray(col[i:i + chunksize], dtype=float))
+        if progress:
+            progress(min(i + chunksize, n))
+    return out[:pos]
+
+
+def _append_rows(out: np.ndarray, pos: int, bloque: np.ndarray) -> int:
+    """Copia las filas completamente finitas de un bloque en out[pos:] y devuelve la nueva posición."""
+    bloque = bloque[np.isfinite(bloque).all(axis=1)]
+    out[pos:pos + len(bloque)] = bloque
+    return pos + len(bloque)
+
+
+def read_matrix(
+    source,
+    fmt: str,
+    columns: List[str],
+    chunksize: int = 1_000_000,
+    progress: Optional[Callable[[int], None]] = None,
+) -> np.ndarray:
+    """Matriz float64 (filas completas × columnas) con las columnas en el orden pedido.
+
+    A diferencia de read_columns(), las filas se mantienen alineadas: una
+    fila con un nulo o no numérico en cualquiera de las columnas se descarta
+    entera. La matriz se preasigna y se llena bloque a bloque.
+    """
+    if fmt == "excel":
+        tabla = pd.read_excel(source, usecols=columns)[columns].apply(pd.to_numeric, errors="coerce")
+        bloque = tabla.to_numpy(dtype=float)
+        return bloque[np.isfinite(bloque).all(axis=1)]
+
+    if fmt == "npy":
+        arr = np.load(source, mmap_mode="r") if _es_ruta(source) else np.load(source)
+        nombres = _npy_columns(arr)
+        n = arr.shape[0]
+        out = np.empty((n, len(columns)))
+        pos = 0
+        for i in range(0, n, chunksize):
+            trozo = arr[i:i + chunksize]
+            bloque = np.column_stack([trozo[c] if arr.dtype.names else
+                                      (trozo if arr.ndim == 1 else trozo[:, nombres.index(c)]) for c in columns])
+            pos = _append_rows(out, pos, bloque.astype(float, copy=False))
+            if progress:
+                progress(min(i + chunksize, n))
+        return out[:pos]
+
+    if fmt == "csv":
+        out = np.empty((_count_lines(source) + 1, len(columns)))
+        lotes = (b[columns].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+                 for b in pd.read_csv(source, usecols=columns, chunksize=chunksize))
+    elif fmt == "parquet":
+        pf = _pyarrow("pyarrow.parquet").ParquetFile(source, memory_map=_es_ruta(source))
+        out = np.empty((pf.metadata.num_rows, len(columns)))
+        lotes = (_lote_arrow(b, columns) for b in pf.iter_batches(batch_size=chunksize, columns=columns))
+    else:
+        lector = _abrir_ipc(source)
+        out = np.empty((sum(lector.get_batch(i).num_rows for i in range(lector.num_record_batches)), len(columns)))
+        lotes = (_lote_arrow(lector.get_batch(i), columns) for i in range(lector.num_record_batches))
+    pos = leidas = 0
+    for bloque in lotes:
+        pos = _append_rows(out, pos, bloque)
+        leidas += len(bloque)
+        if progress:
+            progress(leidas)
+    return out[:pos]
+
+
+def _lote_arrow(lote, columns: List[str]) -> np.ndarray:
+    return np.column_stack([lote.column(lote.schema.get_field_index(c)).to_numpy(zero_copy_only=False)
+                            .astype(float, copy=False) for c in columns])
@@ -2,19 +2,54 @@
 # ---------------------------------------------------------------------------------------------
 # Versión extendida: incluye distribución piramidal (triangular) y otras distribuciones comunes
 # + NUEVO: menú interactivo de **opciones GLM** para cada distribución ganadora
+# + Ajuste en paralelo con tiempo máximo por distribución (funciones de ajuste en distfit.py)
+# + Caché de ajustes en memoria y disco (distcache.py): cambiar alpha u otra opción de
+#   presentación no vuelve a ajustar; DISTFIT_CACHE define el archivo SQLite
+# + Modo por lotes: todas o varias columnas numéricas a la vez, matriz columna × AIC descargable
+# + Modelos compuestos: inflación de ceros, valla en cero y mezclas de k componentes (EM), con su
+#   modelo en dos partes sugerido
+# + Archivos grandes (CSV, Excel, Parquet, Feather/Arrow, .npy): solo se lee la columna elegida (distio.py)
+# + Regresión con covariables del mismo archivo: los GLM sugeridos se ajustan por IRLS (distglm.py) y se
+#   comparan por AIC, con errores estándar robustos
+# + Diagnóstico gráfico de las mejores candidatas (histograma con densidad, QQ y PP) desde una rejilla fija
+#   de cuantiles: el costo de cada gráfico no depende de n
 # ---------------------------------------------------------------------------------------------
 # Ejecución local
 #   pip install streamlit pandas numpy scipy matplotlib
 #   streamlit run dist_app.py
+# Sin interfaz (tareas programadas, muchos archivos)
+#   python distbatch.py "datos/*.parquet" -c "costo_*" -o ajustes.parquet
 # ---------------------------------------------------------------------------------------------
 
-from typing import List, Dict
+import os
+import time
 
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
 import streamlit as st
-import matplotlib.pyplot as plt
+
+import distcache
+import distio
+import figuras
+from distglm import TWO_PART, fit_glm, fit_two_part
+from distfit import (
+    batch_matrix,
+    compress_sample,
+    data_hash,
+    SUBMUESTRA,
+    UMBRAL_AIC,
+    fit_adaptive,
+    fit_columns,
+    get_candidate_distributions,
+    MAX_BOOT_GENERICO,
+    MAX_GOF_N,
+    MIN_FRACCION_CEROS,
+    model_curves,
+    parse_numbers,
+    prepare_columns,
+    quantile_sketch,
+    summarize_results,
+)
 
 st.set_page_config(page_title="Detector de distribuciones", layout="centered")
 
@@ -35,6 +70,10 @@ DIST_FULL_NAMES = {
     "nbinom": "Binomial negativa",
     "geom": "Geométrica",
     "pareto": "Pareto",
+    "zip": "Poisson con inflación de ceros (ZIP)",
+    "zinb": "Binomial negativa con inflación de ceros (ZINB)",
+    "hurdle_gamma": "Gamma con valla en cero (hurdle)",
+    "hurdle_lognorm": "Log‑normal con valla en cero (hurdle)",
 }
 
 # GLM sugerido por defecto (mostrar en tabla y encabezado)
@@ -51,6 +90,10 @@ REG_RECOMMENDED = {
     "nbinom": "GLM Binomial Negativa (log)",
     "geom": "Regresión Geométrica",
     "pareto": "Modelo Pareto POT (log)",
+    "zip": "Modelo ZIP (logit + Poisson log)",
+    "zinb": "Modelo ZINB (logit + NB log)",
+    "hurdle_gamma": "Dos partes: logit + GLM Gamma (log)",
+    "hurdle_lognorm": "Dos partes: logit + GLM Gaussian sobre log(Y)",
 }
 
 # NUEVO: listado de opciones GLM detalladas por distribución
@@ -89,83 +132,314 @@ GLM_OPTIONS = {
     ],
     "triang": ["No estándar — mínimos cuadrados"],
     "uniform": ["No estándar"],
-    "geom": ["Regresión Geométrica (log)"]
+    "geom": ["Regresión Geométrica (log)"],
+    "zip": [
+        "Modelo ZIP (logit + Poisson log)",
+        "Hurdle Poisson (logit + Poisson truncada en cero)"
+    ],
+    "zinb": [
+        "Modelo ZINB (logit + NB log)",
+        "Hurdle NB (logit + NB truncada en cero)"
+    ],
+    "hurdle_gamma": [
+        "Dos partes: logit + GLM Gamma (log)",
+        "Dos partes: probit + GLM Gamma (log)",
+        "GLM Tweedie (log), 1 < p < 2"
+    ],
+    "hurdle_lognorm": [
+        "Dos partes: logit + GLM Gaussian sobre log(Y) con retransformación smearing",
+        "Dos partes: logit + GLM Gaussian (log)"
+    ]
+}
+
+# Mezclas finitas de k componentes (distfit.COMPOSITE_MODELS)
+for _fam, _nombre, _glm in (("norm", "normales", "Gaussian (identidad)"), ("gamma", "gamma", "Gamma (log)"),
+                            ("lognorm", "log‑normales", "Gaussian sobre log(Y)"), ("poisson", "Poisson", "Poisson (log)")):
+    for _k in (2, 3):
+        DIST_FULL_NAMES[f"mix{_k}_{_fam}"] = f"Mezcla de {_k} {_nombre}"
+        REG_RECOMMENDED[f"mix{_k}_{_fam}"] = f"Mezcla finita de GLM {_glm}"
+        GLM_OPTIONS[f"mix{_k}_{_fam}"] = [
+            f"Mezcla finita de GLM {_glm} (clases latentes)",
+            f"Mezcla finita de GLM {_glm} con covariables en las probabilidades de clase",
+        ]
+
+# Texto pegado: (separador decimal, separador de miles)
+FORMATOS_NUMERO = {
+    "1234.56 (punto decimal)": (".", None),
+    "1.234,56 (coma decimal, punto de miles)": (",", "."),
+    "1234,56 (coma decimal)": (",", None),
+    "1,234.56 (coma de miles)": (".", ","),
 }
 
+# GLM ajustables con covariables (distglm.fit_glm; los de dos partes, fit_two_part): nombre → (familia, enlace)
+MODELOS_GLM = {
+    "Gaussian (identidad)": ("gaussian", "identity"),
+    "Gaussian (log)": ("gaussian", "log"),
+    "Gaussian (inversa)": ("gaussian", "inverse"),
+    "Gaussian sobre log(Y)": ("lognormal", "identity"),
+    "Gamma (log)": ("gamma", "log"),
+    "Gamma (inversa)": ("gamma", "inverse"),
+    "Gamma (identidad)": ("gamma", "identity"),
+    "Poisson (log)": ("poisson", "log"),
+    "Poisson (raíz)": ("poisson", "sqrt"),
+    "Binomial negativa (log)": ("negbin", "log"),
+    "Binomial negativa (identidad)": ("negbin", "identity"),
+    "Beta (logit)": ("beta", "logit"),
+    "Beta (probit)": ("beta", "probit"),
+    "Beta (cloglog)": ("beta", "cloglog"),
+    "Dos partes: logit + Gamma (log)": ("hurdle_gamma", "log"),
+    "Dos partes: logit + Gaussian sobre log(Y)": ("hurdle_lognormal", "identity"),
+}
+
+# Modelos preseleccionados según la distribución ganadora (los compuestos, por su parte continua o de conteo)
+GLM_AJUSTABLE = {
+    "norm": ["Gaussian (identidad)", "Gaussian (log)"],
+    "expon": ["Gamma (log)", "Gaussian sobre log(Y)"],
+    "gamma": ["Gamma (log)", "Gamma (inversa)", "Gaussian sobre log(Y)"],
+    "lognorm": ["Gaussian sobre log(Y)", "Gamma (log)"],
+    "weibull_min": ["Gamma (log)", "Gaussian sobre log(Y)"],
+    "pareto": ["Gaussian sobre log(Y)", "Gamma (log)"],
+    "triang": ["Gaussian (identidad)"],
+    "uniform": ["Gaussian (identidad)"],
+    "beta": ["Beta (logit)", "Beta (probit)", "Beta (cloglog)"],
+    "poisson": ["Poisson (log)", "Binomial negativa (log)"],
+    "nbinom": ["Binomial negativa (log)", "Poisson (log)"],
+    "geom": ["Binomial negativa (log)", "Poisson (log)"],
+    "zip": ["Poisson (log)", "Binomial negativa (log)"],
+    "zinb": ["Binomial negativa (log)", "Poisson (log)"],
+    "hurdle_gamma": ["Dos partes: logit + Gamma (log)", "Dos partes: logit + Gaussian sobre log(Y)"],
+    "hurdle_lognorm": ["Dos partes: logit + Gaussian sobre log(Y)", "Dos partes: logit + Gamma (log)"],
+}
+for _fam, _glm in (("norm", ["Gaussian (identidad)"]), ("gamma", ["Gamma (log)"]),
+                   ("lognorm", ["Gaussian sobre log(Y)"]), ("poisson", ["Poisson (log)", "Binomial negativa (log)"])):
+    for _k in (2, 3):
+        GLM_AJUSTABLE[f"mix{_k}_{_fam}"] = _glm
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Funciones auxiliares
 # ──────────────────────────────────────────────────────────────────────────────
 
-def parse_text_input(text: str) -> np.ndarray:
-    if not text:
-        return np.array([])
-    for sep in (",", "\n", "\t", ";"):
-        text = text.replace(sep, " ")
-    tokens = [t for t in text.strip().split() if t]
-    vals = []
-    for tk in tokens:
-        try:
-            vals.append(float(tk))
-        except ValueError:
-            continue
-    return np.array(vals, dtype=float)
-
-
-def get_candidate_distributions(data: np.ndarray) -> List[str]:
-    cand = ["norm"]
-    if np.all(data >= 0):
-        cand += ["expon", "gamma", "lognorm", "weibull_min", "triang", "uniform", "pareto"]
-    if np.all((0 <= data) & (data <= 1)):
-        cand.append("beta")
-    if np.all(np.mod(data, 1) == 0):
-        cand += ["poisson", "nbinom", "geom"]
-    seen, ordered = set(), []
-    for d in cand:
-        if d not in seen:
-            seen.add(d)
-            ordered.append(d)
-    return ordered
-
-
-def fit_distribution(dist_name: str, data: np.ndarray) -> Dict[str, object]:
-    n = len(data)
-    if dist_name == "poisson":
-        lam = data.mean()
-        loglik = np.sum(stats.poisson.logpmf(data, lam))
-        params, k = (lam,), 1
-    elif dist_name == "nbinom":
-        mean, var = data.mean(), data.var()
-        p0 = mean / var if var > mean else 0.5
-        r0 = mean * p0 / (1 - p0) if p0 < 1 else 1
-        dist = stats.nbinom
-        params = dist.fit(data, r0, p0)
-        loglik = np.sum(dist.logpmf(data, *params))
-        k = len(params)
-    else:
-        dist = getattr(stats, dist_name)
-        params = dist.fit(data)
-        try:
-            loglik = np.sum(dist.logpdf(data, *params))
-        except Exception:
-            loglik = -np.inf
-        k = len(params)
-    aic = 2 * k - 2 * loglik
-    bic = k * np.log(n) - 2 * loglik
-    return {"distribution": dist_name, "params": params, "loglik": loglik, "aic": aic, "bic": bic}
-
-
-def summarize_results(res):
-    return pd.DataFrame(res).sort_values("aic").reset_index(drop=True)
+def nombre_completo(r):
+    """Nombre de la distribución de un resultado, con «(loc = 0)» si el ajuste fijó la localización."""
+    nombre = DIST_FULL_NAMES.get(r["distribution"], r["distribution"])
+    loc_cero = r.get("loc_cero", False)
+    return f"{nombre} (loc = 0)" if pd.notna(loc_cero) and bool(loc_cero) else nombre
 
 
-def show_aic_plot(df):
-    fig, ax = plt.subplots()
-    ax.bar(df["distribution"], df["aic"])
+def _dibujar_aic(ax, distribuciones, aic):
+    ax.bar(distribuciones, aic)
     ax.set_ylabel("AIC (menor es mejor)")
     ax.set_xlabel("Distribución")
     ax.set_title("Comparación de AIC entre distribuciones candidatas")
-    plt.xticks(rotation=45, ha="right")
-    st.pyplot(fig)
+    ax.tick_params(axis="x", labelrotation=45)
+    for etiqueta in ax.get_xticklabels():
+        etiqueta.set_horizontalalignment("right")
+
+
+def show_aic_plot(df):
+    figuras.mostrar(_dibujar_aic, df["distribution"].tolist(), df["aic"].to_numpy(dtype=float),
+                    descarga="AIC_distribuciones")
+
+
+def _dibujar_densidad(ax, edges, densidad, nombres, xs, fs):
+    ax.stairs(densidad, edges, fill=True, color="0.8", label="Datos")
+    for nombre, x, f in zip(nombres, xs, fs):
+        ax.plot(x, f, lw=1.5, marker="o" if x.size <= 101 else None, ms=3, label=nombre)
+    ax.set_xlabel("Valor")
+    ax.set_ylabel("Densidad")
+    ax.set_title("Histograma y densidad ajustada")
+    ax.legend()
+
+
+def _dibujar_qq(ax, empiricos, nombres, teoricos):
+    for nombre, t in zip(nombres, teoricos):
+        ax.scatter(t, empiricos, s=8, label=nombre)
+    todos = [empiricos, *teoricos]
+    lo, hi = min(np.nanmin(v) for v in todos), max(np.nanmax(v) for v in todos)
+    ax.plot([lo, hi], [lo, hi], color="0.4", lw=1, ls="--")
+    ax.set_xlabel("Cuantil teórico")
+    ax.set_ylabel("Cuantil empírico")
+    ax.set_title("Gráfico QQ")
+    ax.legend()
+
+
+def _dibujar_pp(ax, empiricas, nombres, teoricas):
+    for nombre, t in zip(nombres, teoricas):
+        ax.scatter(t, empiricas, s=8, label=nombre)
+    ax.plot([0, 1], [0, 1], color="0.4", lw=1, ls="--")
+    ax.set_xlabel("Probabilidad teórica F(x)")
+    ax.set_ylabel("Probabilidad empírica")
+    ax.set_title("Gráfico PP")
+    ax.legend()
+
+
+def show_diagnostics(sketch, candidatas):
+    """Histograma con densidad, QQ y PP de las candidatas {nombre: params}, todos desde el mismo resumen."""
+    curvas = [model_curves(d, p, sketch) for d, p in candidatas.items()]
+    nombres = tuple(DIST_FULL_NAMES.get(d, d) for d in candidatas)
+    tab_densidad, tab_qq, tab_pp = st.tabs(["Histograma y densidad", "QQ", "PP"])
+    with tab_densidad:
+        figuras.mostrar(_dibujar_densidad, sketch["edges"], sketch["density"], nombres,
+                        tuple(c["x"] for c in curvas), tuple(c["density"] for c in curvas),
+                        descarga="Densidad_candidatas")
+    with tab_qq:
+        figuras.mostrar(_dibujar_qq, sketch["quantiles"], nombres, tuple(c["qq"] for c in curvas),
+                        descarga="QQ_candidatas")
+    with tab_pp:
+        figuras.mostrar(_dibujar_pp, sketch["ecdf"], nombres, tuple(c["pp"] for c in curvas),
+                        descarga="PP_candidatas")
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def diagnostic_sketch(_values, _counts, digest):
+    """Rejilla de cuantiles e histograma de la muestra, calculados una vez por conjunto de datos."""
+    return quantile_sketch(_values, _counts)
+
+
+@st.cache_resource(show_spinner=False)
+def fit_cache():
+    """Una caché de ajustes compartida por todas las sesiones."""
+    return distcache.FitCache(os.environ.get("DISTFIT_CACHE", distcache.RUTA_POR_DEFECTO))
+
+
+def _con_avance(leer, source, fmt, columns):
+    """Lectura con aviso de filas leídas; el aviso se crea aquí para que la caché pueda reproducirlo."""
+    aviso = st.empty()
+    datos = leer(source, fmt, columns, progress=lambda filas: aviso.text(f"Filas leídas: {filas:,d}"))
+    aviso.empty()
+    return datos
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_column(_source, firma, fmt, column):
+    """Columna leída una sola vez por archivo; las reejecuciones reutilizan el mismo array."""
+    return _con_avance(distio.read_column, _source, fmt, column)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_columns(_source, firma, fmt, columns):
+    """Muestras comprimidas de varias columnas, leídas en una sola pasada."""
+    return prepare_columns(_con_avance(distio.read_columns, _source, fmt, list(columns)))
+
+
+def glm_table(matriz, alpha):
+    """Agrega a la matriz del lote la regresión sugerida, las opciones GLM y el veredicto."""
+    tabla = matriz.copy()
+    tabla.insert(2, "Regresión recomendada", tabla["ganadora"].map(REG_RECOMMENDED))
+    tabla.insert(3, "Opciones GLM", tabla["ganadora"].map(lambda d: "; ".join(GLM_OPTIONS.get(d, []))))
+    tabla.insert(6, f"Rechaza H0 (α = {alpha:g})", tabla["gof_p"].lt(alpha).where(tabla["gof_p"].notna()))
+    return tabla
+
+
+def run_batch(fuente, firma, fmt, columnas):
+    """Modo por lotes: ajusta todas las columnas elegidas y muestra la matriz consolidada."""
+    clave = (firma, tuple(columnas), int(n_boot))
+    if st.button("▶️ Ajustar columnas seleccionadas"):
+        muestras = load_columns(fuente, firma, fmt, tuple(columnas))
+        total = sum(len(m[2]) for m in muestras.values())
+        resultados = {col: [] for col in muestras}
+        barra = st.progress(0.0, text="Ajustando columnas…")
+        parcial = st.empty()
+        ultimo = 0.0
+        for i, (col, r) in enumerate(fit_columns(muestras, timeout, int(n_workers), int(n_boot),
+                                                 cache=fit_cache()), start=1):
+            resultados[col].append(r)
+            barra.progress(i / total, text=f"Ajustando columnas… {i}/{total}")
+            if time.monotonic() - ultimo > 0.5:
+                parcial.dataframe(batch_matrix(resultados), hide_index=True)
+                ultimo = time.monotonic()
+        barra.empty()
+        parcial.empty()
+        st.session_state["lote_distribuciones"] = (clave, batch_matrix(resultados))
+    guardado = st.session_state.get("lote_distribuciones")
+    if guardado is None or guardado[0] != clave:
+        st.info("Pulse «Ajustar columnas seleccionadas» para procesar el lote.")
+        return
+    tabla = glm_table(guardado[1], alpha)
+    st.subheader("🏆 Mejor distribución por columna")
+    st.dataframe(tabla, hide_index=True)
+    st.caption("AIC por distribución candidata (vacío si no aplica o falló). gof_p: valor p bootstrap de la "
+               "ganadora (χ² en discretas, Anderson–Darling en continuas).")
+    st.download_button("📥 Descargar matriz (CSV)", lambda: tabla.to_csv(index=False).encode("utf-8"),
+                       "Distribuciones_por_columna.csv", "text/csv", on_click="ignore")
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def load_matrix(_source, firma, fmt, columns):
+    """Respuesta y covariables alineadas por fila (solo filas completas), leídas una sola vez."""
+    return _con_avance(distio.read_matrix, _source, fmt, list(columns))
+
+
+def _familia_valida(familia, values):
+    """Si el soporte de la familia admite los valores observados de la respuesta."""
+    if familia in ("gamma", "lognormal"):
+        return values.min() > 0
+    if familia in ("poisson", "negbin"):
+        return values.min() >= 0 and np.all(values == np.round(values))
+    if familia == "beta":
+        return values.min() > 0 and values.max() < 1
+    if familia in TWO_PART:
+        return values.min() == 0 and values.max() > 0
+    return True
+
+
+def run_glm(fuente, firma, fmt, col, num_cols, values, ganadora):
+    """Ajusta los GLM elegidos con covariables del mismo archivo y los compara por AIC."""
+    st.subheader("📈 Regresión con covariables (GLM)")
+    covariables = st.multiselect("Covariables", [c for c in num_cols if c != col])
+    disponibles = [m for m, (fam, _) in MODELOS_GLM.items() if _familia_valida(fam, values)]
+    sugeridos = [m for m in GLM_AJUSTABLE.get(ganadora, []) if m in disponibles] or disponibles[:1]
+    modelos = st.multiselect("Modelos a comparar", disponibles, default=sugeridos,
+                             help="Preseleccionados según la distribución ganadora; solo se ofrecen las familias "
+                                  "cuyo soporte admite los valores de la respuesta.")
+    clave = (firma, col, tuple(covariables), tuple(modelos))
+    if st.button("▶️ Ajustar GLM", disabled=not modelos):
+        matriz = load_matrix(fuente, firma, fmt, (col, *covariables))
+        ajustes = {}
+        barra = st.progress(0.0, text="Ajustando GLM…")
+        for i, m in enumerate(modelos, start=1):
+            familia, enlace = MODELOS_GLM[m]
+            try:
+                if familia in TWO_PART:
+                    ajustes[m] = fit_two_part(matriz[:, 1:], matriz[:, 0], TWO_PART[familia], enlace,
+                                              names=covariables)
+                else:
+                    ajustes[m] = fit_glm(matriz[:, 1:], matriz[:, 0], familia, enlace, names=covariables)
+            except ValueError as err:
+                ajustes[m] = str(err)
+            barra.progress(i / len(modelos), text=f"Ajustando GLM… {i}/{len(modelos)}")
+        barra.empty()
+        st.session_state["glm_ajustes"] = (clave, len(matriz), ajustes)
+    guardado = st.session_state.get("glm_ajustes")
+    if guardado is None or guardado[0] != clave:
+        st.info("Elija covariables y modelos y pulse «Ajustar GLM».")
+        return
+    _, n, ajustes = guardado
+    for m, r in ajustes.items():
+        if isinstance(r, str):
+            st.warning(f"{m}: {r}")
+    ok = {m: r for m, r in ajustes.items() if not isinstance(r, str)}
+    if not ok:
+        return
+    comparacion = pd.DataFrame([{
+        "Modelo": m, "AIC": r["aic"], "BIC": r["bic"], "Log‑verosimilitud": r["loglik"], "k": r["k"],
+        "Dispersión": f"{r['dispersion'][0]} = {r['dispersion'][1]:.4g}" if r["dispersion"][0] else "—",
+        "Iteraciones": r["iterations"], "Convergió": r["converged"],
+    } for m, r in ok.items()]).sort_values("AIC", ignore_index=True)
+    comparacion.insert(2, "ΔAIC", comparacion["AIC"] - comparacion["AIC"].min())
+    st.dataframe(comparacion, hide_index=True)
+    st.caption(f"{n:,d} filas completas (se descartan las que tienen vacíos en la respuesta o en alguna "
+               "covariable). El AIC de «Gaussian sobre log(Y)» incluye el jacobiano, así todos se comparan en "
+               "la escala de Y. Los modelos de dos partes suman la log-verosimilitud y los parámetros del logit "
+               "de P(Y > 0) y del GLM de las filas Y > 0. Errores estándar robustos: sándwich HC0.")
+    coeficientes = pd.concat([r["coef"].assign(Modelo=m) for m, r in ok.items()], ignore_index=True)
+    for m, r in ok.items():
+        with st.expander(f"Coeficientes · {m}", expanded=m == comparacion["Modelo"].iloc[0]):
+            tabla = r["coef"].copy()
+            tabla[f"p < {alpha:g}"] = tabla["p"] < alpha
+            st.dataframe(tabla, hide_index=True)
+    st.download_button("📥 Descargar coeficientes (CSV)", lambda: coeficientes.to_csv(index=False).encode("utf-8"),
+                       "Coeficientes_GLM.csv", "text/csv", on_click="ignore")
 
 # ──────────────────────────────────────────────────────────────────────────────
 # Interfaz
@@ -176,29 +450,58 @@ st.title("🔍 Detector automático de distribuciones + opciones GLM")
 st.markdown("Pegue sus datos o cargue un **CSV/Excel** y obtenga la mejor distribución junto con un menú de **modelos GLM** disponibles.")
 
 st.sidebar.header("⚙️ Opciones")
-alpha = st.sidebar.slider("Nivel de significancia KS", 0.01, 0.20, 0.05, 0.01)
+alpha = st.sidebar.slider("Nivel de significancia (bondad de ajuste)", 0.01, 0.20, 0.05, 0.01)
+n_boot = st.sidebar.select_slider("Réplicas bootstrap (bondad de ajuste)", [0, 100, 500, 1000, 2000], value=1000)
+timeout = st.sidebar.number_input("Tiempo máximo por distribución (s)", 1.0, 600.0, 30.0, 1.0)
+n_workers = st.sidebar.number_input("Procesos en paralelo", 1, os.cpu_count() or 1, os.cpu_count() or 1, 1)
+adaptativo = st.sidebar.checkbox("Modo adaptativo para muestras grandes", value=True,
+                                 help="Ordena las candidatas en una submuestra estratificada y reajusta con "
+                                      "todos los datos solo las que no quedan descartadas.")
+submuestra = st.sidebar.number_input("Tamaño de la submuestra", 10_000, 5_000_000, SUBMUESTRA, 10_000,
+                                     disabled=not adaptativo)
+if st.sidebar.button("🗑️ Vaciar caché de ajustes"):
+    fit_cache().clear()
 
 method = st.radio("Método de entrada", ["Pegar texto", "Subir archivo"])
 if method == "Pegar texto":
     raw = st.text_area("Pegue los valores numéricos")
-    data = parse_text_input(raw)
+    formato = st.selectbox("Formato de los números", list(FORMATOS_NUMERO))
+    data, rechazados = parse_numbers(raw, *FORMATOS_NUMERO[formato])
+    if rechazados:
+        st.warning(f"Se descartaron {rechazados:,d} valores no numéricos o no finitos.")
 else:
-    file = st.file_uploader("Archivo .csv o .xlsx", type=["csv", "xlsx"])
+    st.caption("Para archivos muy grandes indique una ruta en el servidor (Parquet/Feather/.npy se leen con memory map); "
+               "solo se carga la columna elegida.")
+    file = st.file_uploader("Archivo de datos", type=["csv", "xlsx", "parquet", "feather", "arrow", "npy"])
+    ruta = st.text_input("…o ruta del archivo en el servidor")
+    data = np.array([])
     if file is not None:
+        fuente, nombre, firma = file, file.name, (file.name, file.size)
+    elif ruta and os.path.isfile(ruta):
+        fuente, nombre, firma = ruta, ruta, (ruta, os.path.getmtime(ruta), os.path.getsize(ruta))
+    else:
+        fuente = None
+        if ruta:
+            st.error(f"No se encontró el archivo: {ruta}")
+    if fuente is not None:
+        fmt = distio.file_format(nombre)
         try:
-            df_up = pd.read_csv(file) if file.name.endswith(".csv") else pd.read_excel(file)
-            num_cols = df_up.select_dtypes(include=[np.number]).columns.tolist()
+            num_cols = distio.list_columns(fuente, fmt)
+            modo = st.radio("Modo", ["Una columna", "Varias columnas (lote)"], horizontal=True) if num_cols else None
+            if modo == "Varias columnas (lote)":
+                columnas = st.multiselect("Columnas a ajustar", num_cols, default=num_cols)
+                if columnas:
+                    run_batch(fuente, firma, fmt, columnas)
+                else:
+                    st.info("Elija al menos una columna.")
+                st.stop()
             if num_cols:
                 col = st.selectbox("Columna a analizar", num_cols)
-                data = df_up[col].dropna().to_numpy()
+                data = load_column(fuente, firma, fmt, col)
             else:
                 st.error("No hay columnas numéricas.")
-                data = np.array([])
         except Exception as e:
             st.error(f"Error leyendo archivo: {e}")
-            data = np.array([])
-    else:
-        data = np.array([])
 
 if data.size == 0:
     st.info("Ingrese datos para continuar.")
@@ -208,15 +511,38 @@ if data.size < 8:
 
 st.write(f"**Observaciones válidas:** {data.size}")
 
-cands = get_candidate_distributions(data)
+# Valores únicos + frecuencias: todo el ajuste trabaja sobre la muestra comprimida
+values, counts = compress_sample(data)
+st.write(f"**Valores distintos:** {values.size}")
+
+cands = get_candidate_distributions(values, counts)
 st.write("Distribuciones candidatas:", ", ".join(cands))
+if values[0] == 0:
+    ceros = counts[0] / counts.sum()
+    if ceros >= MIN_FRACCION_CEROS:
+        st.info(f"{ceros:.1%} de ceros (≥ {MIN_FRACCION_CEROS:.0%}): gamma, lognormal y Weibull se reemplazan por "
+                "modelos de valla en cero (y de inflación de ceros si los datos son enteros).")
+    else:
+        st.info(f"{ceros:.1%} de ceros (< {MIN_FRACCION_CEROS:.0%}): gamma, lognormal y Weibull se conservan, "
+                "ajustadas con localización libre (loc < 0) porque loc = 0 no admite ceros; los modelos de valla "
+                "se agregan para comparar.")
 
+# Ajuste en paralelo: la tabla parcial se actualiza a medida que termina cada candidata
 results = []
-for d in cands:
-    try:
-        results.append(fit_distribution(d, data))
-    except Exception as err:
-        st.warning(f"{d}: error en ajuste → {err}")
+barra = st.progress(0.0, text="Ajustando distribuciones…")
+parcial = st.empty()
+# Modo adaptativo: sin efecto si la muestra no supera el tamaño de la submuestra
+limite = int(submuestra) if adaptativo else int(counts.sum())
+for i, r in enumerate(fit_adaptive(values, cands, timeout, int(n_workers), counts=counts, n_boot=int(n_boot),
+                                   cache=fit_cache(), submuestra=limite), start=1):
+    if "error" in r:
+        st.warning(f"{r['distribution']}: {r['error']}")
+    else:
+        results.append(r)
+        parcial.dataframe(summarize_results(results)[["distribution", "aic", "bic"]])
+    barra.progress(i / len(cands), text=f"Ajustando distribuciones… {i}/{len(cands)}")
+barra.empty()
+parcial.empty()
 
 if not results:
     st.error("No se pudo ajustar ninguna distribución.")
@@ -228,7 +554,7 @@ best = summary.iloc[0]
 
 st.subheader("🏆 Mejor distribución (AIC minimo)")
 st.markdown(
-    f"**{DIST_FULL_NAMES.get(best['distribution'], best['distribution']).upper()}**  \
+    f"**{nombre_completo(best).upper()}**  \
     Parámetros: {np.round(best['params'], 4).tolist()}  \
     AIC = {best['aic']:.2f} | BIC = {best['bic']:.2f}  \
     **Regresión sugerida:** {REG_RECOMMENDED.get(best['distribution'], 'No disponible')}"
@@ -237,7 +563,7 @@ st.markdown(
 # Tabla completa
 st.subheader("Tabla completa de resultados")
 summary_disp = summary.copy()
-summary_disp["Distribución completa"] = summary_disp["distribution"].map(DIST_FULL_NAMES)
+summary_disp["Distribución completa"] = summary_disp.apply(nombre_completo, axis=1)
 summary_disp["Regresión recomendada"] = summary_disp["distribution"].map(REG_RECOMMENDED)
 
 st.dataframe(
@@ -246,30 +572,77 @@ st.dataframe(
         "Distribución completa",
         "aic",
         "bic",
+        *(c for c in ("aic_int", "bic_int") if c in summary_disp),
         "Regresión recomendada",
         "params",
+        *(c for c in ("aic_sub", "delta_aic_min") if c in summary_disp),
     ]]
 )
+if summary.get("loc_cero", pd.Series(dtype=bool)).fillna(False).astype(bool).any():
+    st.caption("(loc = 0): gamma, lognormal y Weibull se ajustan con localización fija en 0 (2 parámetros, el "
+               "modelo habitual de costos y tiempos), no con la localización libre de scipy.stats (3 parámetros); "
+               "su AIC y su lugar en la tabla pueden diferir de un ajuste con loc libre.")
+if "aic_int" in summary:
+    mejor_int = summary.dropna(subset=["aic_int"]).sort_values("aic_int")
+    st.caption("Datos enteros: aic/bic son la verosimilitud maximizada (densidad en las continuas, probabilidad "
+               "en las discretas), como siempre. aic_int/bic_int evalúan las continuas como probabilidad del "
+               "intervalo unitario alrededor de cada valor, la escala en que se comparan con las discretas y los "
+               "modelos de conteo compuestos.")
+    if not mejor_int.empty and mejor_int["distribution"].iloc[0] != best["distribution"]:
+        d = mejor_int["distribution"].iloc[0]
+        st.info(f"En la escala de intervalos (aic_int) la mejor es **{DIST_FULL_NAMES.get(d, d)}**.")
+if "submuestra" in summary:
+    st.caption(f"Modo adaptativo: candidatas ordenadas en una submuestra estratificada de {limite:,d} datos "
+               f"(aic_sub). Las de AIC vacío se descartaron porque la cota inferior al 99 % de su ΔAIC con "
+               f"todos los datos (delta_aic_min) supera {UMBRAL_AIC:g}; las demás se reajustaron con todos los "
+               f"datos. La bondad de ajuste se calcula en la submuestra.")
 
 # Gráfico AIC
 st.subheader("Gráfico de comparación de AIC")
-show_aic_plot(summary)
-
-# KS para la mejor distribución
-st.subheader("📊 Prueba de bondad de ajuste KS")
-try:
-    if best["distribution"] == "poisson":
-        lam = best["params"][0]
-        D, p = stats.kstest(data, "poisson", args=(lam,))
-    else:
-        D, p = stats.kstest(data, best["distribution"], args=best["params"])
-    st.write(f"D = {D:.3f}, p = {p:.4f}")
-    if p < alpha:
-        st.warning("Se rechaza H0: la distribución podría no ajustar bien.")
+show_aic_plot(summary.dropna(subset=["aic"]))
+
+# Diagnóstico gráfico: la misma rejilla de cuantiles sirve para todas las candidatas
+st.subheader("🔎 Diagnóstico gráfico de las mejores candidatas")
+ajustadas = summary.dropna(subset=["aic"])
+graficar = st.multiselect("Candidatas a graficar", ajustadas["distribution"].tolist(),
+                          default=ajustadas["distribution"].head(3).tolist())
+if graficar:
+    sketch = diagnostic_sketch(values, counts, data_hash(values, counts))
+    show_diagnostics(sketch, dict(zip(graficar, ajustadas.set_index("distribution").loc[graficar, "params"])))
+    st.caption(f"Calculado una vez sobre los {sketch['n']:,d} datos: {sketch['probs'].size} cuantiles empíricos "
+               f"(QQ y PP) e histograma de {sketch['edges'].size - 1} intervalos entre los cuantiles 0,1 % y 99,9 % "
+               f"(barras unitarias si los datos son enteros de rango corto). Cada candidata solo se evalúa en esa "
+               f"rejilla.")
+
+# Bondad de ajuste por bootstrap paramétrico para todas las candidatas
+st.subheader("📊 Bondad de ajuste (bootstrap paramétrico)")
+if n_boot == 0:
+    st.info("Active las réplicas bootstrap en la barra lateral para evaluar la bondad de ajuste.")
+else:
+    gof_cols = [c for c in ("ks", "ks_p", "ad", "ad_p", "cvm", "cvm_p", "chi2", "chi2_df", "chi2_p", "gof_boot", "gof_n")
+                if c in summary]
+    st.dataframe(summary[["distribution", *gof_cols]])
+    st.caption("Valores p por bootstrap paramétrico: cada réplica se simula con los parámetros ajustados y se "
+               "reajusta, así el valor p considera la estimación. KS, Anderson–Darling (AD) y Cramér–von Mises "
+               "(CvM) para continuas; χ² con intervalos de frecuencia esperada ≥ 5 para discretas y para continuas "
+               "sobre datos enteros (probabilidad del intervalo unitario). Si los datos tienen empates por "
+               f"redondeo, las réplicas se redondean igual. Con más de {MAX_GOF_N:,d} datos la prueba usa una "
+               "muestra aleatoria simple de ese tamaño (gof_n). Los modelos compuestos (inflación de ceros, valla "
+               f"y mezclas) se simulan y reajustan por EM con a lo más {MAX_BOOT_GENERICO} réplicas; en las vallas continuas KS, AD "
+               "y CvM evalúan la parte positiva. gof_boot: réplicas usadas.")
+    # Veredicto para la mejor: AD (continuas) o χ² (discretas)
+    p = best.get("chi2_p") if pd.notna(best.get("chi2_p", np.nan)) else best.get("ad_p", np.nan)
+    prueba = "χ²" if pd.notna(best.get("chi2_p", np.nan)) else "Anderson–Darling"
+    if pd.isna(p):
+        st.info("No se pudo calcular la bondad de ajuste de la mejor distribución.")
+    elif p < alpha:
+        st.warning(f"{prueba}: p = {p:.4f}. Se rechaza H0: la distribución podría no ajustar bien.")
     else:
-        st.success("No se rechaza H0: ajuste compatible con los datos.")
-except Exception as e:
-    st.info(f"No se pudo ejecutar KS: {e}")
+        st.success(f"{prueba}: p = {p:.4f}. No se rechaza H0: ajuste compatible con los datos.")
+
+# Regresión con covariables: solo con archivo (pegar texto no trae otras columnas)
+if method == "Subir archivo":
+    run_glm(fuente, firma, fmt, col, num_cols, values, best["distribution"])
 
 # Footer
 st.markdown("---")
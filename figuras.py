@@ -0,0 +1,67 @@
+# ---------------------------------------------------------
+# CAPA DE FIGURAS – caché de renderizado y exportación PNG diferida
+# ---------------------------------------------------------
+# • Cada gráfico se describe con una función dibujar(ax, *datos, **estilo)
+#   que recibe explícitamente todo lo que grafica.
+# • La imagen se renderiza una sola vez por combinación de datos, estilo y
+#   código de la función (st.cache_data): una reejecución sin cambios no
+#   crea ninguna figura nueva.
+# • Se usa matplotlib.figure.Figure (sin pyplot), así que las figuras no
+#   quedan registradas y se liberan al terminar el renderizado.
+# • El PNG de alta resolución para descargar se genera solo al pulsar el
+#   botón de descarga.
+# ---------------------------------------------------------
+
+import hashlib
+import io
+import marshal
+from typing import Callable, Optional, Tuple
+
+import streamlit as st
+from matplotlib.figure import Figure
+
+DPI_PANTALLA = 120
+DPI_EXPORTAR = 200
+
+
+def _firma(dibujar: Callable) -> str:
+    """Nombre + hash del bytecode: editar la función invalida sus imágenes."""
+    codigo = hashlib.sha1(marshal.dumps(dibujar.__code__)).hexdigest()
+    return f"{dibujar.__module__}.{dibujar.__qualname__}:{codigo}"
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _png(_dibujar: Callable, firma: str, datos: tuple, estilo: dict, figsize: Optional[Tuple[float, float]], dpi: int) -> bytes:
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    _dibujar(ax, *datos, **estilo)
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    fig.clear()
+    return buf.getvalue()
+
+
+def mostrar(
+    dibujar: Callable,
+    *datos,
+    figsize: Optional[Tuple[float, float]] = None,
+    descarga: Optional[str] = None,
+    etiqueta: str = "📥 Descargar gráfico",
+    **estilo,
+) -> None:
+    """Muestra el gráfico desde la caché y, si `descarga` tiene nombre, ofrece el PNG.
+
+    `datos` y `estilo` forman la clave de la caché junto con el código de
+    `dibujar`, por lo que esta no debe leer variables externas.
+    """
+    firma = _firma(dibujar)
+    st.image(_png(dibujar, firma, datos, estilo, figsize, DPI_PANTALLA), width="stretch")
+    if descarga:
+        st.download_button(
+            etiqueta,
+            lambda: _png(dibujar, firma, datos, estilo, figsize, DPI_EXPORTAR),
+            f"{descarga}.png",
+            "image/png",
+            on_click="ignore",
+        )
@@ -0,0 +1,110 @@
+# ---------------------------------------------------------
+# BOOTSTRAP NO PARAMÉTRICO CON DATOS POR PACIENTE – CEA/CUA/CBA
+# ---------------------------------------------------------
+# • Medias por brazo a partir de datos individuales de un ensayo.
+# • Remuestreo con matrices de índices (remuestras × pacientes) por
+#   bloques de tamaño acotado; costo y efecto de cada paciente se
+#   remuestrean juntos para conservar su correlación.
+# • Intervalos percentiles para ΔCosto, ΔEfecto, ICER e INB(λ).
+# ---------------------------------------------------------
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from he_psa import MAX_ELEMENTOS
+
+
+def datos_por_brazo(
+    df: pd.DataFrame, col_brazo: str, col_costo: str, col_efecto: str
+) -> Tuple[List[str], List[np.ndarray], List[np.ndarray]]:
+    """Nombres de brazo y arrays de costo/efecto por paciente (filas no numéricas descartadas)."""
+    d = pd.DataFrame({
+        "Tratamiento": df[col_brazo].astype(str),
+        "Costo": pd.to_numeric(df[col_costo], errors="coerce"),
+        "Efecto": pd.to_numeric(df[col_efecto], errors="coerce"),
+    }).dropna()
+    grupos = [g for _, g in d.groupby("Tratamiento", sort=False)]
+    return (
+        [g["Tratamiento"].iat[0] for g in grupos],
+        [g["Costo"].to_numpy(dtype=float) for g in grupos],
+        [g["Efecto"].to_numpy(dtype=float) for g in grupos],
+    )
+
+
+def medias_por_brazo(nombres: Sequence[str], costos: Sequence[np.ndarray], efectos: Sequence[np.ndarray]) -> pd.DataFrame:
+    """Costo y efecto medios por brazo, con el número de pacientes."""
+    return pd.DataFrame({
+        "Tratamiento": list(nombres),
+        "Costo total": [c.mean() for c in costos],
+        "Efectividad": [e.mean() for e in efectos],
+        "n": [c.size for c in costos],
+    })
+
+
+def bootstrap_brazos(
+    costos: Sequence[np.ndarray],
+    efectos: Sequence[np.ndarray],
+    n_boot: int = 10_000,
+    semilla: int = 12345,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Medias bootstrap (n_boot × brazos) de costo y efecto por brazo.
+
+    Cada bloque sortea una matriz de índices remuestras × pacientes con a lo
+    más MAX_ELEMENTOS elementos; los brazos se remuestrean de forma
+    independiente, como en un ensayo con asignación aleatoria.
+    """
+    rng = np.random.default_rng(semilla)
+    k = len(costos)
+    c_boot = np.empty((n_boot, k))
+    e_boot = np.empty((n_boot, k))
+    for j, (c, e) in enumerate(zip(costos, efectos)):
+        c = np.asarray(c, dtype=float)
+        e = np.asarray(e, dtype=float)
+        n = c.size
+        paso = max(1, MAX_ELEMENTOS // max(n, 1))
+        for i in range(0, n_boot, paso):
+            b = min(paso, n_boot - i)
+            idx = rng.integers(0, n, size=(b, n))
+            c_boot[i:i + b, j] = c[idx].mean(axis=1)
+            e_boot[i:i + b, j] = e[idx].mean(axis=1)
+    return c_boot, e_boot
+
+
+def intervalos_incrementales(
+    c_boot: np.ndarray,
+    e_boot: np.ndarray,
+    c_obs: Sequence[float],
+    e_obs: Sequence[float],
+    i: int,
+    j: int,
+    wtp: float,
+    nivel: float = 0.95,
+) -> pd.DataFrame:
+    """Estimación y percentiles bootstrap de j frente a i.
+
+    La estimación sale de las medias observadas por brazo (`c_obs`, `e_obs`,
+    ver medias_por_brazo); las remuestras solo dan los intervalos y P(INB > 0).
+    El intervalo del ICER solo se informa si todas las remuestras tienen
+    ΔE del mismo signo; si no, el ICER no es interpretable y conviene usar
+    el INB(λ) = λ·ΔE − ΔC.
+    """
+    a = (1 - nivel) / 2 * 100
+    d_c = c_boot[:, j] - c_boot[:, i]
+    d_e = e_boot[:, j] - e_boot[:, i]
+    inb = wtp * d_e - d_c
+    icer_ok = (d_e > 0).all() or (d_e < 0).all()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        icer = d_c / d_e
+    dc_obs = c_obs[j] - c_obs[i]
+    de_obs = e_obs[j] - e_obs[i]
+    icer_punto = dc_obs / de_obs if de_obs != 0 else np.nan
+    filas = [
+        ("ΔCosto", dc_obs, *np.percentile(d_c, [a, 100 - a])),
+        ("ΔEfecto", de_obs, *np.percentile(d_e, [a, 100 - a])),
+        ("ICER", icer_punto, *(np.percentile(icer, [a, 100 - a]) if icer_ok else (np.nan, np.nan))),
+        (f"INB (λ = {wtp:,.0f})", wtp * de_obs - dc_obs, *np.percentile(inb, [a, 100 - a])),
+        ("P(INB > 0)", (inb > 0).mean(), np.nan, np.nan),
+    ]
+    return pd.DataFrame(filas, columns=["Medida", "Estimación", f"IC {nivel:.0%} inf.", f"IC {nivel:.0%} sup."])
@@ -0,0 +1,113 @@
+# ---------------------------------------------------------
+# COI DESDE ARCHIVOS DE RECLAMOS (CLAIMS) – lectura por bloques
+# ---------------------------------------------------------
+# • CSV (pandas, chunksize) o Parquet (pyarrow, iter_batches), leyendo
+#   solo las columnas necesarias.
+# • Cada bloque se agrega por categoría de costo (y opcionalmente año,
+#   región y banda de edad) y se suma al acumulado: la memoria depende
+#   del número de grupos, no del número de filas.
+# • coi_desde_reclamos() devuelve la tabla Categoría / Costo anual que
+#   usa la pestaña COI.
+# ---------------------------------------------------------
+
+from typing import Callable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+BANDAS_EDAD = [0, 18, 45, 65, np.inf]
+ETIQUETAS_EDAD = ["0–17", "18–44", "45–64", "65+"]
+
+
+def formato_reclamos(nombre: str) -> str:
+    """'parquet' o 'csv' según la extensión del archivo."""
+    return "parquet" if str(nombre).lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def _pyarrow_parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ImportError("Para leer Parquet instale pyarrow: pip install pyarrow") from err
+    return pq
+
+
+def columnas_reclamos(fuente, formato: str) -> List[str]:
+    """Nombres de columnas leyendo solo el encabezado / esquema."""
+    if formato == "parquet":
+        return list(_pyarrow_parquet().ParquetFile(fuente).schema_arrow.names)
+    cols = pd.read_csv(fuente, nrows=0).columns.tolist()
+    if hasattr(fuente, "seek"):
+        fuente.seek(0)
+    return cols
+
+
+def _bloques(fuente, formato: str, columnas: List[str], tam_bloque: int) -> Iterator[pd.DataFrame]:
+    if formato == "parquet":
+        pf = _pyarrow_parquet().ParquetFile(fuente)
+        for lote in pf.iter_batches(batch_size=tam_bloque, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(fuente, usecols=columnas, chunksize=tam_bloque)
+
+
+def agregar_reclamos(
+    fuente,
+    col_costo: str,
+    col_categoria: str,
+    col_anio: Optional[str] = None,
+    col_region: Optional[str] = None,
+    col_edad: Optional[str] = None,
+    formato: str = "csv",
+    tam_bloque: int = 1_000_000,
+    progreso: Optional[Callable[[int], None]] = None,
+) -> pd.DataFrame:
+    """Costo total y número de reclamos por categoría (y dimensiones opcionales).
+
+    `col_anio` puede ser numérica (año) o una fecha; `col_edad` se agrupa en
+    ETIQUETAS_EDAD. Los costos no numéricos se descartan y se cuentan en la
+    columna "Descartados". `progreso` recibe las filas leídas hasta el momento.
+    """
+    dims = {"Categoría": col_categoria, "Año": col_anio, "Región": col_region, "Banda de edad": col_edad}
+    dims = {k: v for k, v in dims.items() if v}
+    columnas = list(dict.fromkeys([col_costo, *dims.values()]))
+
+    acumulado = None
+    leidas = 0
+    for bloque in _bloques(fuente, formato, columnas, tam_bloque):
+        leidas += len(bloque)
+        parte = pd.DataFrame({"Costo": pd.to_numeric(bloque[col_costo], errors="coerce")})
+        parte["Categoría"] = bloque[col_categoria].astype("string").fillna("Sin categoría")
+        if col_anio:
+            anio = bloque[col_anio]
+            if not pd.api.types.is_numeric_dtype(anio):
+                anio = pd.to_datetime(anio, errors="coerce").dt.year
+            parte["Año"] = anio.astype("Int64")
+        if col_region:
+            parte["Región"] = bloque[col_region].astype("string").fillna("Sin región")
+        if col_edad:
+            edad = pd.to_numeric(bloque[col_edad], errors="coerce")
+            parte["Banda de edad"] = pd.cut(edad, BANDAS_EDAD, right=False, labels=ETIQUETAS_EDAD).astype("string")
+        parte["Descartados"] = parte["Costo"].isna().astype(np.int64)
+        parte["Reclamos"] = 1 - parte["Descartados"]
+        g = parte.groupby(list(dims), dropna=False, observed=True)[["Costo", "Reclamos", "Descartados"]].sum()
+        acumulado = g if acumulado is None else acumulado.add(g, fill_value=0)
+        if progreso:
+            progreso(leidas)
+
+    if acumulado is None:
+        return pd.DataFrame(columns=[*dims, "Costo", "Reclamos", "Descartados"])
+    out = acumulado.reset_index()
+    out[["Reclamos", "Descartados"]] = out[["Reclamos", "Descartados"]].astype(np.int64)
+    return out
+
+
+def coi_desde_reclamos(detalle: pd.DataFrame) -> pd.DataFrame:
+    """Tabla Categoría / Costo anual: si hay años, promedio anual de cada categoría."""
+    if "Año" in detalle and detalle["Año"].notna().any():
+        por_anio = detalle.dropna(subset=["Año"]).groupby(["Categoría", "Año"])["Costo"].sum()
+        n_anios = por_anio.index.get_level_values("Año").nunique()
+        anual = por_anio.groupby(level="Categoría").sum() / n_anios
+    else:
+        anual = detalle.groupby("Categoría")["Costo"].sum()
+    return anual.rename("Costo anual").reset_index()
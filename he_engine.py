@@ -0,0 +1,404 @@
+# ---------------------------------------------------------
+# MOTOR DE CÁLCULO – Suite de Evaluaciones Económicas en Salud
+# ---------------------------------------------------------
+# • Funciones puras (sin Streamlit) para COI, BIA, ROI, CC, CMA, CCA
+#   y CEA/CUA/CBA; reciben y devuelven arrays NumPy o DataFrames.
+# • healtheconomics.py las llama a través de st.cache_data; también
+#   pueden usarse en procesos batch sin navegador.
+# ---------------------------------------------------------
+
+import warnings
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# 1) COI – Costo de la enfermedad
+
+def coi_total(costos: Sequence[float]) -> float:
+    """Suma de los costos anuales por categoría."""
+    return float(np.sum(np.asarray(costos, dtype=float)))
+
+
+def coi_tornado(
+    categorias: Sequence[str],
+    costos: Sequence[float],
+    variacion_pct: Sequence[float],
+) -> pd.DataFrame:
+    """Cambios ± por categoría, ordenados de mayor a menor magnitud."""
+    costos = np.asarray(costos, dtype=float)
+    pct = np.asarray(variacion_pct, dtype=float) / 100
+    menos = costos * (1 - pct) - costos
+    mas = costos * (1 + pct) - costos
+    orden = np.argsort(-np.maximum(np.abs(menos), np.abs(mas)), kind="stable")
+    return pd.DataFrame(
+        {"Menos": menos[orden], "Más": mas[orden]},
+        index=pd.Index(np.asarray(categorias, dtype=object)[orden], name="Categoría"),
+    )
+
+
+def _cholesky_correlacion(correlacion: np.ndarray) -> np.ndarray:
+    """Factor de Cholesky; si la matriz no es definida positiva, usa la más cercana."""
+    R = np.asarray(correlacion, dtype=float)
+    if R.ndim != 2 or R.shape[0] != R.shape[1] or not np.allclose(R, R.T):
+        raise ValueError("La matriz de correlación debe ser cuadrada y simétrica.")
+    if not np.allclose(np.diag(R), 1) or (np.abs(R) > 1).any():
+        raise ValueError("La matriz de correlación debe tener 1 en la diagonal y valores en [−1, 1].")
+    try:
+        return np.linalg.cholesky(R)
+    except np.linalg.LinAlgError:
+        val, vec = np.linalg.eigh(R)
+        R = (vec * np.clip(val, 1e-10, None)) @ vec.T
+        d = np.sqrt(np.diag(R))
+        return np.linalg.cholesky(R / np.outer(d, d))
+
+
+def coi_montecarlo(
+    costos: Sequence[float],
+    variacion_pct: Sequence[float],
+    correlacion=None,
+    n: int = 100_000,
+    semilla: int = 12345,
+) -> np.ndarray:
+    """Simulaciones conjuntas (n × categorías) de los costos anuales.
+
+    Cada categoría es lognormal con media = costo y coeficiente de variación
+    = Variación (%); la dependencia entre categorías se introduce con una
+    cópula gaussiana con la matriz de `correlacion` (identidad si es None).
+    """
+    m = np.asarray(costos, dtype=float)
+    cv = np.asarray(variacion_pct, dtype=float) / 100
+    k = m.size
+    L = _cholesky_correlacion(np.eye(k) if correlacion is None else correlacion)
+    z = np.random.default_rng(semilla).standard_normal((n, k)) @ L.T
+    s2 = np.log1p(cv ** 2)
+    with np.errstate(divide="ignore"):
+        mu = np.log(m) - s2 / 2
+    return np.where(m > 0, np.exp(mu + np.sqrt(s2) * z), 0.0)
+
+
+def coi_resumen_mc(
+    muestras: np.ndarray,
+    categorias: Sequence[str],
+    q: Sequence[float] = (2.5, 5, 25, 50, 75, 95, 97.5),
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Percentiles del costo total y contribución de cada categoría a su varianza.
+
+    La contribución es Cov(X_i, Total) / Var(Total): suma 1 e incluye la
+    parte de la varianza debida a las correlaciones.
+    """
+    total = muestras.sum(axis=1)
+    pct = pd.DataFrame({
+        "Estadístico": ["Media", "DE", *[f"P{p:g}" for p in q]],
+        "Costo total": np.r_[total.mean(), total.std(ddof=1), np.percentile(total, q)],
+    })
+    centrado = muestras - muestras.mean(axis=0)
+    cov = centrado.T @ (total - total.mean()) / (len(total) - 1)
+    var = total.var(ddof=1)
+    contrib = pd.DataFrame({
+        "Categoría": list(categorias),
+        "Contribución a la varianza": cov / var if var > 0 else np.zeros_like(cov),
+    }).sort_values("Contribución a la varianza", ascending=False, kind="stable").reset_index(drop=True)
+    return pct, contrib
+
+
+# 2) BIA – Impacto presupuestario
+
+def pim_tasa_crecimiento(pim_hist: Sequence[float]) -> float:
+    """Tasa media anual de crecimiento del PIM (0 si el año previo es 0)."""
+    pim = np.asarray(pim_hist, dtype=float)
+    prev, curr = pim[:-1], pim[1:]
+    tasas = np.divide(curr - prev, prev, out=np.zeros_like(prev), where=prev > 0)
+    return round(float(tasas.mean()), 3) if tasas.size else 0.0
+
+
+def pim_proyectado(pim_ultimo, cost_inc, tasa) -> np.ndarray:
+    """Proyección PIM_t = PIM_{t-1}·(1+g) + CI_t (PIM_{-1} = último PIM histórico).
+
+    Acepta un escenario (``cost_inc`` 1-D) o varios a la vez (``cost_inc``
+    de forma escenarios × años, ``pim_ultimo``/``tasa`` escalares o por
+    escenario). Cada año se calcula para todos los escenarios a la vez, así
+    que el costo en Python es O(años) y la memoria O(escenarios × años).
+    """
+    ci = np.asarray(cost_inc, dtype=float)
+    ci2 = np.atleast_2d(ci)
+    n, yrs = ci2.shape
+    g1 = 1 + np.broadcast_to(np.asarray(tasa, dtype=float), (n,))
+    pim = np.empty((n, yrs))
+    if yrs:
+        pim[:, 0] = np.broadcast_to(np.asarray(pim_ultimo, dtype=float), (n,)) + ci2[:, 0]
+    for t in range(1, yrs):
+        pim[:, t] = pim[:, t - 1] * g1 + ci2[:, t]
+    return pim[0] if ci.ndim == 1 else pim
+
+
+BIA_METRICAS = (
+    "Casos intervención actual",
+    "Casos intervención nueva",
+    "Costo incremental",
+    "Acumulado Costo Incremental",
+    "PIM proyectado",
+    "Impacto en PIM",
+)
+
+
+def bia_escenarios(casos_anio, delta, uptake_pct, pim_ultimo, tasa) -> np.ndarray:
+    """Cubo escenarios × años × BIA_METRICAS para muchos escenarios a la vez.
+
+    ``casos_anio``, ``delta``, ``pim_ultimo`` y ``tasa`` son escalares o
+    vectores por escenario; ``uptake_pct`` es una curva (años) o una matriz
+    escenarios × años de % de introducción.
+    """
+    up = np.atleast_2d(np.asarray(uptake_pct, dtype=float))
+    casos, d, pim0, g = (np.asarray(x, dtype=float) for x in (casos_anio, delta, pim_ultimo, tasa))
+    n = np.broadcast_shapes(up.shape[:1], casos.shape, d.shape, pim0.shape, g.shape)[0]
+    up = np.broadcast_to(up, (n, up.shape[1]))
+    casos = np.broadcast_to(casos, (n,))[:, None]
+    uso_nueva = np.ceil(casos * up / 100)
+    cost_inc = np.broadcast_to(d, (n,))[:, None] * uso_nueva
+    acumulado = np.cumsum(cost_inc, axis=1)
+    pim_proj = pim_proyectado(np.broadcast_to(pim0, (n,)), cost_inc, np.broadcast_to(g, (n,)))
+    impacto = np.divide(
+        acumulado, pim_proj, out=np.full_like(acumulado, np.nan), where=pim_proj > 0
+    )
+    return np.stack([casos - uso_nueva, uso_nueva, cost_inc, acumulado, pim_proj, impacto], axis=2)
+
+
+def bia_proyeccion(
+    casos_anio: float,
+    delta: float,
+    uptake_pct: Sequence[float],
+    pim_ultimo: float,
+    tasa: float,
+) -> pd.DataFrame:
+    """Tabla anual de casos, costo incremental, PIM e impacto (un escenario)."""
+    cubo = bia_escenarios(casos_anio, delta, uptake_pct, pim_ultimo, tasa)[0]
+    df = pd.DataFrame(cubo, columns=list(BIA_METRICAS))
+    df.insert(0, "Año", [f"Año {i+1}" for i in range(len(df))])
+    casos = ["Casos intervención actual", "Casos intervención nueva"]
+    df[casos] = df[casos].astype(int)
+    return df
+
+
+def bia_grilla(ejes: Dict[str, Sequence[float]]) -> pd.DataFrame:
+    """Producto cartesiano de los ejes: una fila por escenario."""
+    mallas = np.meshgrid(*(np.asarray(v, dtype=float) for v in ejes.values()), indexing="ij")
+    return pd.DataFrame({k: m.ravel() for k, m in zip(ejes, mallas)})
+
+
+BIA_PARAMETROS = ("Casos/año", "Δ costo", "Factor introducción", "Tasa PIM")
+
+
+def bia_evaluar_grilla(
+    ejes: Dict[str, Sequence[float]],
+    base: Dict[str, float],
+    uptake_pct: Sequence[float],
+    pim_ultimo: float,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Evalúa el producto cartesiano de `ejes` (claves de BIA_PARAMETROS).
+
+    Los parámetros sin eje toman su valor de `base`; el factor de
+    introducción escala la curva `uptake_pct` (tope 100 %). Devuelve la
+    tabla de escenarios y el cubo de bia_escenarios; el cubo puede
+    reorganizarse como grilla con ``cubo.reshape(*tamaños_ejes, años, métricas)``.
+    """
+    desconocidos = set(ejes) - set(BIA_PARAMETROS)
+    if desconocidos:
+        raise ValueError(f"Parámetros BIA desconocidos: {sorted(desconocidos)}")
+    esc = bia_grilla(ejes)
+    for p in BIA_PARAMETROS:
+        if p not in esc:
+            esc[p] = float(base[p])
+    uptake = np.clip(esc["Factor introducción"].to_numpy()[:, None] * np.asarray(uptake_pct, dtype=float)[None], 0, 100)
+    cubo = bia_escenarios(
+        esc["Casos/año"].to_numpy(), esc["Δ costo"].to_numpy(), uptake,
+        pim_ultimo, esc["Tasa PIM"].to_numpy()
+    )
+    return esc, cubo
+
+
+def bia_resumen(cubo: np.ndarray, q: Sequence[float] = (5, 25, 50, 75, 95)) -> pd.DataFrame:
+    """Distribución entre escenarios del acumulado y del impacto en PIM finales."""
+    finales = {
+        "Acumulado Costo Incremental": cubo[:, -1, BIA_METRICAS.index("Acumulado Costo Incremental")],
+        "Impacto en PIM": cubo[:, -1, BIA_METRICAS.index("Impacto en PIM")],
+    }
+    with warnings.catch_warnings():
+        # Escenarios sin PIM (> 0) dejan columnas completas en NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        filas = {
+            k: np.r_[np.nanmean(v), np.nanmin(v), np.nanpercentile(v, q), np.nanmax(v)]
+            for k, v in finales.items()
+        }
+    idx = ["Media", "Mínimo", *[f"P{p:g}" for p in q], "Máximo"]
+    return pd.DataFrame(filas, index=idx)
+
+
+# 3) ROI – Retorno sobre la inversión
+
+def roi(inversion, beneficio):
+    """ROI (%) = (beneficio − inversión) / inversión · 100; NaN si inversión = 0."""
+    inv = np.asarray(inversion, dtype=float)
+    ben = np.asarray(beneficio, dtype=float)
+    out = np.divide((ben - inv) * 100, inv, out=np.full(np.broadcast(inv, ben).shape, np.nan), where=inv != 0)
+    return float(out) if out.ndim == 0 else out
+
+
+# 4) CC – Comparación de costos
+
+def cc_comparacion(df: pd.DataFrame, col_costo: str = "Costo") -> pd.DataFrame:
+    """Agrega la diferencia de cada alternativa frente a la primera (base)."""
+    out = df.copy()
+    costos = out[col_costo].to_numpy(dtype=float)
+    out["Δ vs Base"] = costos - costos[0]
+    return out
+
+
+# 5) CMA – Minimización de costos
+
+def cma_minimo(df: pd.DataFrame, col_costo: str = "Costo") -> pd.Series:
+    """Fila de la alternativa con menor costo."""
+    return df.iloc[int(np.argmin(df[col_costo].to_numpy(dtype=float)))]
+
+
+# 6) CCA – Costo‑consecuencia
+
+def cca_tabla(n_alt: int, variables: Sequence[str]) -> pd.DataFrame:
+    """Tabla inicial con una fila por alternativa y una columna por consecuencia."""
+    data = {"Alternativa": [f"A{i+1}" for i in range(int(n_alt))]}
+    for v in variables:
+        data[v] = np.zeros(int(n_alt))
+    return pd.DataFrame(data)
+
+
+# 7+8+9) CEA, CUA, CBA
+
+FRONTERA = "Frontera"
+DOMINADO = "Dominado"
+DOMINANCIA_EXTENDIDA = "Dominancia extendida"
+SIN_DATOS = "Sin datos"
+
+
+def frontera_eficiente(costo: Sequence[float], efecto: Sequence[float]) -> pd.DataFrame:
+    """Frontera costo‑efectiva con dominancia estricta y extendida, O(n log n).
+
+    1. Orden por costo ascendente (y efecto descendente en empates); una
+       estrategia está dominada si alguna más barata (o igual) tiene efecto
+       mayor o igual: máximo acumulado del efecto.
+    2. Entre las no dominadas, la frontera es la envolvente convexa inferior
+       en el plano (efecto, costo) (cadena monótona): se descartan por
+       dominancia extendida las que tienen un ICER mayor que el siguiente.
+
+    Devuelve, en el orden de entrada, las columnas Estado, ΔCosto, ΔEfect e
+    ICER (estas tres solo para estrategias de la frontera, respecto de la
+    anterior en ella).
+    """
+    costo = np.asarray(costo, dtype=float)
+    efecto = np.asarray(efecto, dtype=float)
+    n = costo.size
+    estado = np.full(n, DOMINADO, dtype=object)
+    d_costo = np.full(n, np.nan)
+    d_efecto = np.full(n, np.nan)
+    icer = np.full(n, np.nan)
+
+    valido = np.isfinite(costo) & np.isfinite(efecto)
+    estado[~valido] = SIN_DATOS
+    idx = np.flatnonzero(valido)
+    orden = idx[np.lexsort((-efecto[idx], costo[idx]))]
+    e = efecto[orden]
+    previo = np.maximum.accumulate(np.r_[-np.inf, e[:-1]])
+    nd = orden[e > previo]
+    estado[nd] = DOMINANCIA_EXTENDIDA
+
+    c, e = costo[nd].tolist(), efecto[nd].tolist()
+    pila = []
+    for i in range(len(nd)):
+        while len(pila) >= 2:
+            a, b = pila[-2], pila[-1]
+            if (c[b] - c[a]) * (e[i] - e[b]) > (c[i] - c[b]) * (e[b] - e[a]):
+                pila.pop()
+            else:
+                break
+        pila.append(i)
+    f = nd[pila]
+    estado[f] = FRONTERA
+    d_costo[f[1:]] = np.diff(costo[f])
+    d_efecto[f[1:]] = np.diff(efecto[f])
+    icer[f[1:]] = d_costo[f[1:]] / d_efecto[f[1:]]
+    return pd.DataFrame({"Estado": estado, "ΔCosto": d_costo, "ΔEfect": d_efecto, "ICER": icer})
+
+
+def _cea_grilla(
+    nombres: Sequence[str],
+    costos: Sequence[float],
+    efectos: Sequence[float],
+    ejes: Dict[str, Sequence[float]],
+    wtp: float,
+) -> Tuple[List[np.ndarray], List[np.ndarray], np.ndarray, Tuple[int, ...]]:
+    """Costos, efectos y WTP como arrays difundibles sobre la grilla de `ejes`.
+
+    Claves válidas: "WTP", "Costo <tratamiento>" y "Efect. <tratamiento>";
+    los parámetros sin eje quedan en su caso base. Usa mallas dispersas
+    (meshgrid sparse), así que nada ocupa más que la grilla resultante.
+    """
+    nombres = [str(n) for n in nombres]
+    C = [np.asarray(c, dtype=float) for c in costos]
+    E = [np.asarray(e, dtype=float) for e in efectos]
+    lam = np.asarray(wtp, dtype=float)
+    mallas = np.meshgrid(*(np.asarray(v, dtype=float) for v in ejes.values()), indexing="ij", sparse=True)
+    for clave, malla in zip(ejes, mallas):
+        if clave == "WTP":
+            lam = malla
+        elif clave.startswith("Costo ") and clave[6:] in nombres:
+            C[nombres.index(clave[6:])] = malla
+        elif clave.startswith("Efect. ") and clave[7:] in nombres:
+            E[nombres.index(clave[7:])] = malla
+        else:
+            raise ValueError(f"Parámetro de sensibilidad desconocido: {clave}")
+    forma = tuple(len(v) for v in ejes.values())
+    return C, E, lam, forma
+
+
+def cea_nmb_grilla(
+    nombres: Sequence[str],
+    costos: Sequence[float],
+    efectos: Sequence[float],
+    ejes: Dict[str, Sequence[float]],
+    wtp: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """NMB = WTP·E − C de cada tratamiento en la grilla multi‑vía de `ejes`.
+
+    Devuelve (nmb, preferida): nmb con forma tratamientos × grilla y el
+    índice del tratamiento con mayor NMB en cada punto. Las fronteras
+    entre valores de `preferida` son las líneas umbral.
+    """
+    C, E, lam, forma = _cea_grilla(nombres, costos, efectos, ejes, wtp)
+    nmb = np.stack([np.broadcast_to(lam * e - c, forma) for c, e in zip(C, E)])
+    return nmb, nmb.argmax(axis=0)
+
+
+def cea_icer_grilla(
+    nombres: Sequence[str],
+    costos: Sequence[float],
+    efectos: Sequence[float],
+    ejes: Dict[str, Sequence[float]],
+    i: int,
+    j: int,
+) -> np.ndarray:
+    """ICER de j frente a i en cada punto de la grilla (NaN si ΔE = 0)."""
+    C, E, _, forma = _cea_grilla(nombres, costos, efectos, ejes, 0.0)
+    d_c = np.broadcast_to(C[j] - C[i], forma)
+    d_e = np.broadcast_to(E[j] - E[i], forma)
+    return np.divide(d_c, d_e, out=np.full(forma, np.nan), where=d_e != 0)
+
+
+def cea_incremental(
+    tx: pd.DataFrame,
+    col_costo: str = "Costo total",
+    col_efecto: str = "Efectividad",
+) -> pd.DataFrame:
+    """Tabla incremental ordenada por costo, con ICER solo sobre la frontera."""
+    df = tx.sort_values(col_costo, kind="stable").reset_index(drop=True)
+    fr = frontera_eficiente(df[col_costo].to_numpy(dtype=float), df[col_efecto].to_numpy(dtype=float))
+    return pd.concat([df, fr], axis=1)
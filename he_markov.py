@@ -0,0 +1,119 @@
+# ---------------------------------------------------------
+# MODELO DE MARKOV DE COHORTE – CUA (Costo‑Utilidad)
+# ---------------------------------------------------------
+# • Estados, matrices de transición constantes o variables por ciclo,
+#   costos y utilidades por estado, descuento y corrección de medio ciclo.
+# • Todas las estrategias avanzan juntas: un producto matricial por lotes
+#   por ciclo (estrategias × estados), sin bucles por estado.
+# • Los totales (Costo total, Efectividad = QALYs) alimentan directamente
+#   la tabla incremental de he_engine.cea_incremental.
+# ---------------------------------------------------------
+
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+TOLERANCIA_FILAS = 1e-6
+
+
+def _por_ciclo(valores, k: int, ciclos: int, s: int, nombre: str) -> np.ndarray:
+    """Expande costos/utilidades a la forma estrategias × (ciclos+1) × estados."""
+    v = np.asarray(valores, dtype=float)
+    if v.ndim == 1:
+        v = v[None, None, :]
+    elif v.ndim == 2:
+        v = v[:, None, :]
+    try:
+        return np.broadcast_to(v, (k, ciclos + 1, s))
+    except ValueError:
+        raise ValueError(
+            f"{nombre}: forma {np.shape(valores)} incompatible con "
+            f"{k} estrategias, {ciclos + 1} ciclos y {s} estados."
+        ) from None
+
+
+def validar_transiciones(P: np.ndarray) -> None:
+    """Error si alguna fila no es no negativa o no suma 1."""
+    if (P < 0).any() or np.abs(P.sum(axis=-1) - 1).max() > TOLERANCIA_FILAS:
+        raise ValueError("Cada fila de la matriz de transición debe ser no negativa y sumar 1.")
+
+
+def markov_traza(p_inicial: Sequence[float], transiciones, ciclos: int) -> np.ndarray:
+    """Traza de la cohorte: estrategias × (ciclos+1) × estados.
+
+    `transiciones` tiene forma estrategias × estados × estados (constante) o
+    estrategias × ciclos × estados × estados (variable por ciclo).
+    """
+    P = np.asarray(transiciones, dtype=float)
+    if P.ndim == 2:
+        P = P[None]
+    k, s = P.shape[0], P.shape[-1]
+    if P.shape[-2] != s or P.ndim not in (3, 4) or (P.ndim == 4 and P.shape[1] < ciclos):
+        raise ValueError(f"Matriz de transición con forma no válida: {P.shape}.")
+    validar_transiciones(P)
+
+    traza = np.empty((k, ciclos + 1, s))
+    traza[:, 0] = np.broadcast_to(np.asarray(p_inicial, dtype=float), (k, s))
+    x = traza[:, 0, None, :]
+    for t in range(ciclos):
+        x = x @ (P[:, t] if P.ndim == 4 else P)
+        traza[:, t + 1] = x[:, 0]
+    return traza
+
+
+def markov_cohorte(
+    nombres: Sequence[str],
+    p_inicial: Sequence[float],
+    transiciones,
+    costos,
+    utilidades,
+    ciclos: int,
+    desc_costos: float = 0.03,
+    desc_efectos: float = 0.03,
+    ciclos_por_anio: int = 1,
+    medio_ciclo: bool = True,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Costos y QALYs descontados por estrategia, más la traza de la cohorte.
+
+    `costos` y `utilidades` son por estado y por ciclo: formas (estados,),
+    (estrategias, estados) o (estrategias, ciclos+1, estados). Las
+    utilidades son anuales; los QALYs de cada ciclo se escalan por su
+    duración (1 / ciclos_por_anio). La corrección de medio ciclo aplica la
+    regla del trapecio (peso ½ en el primer y el último ciclo); sin ella se
+    cuentan los ciclos 0 … ciclos−1 (estado al inicio de cada ciclo), igual
+    que he_microsim.microsim.
+    """
+    traza = markov_traza(p_inicial, transiciones, int(ciclos))
+    k, t1, s = traza.shape
+    c = _por_ciclo(costos, k, t1 - 1, s, "Costos")
+    u = _por_ciclo(utilidades, k, t1 - 1, s, "Utilidades")
+
+    anios = np.arange(t1) / ciclos_por_anio
+    peso = np.ones(t1)
+    if medio_ciclo:
+        peso[[0, -1]] = 0.5
+    else:
+        peso[-1] = 0.0
+    w_c = peso / (1 + desc_costos) ** anios
+    w_e = peso / (1 + desc_efectos) ** anios / ciclos_por_anio
+
+    costo_ciclo = np.einsum("kts,kts->kt", traza, c)
+    qaly_ciclo = np.einsum("kts,kts->kt", traza, u)
+    res = pd.DataFrame({
+        "Tratamiento": list(nombres),
+        "Costo total": costo_ciclo @ w_c,
+        "Efectividad": qaly_ciclo @ w_e,
+    })
+    return res, traza
+
+
+def matriz_por_defecto(n_estados: int, progresion: float = 0.10, muerte: float = 0.05) -> np.ndarray:
+    """Matriz progresiva simple: permanecer, avanzar un estado o morir (último estado absorbente)."""
+    P = np.zeros((n_estados, n_estados))
+    for i in range(n_estados - 1):
+        P[i, i + 1] += progresion
+        P[i, -1] += muerte
+        P[i, i] = 1 - P[i].sum()
+    P[-1, -1] = 1.0
+    return P
@@ -0,0 +1,179 @@
+# ---------------------------------------------------------
+# MICROSIMULACIÓN DE PACIENTES INDIVIDUALES – CEA/CUA
+# ---------------------------------------------------------
+# • Modelo de estados con memoria: la probabilidad de transición puede
+#   depender del tiempo en el estado actual y cada ingreso a un estado
+#   puede generar un costo de evento.
+# • Dentro de un lote se simulan todos los pacientes a la vez (arrays);
+#   los lotes se reparten en un pool de procesos.
+# • Cada lote usa su propio flujo aleatorio derivado con SeedSequence,
+#   y los resultados se combinan en orden de lote: el resultado es
+#   idéntico bit a bit con 1 o N procesos. Todas las estrategias de un
+#   lote comparten números aleatorios (variables aleatorias comunes).
+# ---------------------------------------------------------
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from he_markov import validar_transiciones
+
+# Momentos por lote: (n, media, M2) de costo, QALY, Δcosto y ΔQALY por estrategia
+_METRICAS = ("costo", "qaly", "d_costo", "d_qaly")
+
+
+def transiciones_tiempo_en_estado(P, max_tiempo: int, incremento: float) -> np.ndarray:
+    """Matrices que dependen del tiempo en el estado: estrategias × estados × tiempo × estados.
+
+    Las probabilidades de salida de cada estado crecen un `incremento`
+    relativo por ciclo de permanencia (tope en `max_tiempo` − 1 ciclos);
+    la probabilidad de permanecer absorbe el resto de la fila.
+    """
+    P = np.asarray(P, dtype=float)
+    if P.ndim == 2:
+        P = P[None]
+    validar_transiciones(P)
+    k, s, _ = P.shape
+    factor = (1 + incremento) ** np.arange(max_tiempo)
+    salida = P * (1 - np.eye(s))
+    out = salida[:, :, None, :] * factor[None, None, :, None]
+    total = out.sum(axis=-1, keepdims=True)
+    out = np.where(total > 1, out / np.maximum(total, 1e-300), out)
+    diag = np.arange(s)
+    out[:, diag, :, diag] = (1 - out.sum(axis=-1)).transpose(1, 0, 2)
+    return out
+
+
+def _simular_lote(
+    semilla: np.random.SeedSequence,
+    n: int,
+    p_inicial: np.ndarray,
+    P: np.ndarray,
+    costos: np.ndarray,
+    entrada: np.ndarray,
+    utilidades: np.ndarray,
+    ciclos: int,
+    w_c: np.ndarray,
+    w_e: np.ndarray,
+) -> dict:
+    """Simula n pacientes para todas las estrategias y devuelve sus momentos."""
+    k, s, d = P.shape[0], P.shape[1], P.shape[2]
+    costo = np.zeros((k, n))
+    qaly = np.zeros((k, n))
+    for j in range(k):
+        # Misma semilla para todas las estrategias: variables aleatorias comunes
+        rng = np.random.default_rng(semilla)
+        estado = (np.cumsum(p_inicial)[None, :] <= rng.random(n)[:, None]).sum(axis=1)
+        estado = np.minimum(estado, s - 1)
+        tiempo = np.zeros(n, dtype=np.int64)
+        for t in range(ciclos):
+            costo[j] += costos[j, estado] * w_c[t]
+            qaly[j] += utilidades[j, estado] * w_e[t]
+            prob = P[j, estado, np.minimum(tiempo, d - 1)]
+            nuevo = (np.cumsum(prob, axis=1) <= rng.random(n)[:, None]).sum(axis=1)
+            nuevo = np.minimum(nuevo, s - 1)
+            cambia = nuevo != estado
+            costo[j] += np.where(cambia, entrada[j, nuevo], 0.0) * w_c[t + 1]
+            tiempo = np.where(cambia, 0, tiempo + 1)
+            estado = nuevo
+    valores = {"costo": costo, "qaly": qaly, "d_costo": costo - costo[:1], "d_qaly": qaly - qaly[:1]}
+    return {
+        m: (n, v.mean(axis=1), ((v - v.mean(axis=1, keepdims=True)) ** 2).sum(axis=1))
+        for m, v in valores.items()
+    }
+
+
+def _combinar(a: tuple, b: tuple) -> tuple:
+    """Combina (n, media, M2) de dos lotes (Chan et al.)."""
+    na, ma, m2a = a
+    nb, mb, m2b = b
+    n = na + nb
+    delta = mb - ma
+    return n, ma + delta * nb / n, m2a + m2b + delta ** 2 * na * nb / n
+
+
+def microsim(
+    nombres: Sequence[str],
+    p_inicial: Sequence[float],
+    transiciones,
+    costos,
+    utilidades,
+    ciclos: int,
+    n_pacientes: int,
+    costos_entrada=None,
+    desc_costos: float = 0.03,
+    desc_efectos: float = 0.03,
+    ciclos_por_anio: int = 1,
+    semilla: int = 12345,
+    tam_lote: int = 50_000,
+    n_procesos: int = 1,
+    progreso: Optional[Callable[[float], None]] = None,
+) -> pd.DataFrame:
+    """Costos y QALYs medios por estrategia con su error estándar Monte Carlo.
+
+    `transiciones` tiene forma estrategias × estados × estados, o
+    estrategias × estados × tiempo × estados si depende del tiempo en el
+    estado (ver transiciones_tiempo_en_estado). `costos`, `utilidades` y
+    `costos_entrada` son por estado: (estados,) o (estrategias, estados).
+    `progreso` recibe la fracción de lotes terminados.
+    """
+    P = np.asarray(transiciones, dtype=float)
+    if P.ndim == 2:
+        P = P[None]
+    if P.ndim == 3:
+        P = P[:, :, None, :]
+    k, s = P.shape[0], P.shape[1]
+    if P.shape[-1] != s:
+        raise ValueError(f"Matriz de transición con forma no válida: {P.shape}.")
+    validar_transiciones(P)
+    c = np.broadcast_to(np.asarray(costos, dtype=float), (k, s))
+    u = np.broadcast_to(np.asarray(utilidades, dtype=float), (k, s))
+    ent = np.broadcast_to(np.asarray(0.0 if costos_entrada is None else costos_entrada, dtype=float), (k, s))
+    p0 = np.asarray(p_inicial, dtype=float)
+    p0 = p0 / p0.sum()
+
+    anios = np.arange(ciclos + 1) / ciclos_por_anio
+    w_c = 1 / (1 + desc_costos) ** anios
+    w_e = 1 / (1 + desc_efectos) ** anios / ciclos_por_anio
+
+    # Partición fija en lotes: no depende del número de procesos
+    tamanos = [min(tam_lote, n_pacientes - i) for i in range(0, n_pacientes, tam_lote)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    args = (p0, P, c, ent, u, int(ciclos), w_c, w_e)
+
+    resultados = [None] * len(tamanos)
+    if n_procesos <= 1 or len(tamanos) == 1:
+        for i, (ss, n) in enumerate(zip(semillas, tamanos)):
+            resultados[i] = _simular_lote(ss, n, *args)
+            if progreso:
+                progreso((i + 1) / len(tamanos))
+    else:
+        with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+            futuros = {pool.submit(_simular_lote, ss, n, *args): i for i, (ss, n) in enumerate(zip(semillas, tamanos))}
+            for hechos, fut in enumerate(as_completed(futuros), start=1):
+                resultados[futuros[fut]] = fut.result()
+                if progreso:
+                    progreso(hechos / len(tamanos))
+
+    total = resultados[0]
+    for r in resultados[1:]:
+        total = {m: _combinar(total[m], r[m]) for m in _METRICAS}
+
+    def media_ee(m):
+        n, media, m2 = total[m]
+        return media, np.sqrt(m2 / max(n - 1, 1) / n)
+
+    (mc, ec), (mq, eq), (mdc, edc), (mdq, edq) = (media_ee(m) for m in _METRICAS)
+    return pd.DataFrame({
+        "Tratamiento":  list(nombres),
+        "Costo total":  mc,
+        "EE Costo":     ec,
+        "Efectividad":  mq,
+        "EE Efect.":    eq,
+        "ΔCosto vs 1ª": mdc,
+        "EE ΔCosto":    edc,
+        "ΔEfect vs 1ª": mdq,
+        "EE ΔEfect":    edq,
+    })
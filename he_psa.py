@@ -0,0 +1,155 @@
+# ---------------------------------------------------------
+# ANÁLISIS DE SENSIBILIDAD PROBABILÍSTICO (PSA) – CEA/CUA/CBA
+# ---------------------------------------------------------
+# • Muestreo vectorizado de costos y efectos por tratamiento
+#   (gamma, beta, normal, lognormal o fijo, por método de momentos).
+# • Curva de aceptabilidad (CEAC) y NMB esperado sobre una grilla de
+#   disposición a pagar (WTP), procesando las simulaciones por bloques
+#   para acotar la memoria (sirve también con arrays memmap).
+# ---------------------------------------------------------
+
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DISTRIBUCIONES = ("gamma", "beta", "normal", "lognormal", "fija")
+
+# Máximo de elementos float64 por bloque intermedio (~32 MB)
+MAX_ELEMENTOS = 1 << 22
+
+
+def bloques(n: int, por_fila: int, max_elementos: int = MAX_ELEMENTOS) -> Iterator[slice]:
+    """Particiona n filas en bloques de a lo más max_elementos / por_fila filas."""
+    paso = max(1, max_elementos // max(1, por_fila))
+    for i in range(0, n, paso):
+        yield slice(i, min(i + paso, n))
+
+
+def muestrear(dist: str, media: float, ee: float, n: int, rng: np.random.Generator) -> np.ndarray:
+    """n valores de la distribución `dist` con la media y el error estándar dados."""
+    media, ee = float(media), float(ee)
+    if not (np.isfinite(media) and np.isfinite(ee)):
+        raise ValueError("Media y EE deben ser valores numéricos finitos.")
+    if dist == "fija" or ee <= 0:
+        return np.full(n, media)
+    if dist == "normal":
+        return rng.normal(media, ee, n)
+    if dist == "gamma":
+        if media <= 0:
+            raise ValueError(f"Gamma requiere media > 0 (media = {media}).")
+        forma = (media / ee) ** 2
+        return rng.gamma(forma, ee ** 2 / media, n)
+    if dist == "beta":
+        var = ee ** 2
+        if not 0 < media < 1 or var >= media * (1 - media):
+            raise ValueError(
+                f"Beta requiere 0 < media < 1 y EE² < media·(1−media) (media = {media}, EE = {ee})."
+            )
+        k = media * (1 - media) / var - 1
+        return rng.beta(media * k, (1 - media) * k, n)
+    if dist == "lognormal":
+        if media <= 0:
+            raise ValueError(f"Lognormal requiere media > 0 (media = {media}).")
+        s2 = np.log1p((ee / media) ** 2)
+        return rng.lognormal(np.log(media) - s2 / 2, np.sqrt(s2), n)
+    raise ValueError(f"Distribución no soportada: {dist}")
+
+
+def psa_muestras(
+    params: pd.DataFrame,
+    n: int,
+    semilla: int = 12345,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Genera matrices simulaciones × tratamientos de costos y efectos.
+
+    `params` debe tener las columnas 'Costo total', 'EE Costo', 'Dist. costo',
+    'Efectividad', 'EE Efect.' y 'Dist. efect.' (una fila por tratamiento).
+    """
+    rng = np.random.default_rng(semilla)
+    k = len(params)
+    costos = np.empty((n, k))
+    efectos = np.empty((n, k))
+    for j, r in enumerate(params.itertuples(index=False)):
+        fila = dict(zip(params.columns, r))
+        costos[:, j] = muestrear(fila["Dist. costo"], fila["Costo total"], fila["EE Costo"], n, rng)
+        efectos[:, j] = muestrear(fila["Dist. efect."], fila["Efectividad"], fila["EE Efect."], n, rng)
+    return costos, efectos
+
+
+def envolvente_nmb(costos: np.ndarray, efectos: np.ndarray, wtp: Sequence[float]) -> np.ndarray:
+    """Recorre, por simulación, la envolvente superior de NMB_j(λ) = λ·E_j − C_j.
+
+    Devuelve un array 3 × WTP × tratamientos con, para cada WTP, el número
+    de simulaciones en que gana cada tratamiento y las sumas de E y de C de
+    esas simulaciones (`wtp` ascendente). El ganador cambia a lo más k−1
+    veces por simulación, así que el costo es O(n·k²) por bloques,
+    independiente del tamaño de la grilla.
+
+    Empates exactos de NMB en un λ de la grilla: gana el tratamiento de
+    mayor efecto (la recta de mayor pendiente, que es la que gana a la
+    derecha del cruce); entre rectas idénticas, el de menor índice. Fuera
+    de los empates coincide con argmax de λ·E − C en cada λ (que en un
+    empate elegiría siempre el de menor índice).
+    """
+    wtp = np.asarray(wtp, dtype=float)
+    n, k = costos.shape
+    w = wtp.size
+    dif = np.zeros((3, k * (w + 1)))
+    for sl in bloques(n, 4 * k):
+        c = np.asarray(costos[sl], dtype=float)
+        e = np.asarray(efectos[sl], dtype=float)
+        filas = np.arange(c.shape[0])
+        actual = (wtp[0] * e - c).argmax(axis=1)
+        desde = np.zeros(c.shape[0], dtype=np.int64)
+        activo = np.ones(c.shape[0], dtype=bool)
+        for _ in range(k):
+            e_act, c_act = e[filas, actual], c[filas, actual]
+            de = e - e_act[:, None]
+            dc = c - c_act[:, None]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cruce = np.where(de > 0, dc / de, np.inf)
+            lam = cruce.min(axis=1)
+            # Empates en el cruce: gana la recta de mayor pendiente
+            siguiente = np.where(cruce == lam[:, None], de, -np.inf).argmax(axis=1)
+            hasta = np.where(np.isfinite(lam), np.searchsorted(wtp, lam), w)
+            hasta = np.maximum(hasta, desde)
+            idx = actual * (w + 1)
+            for fila, pesos in enumerate((None, e_act, c_act)):
+                p = None if pesos is None else pesos[activo]
+                dif[fila] += np.bincount(idx[activo] + desde[activo], p, minlength=dif.shape[1])
+                dif[fila] -= np.bincount(idx[activo] + hasta[activo], p, minlength=dif.shape[1])
+            activo &= hasta < w
+            if not activo.any():
+                break
+            actual = np.where(activo, siguiente, actual)
+            desde = hasta
+    return np.cumsum(dif.reshape(3, k, w + 1), axis=2)[:, :, :w].transpose(0, 2, 1)
+
+
+def ceac(costos: np.ndarray, efectos: np.ndarray, wtp: Sequence[float]) -> np.ndarray:
+    """Probabilidad de que cada tratamiento maximice el NMB (WTP × tratamientos).
+
+    Los empates exactos se resuelven como en envolvente_nmb(): el de mayor efecto.
+    """
+    return np.rint(envolvente_nmb(costos, efectos, wtp)[0]) / costos.shape[0]
+
+
+def nmb_esperado(costos: np.ndarray, efectos: np.ndarray, wtp: Sequence[float]) -> np.ndarray:
+    """NMB medio (WTP × tratamientos); lineal en WTP, basta con las medias."""
+    wtp = np.asarray(wtp, dtype=float)
+    return wtp[:, None] * efectos.mean(axis=0)[None] - costos.mean(axis=0)[None]
+
+
+def tabla_prob_ce(
+    nombres: Sequence[str],
+    wtp: Sequence[float],
+    prob: np.ndarray,
+    umbrales: Sequence[float],
+) -> pd.DataFrame:
+    """Probabilidad de costo‑efectividad en los umbrales de WTP indicados."""
+    wtp = np.asarray(wtp, dtype=float)
+    idx = np.abs(wtp[:, None] - np.asarray(umbrales, dtype=float)[None]).argmin(axis=0)
+    out = pd.DataFrame(prob[idx], columns=list(nombres))
+    out.insert(0, "WTP", wtp[idx])
+    return out
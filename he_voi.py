@@ -0,0 +1,153 @@
+# ---------------------------------------------------------
+# VALOR DE LA INFORMACIÓN (EVPI / EVPPI) – CEA/CUA/CBA
+# ---------------------------------------------------------
+# • Las muestras PSA se guardan en disco como .npy y se abren como
+#   memmap: la memoria usada no depende del número de simulaciones.
+# • EVPI sobre una grilla de WTP y EVPPI por regresión no paramétrica
+#   (Strong & Oakley) con base polinómica, acumulando X'X y X'y por
+#   bloques. Como la regresión es lineal, basta ajustar costos y efectos
+#   una vez: NMB ajustado(λ) = λ·Ê − Ĉ para todo λ.
+# ---------------------------------------------------------
+
+import json
+import os
+from itertools import combinations_with_replacement
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from he_psa import bloques, envolvente_nmb, muestrear
+
+_META = "meta.json"
+
+
+def generar_psa_en_disco(
+    params: pd.DataFrame,
+    n: int,
+    directorio: str,
+    semilla: int = 12345,
+    tam_bloque: int = 100_000,
+) -> str:
+    """Genera n simulaciones PSA directamente en archivos .npy, bloque a bloque.
+
+    Escribe costos.npy y efectos.npy (simulaciones × tratamientos) y
+    parametros.npy (simulaciones × 2·tratamientos: costos y efectos, los
+    parámetros inciertos de este PSA). Cada bloque usa su propio flujo
+    derivado con SeedSequence, así que el resultado no depende de la RAM.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    k = len(params)
+    nombres = params["Tratamiento"].astype(str).tolist()
+    abrir = np.lib.format.open_memmap
+    costos = abrir(os.path.join(directorio, "costos.npy"), mode="w+", dtype=float, shape=(n, k))
+    efectos = abrir(os.path.join(directorio, "efectos.npy"), mode="w+", dtype=float, shape=(n, k))
+    parametros = abrir(os.path.join(directorio, "parametros.npy"), mode="w+", dtype=float, shape=(n, 2 * k))
+
+    tramos = list(range(0, n, tam_bloque))
+    for inicio, ss in zip(tramos, np.random.SeedSequence(semilla).spawn(len(tramos))):
+        m = min(tam_bloque, n - inicio)
+        rng = np.random.default_rng(ss)
+        sl = slice(inicio, inicio + m)
+        for j, r in enumerate(params.itertuples(index=False)):
+            fila = dict(zip(params.columns, r))
+            costos[sl, j] = muestrear(fila["Dist. costo"], fila["Costo total"], fila["EE Costo"], m, rng)
+            efectos[sl, j] = muestrear(fila["Dist. efect."], fila["Efectividad"], fila["EE Efect."], m, rng)
+        parametros[sl, :k] = costos[sl]
+        parametros[sl, k:] = efectos[sl]
+    for arr in (costos, efectos, parametros):
+        arr.flush()
+
+    meta = {
+        "tratamientos": nombres,
+        "parametros": [f"Costo {t}" for t in nombres] + [f"Efect. {t}" for t in nombres],
+        "n": int(n),
+    }
+    with open(os.path.join(directorio, _META), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False)
+    return directorio
+
+
+def abrir_psa(directorio: str) -> Dict[str, object]:
+    """Abre un almacén PSA en modo memmap de solo lectura."""
+    with open(os.path.join(directorio, _META), encoding="utf-8") as fh:
+        meta = json.load(fh)
+    for nombre in ("costos", "efectos", "parametros"):
+        meta[nombre] = np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode="r")
+    return meta
+
+
+def evpi(costos: np.ndarray, efectos: np.ndarray, wtp: Sequence[float]) -> np.ndarray:
+    """EVPI por paciente: E[max_j NMB_j] − max_j E[NMB_j], para cada WTP."""
+    wtp = np.asarray(wtp, dtype=float)
+    n = costos.shape[0]
+    _, suma_e, suma_c = envolvente_nmb(costos, efectos, wtp)
+    nmb_max = (wtp[:, None] * suma_e - suma_c).sum(axis=1) / n
+    nmb_medio = wtp[:, None] * _medias(efectos)[None] - _medias(costos)[None]
+    return np.maximum(nmb_max - nmb_medio.max(axis=1), 0.0)
+
+
+def _medias(x: np.ndarray) -> np.ndarray:
+    """Media por columna recorriendo el array por bloques."""
+    suma = np.zeros(x.shape[1])
+    for sl in bloques(x.shape[0], x.shape[1]):
+        suma += np.asarray(x[sl], dtype=float).sum(axis=0)
+    return suma / x.shape[0]
+
+
+def _base_polinomica(x: np.ndarray, grado: int) -> np.ndarray:
+    """Columnas 1, x_i, x_i·x_j, … hasta el grado total indicado."""
+    cols = [np.ones(x.shape[0])]
+    for g in range(1, grado + 1):
+        for comb in combinations_with_replacement(range(x.shape[1]), g):
+            cols.append(np.prod(x[:, comb], axis=1))
+    return np.column_stack(cols)
+
+
+def evppi(
+    parametros: np.ndarray,
+    columnas: Sequence[int],
+    costos: np.ndarray,
+    efectos: np.ndarray,
+    wtp: Sequence[float],
+    grado: int = 2,
+) -> np.ndarray:
+    """EVPPI por paciente del grupo de parámetros `columnas`, para cada WTP.
+
+    Primera pasada: acumula X'X y X'[C, E] con una base polinómica de los
+    parámetros (estandarizados con las primeras 10 000 filas). Segunda
+    pasada: con los valores ajustados Ĉ, Ê calcula
+    E[max_j (λ·Ê_j − Ĉ_j)] − max_j E[λ·Ê_j − Ĉ_j].
+    """
+    wtp = np.asarray(wtp, dtype=float)
+    columnas = list(columnas)
+    n, k = costos.shape
+    x0 = np.asarray(parametros[: min(n, 10_000)][:, columnas], dtype=float)
+    media, desv = x0.mean(axis=0), x0.std(axis=0)
+    desv[desv == 0] = 1.0
+
+    def base(sl):
+        x = (np.asarray(parametros[sl][:, columnas], dtype=float) - media) / desv
+        return _base_polinomica(x, grado)
+
+    n_base = _base_polinomica(np.zeros((1, len(columnas))), grado).shape[1]
+    xtx = np.zeros((n_base, n_base))
+    xty = np.zeros((n_base, 2 * k))
+    for sl in bloques(n, n_base + 2 * k):
+        X = base(sl)
+        y = np.hstack([np.asarray(costos[sl], dtype=float), np.asarray(efectos[sl], dtype=float)])
+        xtx += X.T @ X
+        xty += X.T @ y
+    beta = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+
+    # Segunda pasada: los valores ajustados se recalculan por bloque
+    suma_e = np.zeros((wtp.size, k))
+    suma_c = np.zeros((wtp.size, k))
+    for sl in bloques(n, n_base + 2 * k):
+        ajuste = base(sl) @ beta
+        _, se, sc = envolvente_nmb(ajuste[:, :k], ajuste[:, k:], wtp)
+        suma_e += se
+        suma_c += sc
+    medio = xty[0] / n
+    nmb_medio = wtp[:, None] * medio[None, k:] - medio[None, :k]
+    return np.maximum((wtp[:, None] * suma_e - suma_c).sum(axis=1) / n - nmb_medio.max(axis=1), 0.0)
@@ -2,10 +2,19 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import io
+import os
+import pickle
+import tempfile
 import matplotlib.ticker as mticker
-import numpy as np
-import math
+
+import he_engine as he
+import he_psa
+import he_markov
+import he_microsim
+import he_voi
+import he_claims
+import he_bootstrap
+import figuras
 
 # ---------------------------------------------------------
 # SUITE COMPLETA DE EVALUACIONES ECONÓMICAS EN SALUD – Versión 1.2
@@ -29,6 +38,31 @@ TIPOS = [
 ]
 analisis = st.sidebar.radio("Selecciona el tipo de análisis", TIPOS)
 
+# Motor de cálculo cacheado: entradas sin cambios no se recalculan
+_cache = st.cache_data(show_spinner=False)
+coi_tornado     = _cache(he.coi_tornado)
+coi_montecarlo  = st.cache_data(show_spinner=False, max_entries=4)(he.coi_montecarlo)
+bia_proyeccion  = _cache(he.bia_proyeccion)
+cea_incremental = _cache(he.cea_incremental)
+markov_cohorte  = _cache(he_markov.markov_cohorte)
+bia_evaluar_grilla = st.cache_data(show_spinner="Evaluando escenarios…", max_entries=4)(he.bia_evaluar_grilla)
+cea_nmb_grilla     = st.cache_data(show_spinner=False, max_entries=4)(he.cea_nmb_grilla)
+cea_icer_grilla    = st.cache_data(show_spinner=False, max_entries=4)(he.cea_icer_grilla)
+bootstrap_brazos   = st.cache_data(show_spinner="Remuestreando pacientes…", max_entries=2)(he_bootstrap.bootstrap_brazos)
+psa_muestras    = st.cache_data(show_spinner="Simulando PSA…", max_entries=2)(he_psa.psa_muestras)
+psa_ceac        = st.cache_data(show_spinner="Calculando CEAC…", max_entries=2)(he_psa.ceac)
+
+# VOI sobre almacenes PSA en disco: se cachea por carpeta + clave de contenido
+@st.cache_data(show_spinner="Calculando EVPI…", max_entries=4)
+def voi_evpi(directorio: str, clave: int, wtp: np.ndarray) -> np.ndarray:
+    alm = he_voi.abrir_psa(directorio)
+    return he_voi.evpi(alm["costos"], alm["efectos"], wtp)
+
+@st.cache_data(show_spinner="Calculando EVPPI…", max_entries=8)
+def voi_evppi(directorio: str, clave: int, columnas: tuple, wtp: np.ndarray) -> np.ndarray:
+    alm = he_voi.abrir_psa(directorio)
+    return he_voi.evppi(alm["parametros"], list(columnas), alm["costos"], alm["efectos"], wtp)
+
 # Función descarga CSV
 
 def descarga_csv(df: pd.DataFrame, nombre: str):
@@ -38,89 +72,129 @@ def descarga_csv(df: pd.DataFrame, nombre: str):
 # 1) COI – Costo de la enfermedad 
 if analisis.startswith("1️⃣"):
     st.header("1️⃣ Costo de la Enfermedad (COI)")
-    # 1. Editor con columna de variación (%) por fila
-    coi_df = st.data_editor(
-        pd.DataFrame({
-            "Categoría": [
-                "Directo médico", "Directo no médico",
-                "Indirecto (productividad)", "Intangible"
-            ],
-            "Costo anual":   [0.0, 0.0, 0.0, 0.0],
-            "Variación (%)": [20.0, 20.0, 20.0, 20.0]
-        }),
-        num_rows="dynamic",
-        key="coi_tabla"
-    )
+    origen = st.radio("Origen de los costos", ("Ingreso manual", "Archivo de reclamos (CSV/Parquet)"), horizontal=True)
+
+    if origen == "Ingreso manual":
+        # 1. Editor con columna de variación (%) por fila
+        coi_df = st.data_editor(
+            pd.DataFrame({
+                "Categoría": [
+                    "Directo médico", "Directo no médico",
+                    "Indirecto (productividad)", "Intangible"
+                ],
+                "Costo anual":   [0.0, 0.0, 0.0, 0.0],
+                "Variación (%)": [20.0, 20.0, 20.0, 20.0]
+            }),
+            num_rows="dynamic",
+            key="coi_tabla"
+        )
+    else:
+        # 1b. Reclamos a nivel de paciente: lectura por bloques y agregación por categoría
+        st.caption("Para archivos muy grandes indique una ruta en el servidor; solo se leen las columnas elegidas.")
+        subido = st.file_uploader("Archivo de reclamos", type=["csv", "parquet"])
+        ruta   = st.text_input("…o ruta del archivo en el servidor")
+        if subido is not None:
+            fuente, nombre, firma = subido, subido.name, (subido.name, subido.size)
+        elif ruta and os.path.isfile(ruta):
+            fuente, nombre, firma = ruta, ruta, (ruta, os.path.getmtime(ruta), os.path.getsize(ruta))
+        else:
+            if ruta:
+                st.error(f"No se encontró el archivo: {ruta}")
+            st.info("Cargue un archivo de reclamos para continuar.")
+            st.stop()
+
+        formato = he_claims.formato_reclamos(nombre)
+        try:
+            cols = he_claims.columnas_reclamos(fuente, formato)
+        except Exception as e:
+            st.error(f"Error leyendo encabezado: {e}")
+            st.stop()
+        ninguna = "—"
+        c1, c2 = st.columns(2)
+        col_costo = c1.selectbox("Columna de costo", cols)
+        col_cat   = c2.selectbox("Columna de categoría de costo", cols)
+        col_anio  = c1.selectbox("Año o fecha (opcional)", [ninguna] + cols)
+        col_reg   = c2.selectbox("Región (opcional)", [ninguna] + cols)
+        col_edad  = c1.selectbox("Edad (opcional, se agrupa en bandas)", [ninguna] + cols)
+        opc = {k: (None if v == ninguna else v) for k, v in
+               {"col_anio": col_anio, "col_region": col_reg, "col_edad": col_edad}.items()}
+
+        clave = (firma, col_costo, col_cat, tuple(opc.values()))
+        if st.button("📥 Agregar reclamos"):
+            barra = st.empty()
+            try:
+                detalle = he_claims.agregar_reclamos(
+                    fuente, col_costo, col_cat, **opc, formato=formato,
+                    progreso=lambda filas: barra.text(f"Filas procesadas: {filas:,d}")
+                )
+            except Exception as e:
+                st.error(f"Error agregando reclamos: {e}")
+                st.stop()
+            st.session_state["coi_reclamos"] = (clave, detalle)
+        guardado = st.session_state.get("coi_reclamos")
+        if guardado is None or guardado[0] != clave:
+            st.info("Pulse «Agregar reclamos» para procesar el archivo con las columnas elegidas.")
+            st.stop()
+        detalle = guardado[1]
+        st.write(f"**Reclamos válidos:** {detalle['Reclamos'].sum():,d} | "
+                 f"**Descartados (costo no numérico):** {detalle['Descartados'].sum():,d}")
+        with st.expander("Detalle por dimensión"):
+            st.dataframe(detalle, hide_index=True, use_container_width=True)
+            descarga_csv(detalle, "COI_reclamos_detalle")
+
+        coi_base = he_claims.coi_desde_reclamos(detalle)
+        coi_base["Variación (%)"] = 20.0
+        coi_df = st.data_editor(coi_base, disabled=["Categoría", "Costo anual"], hide_index=True, key="coi_reclamos_tabla")
 
     # 2. Validaciones
     if (coi_df["Costo anual"] < 0).any() or (coi_df["Variación (%)"] < 0).any():
         st.error("No se permiten valores negativos en costos ni en variaciones.")
     else:
-        total = coi_df["Costo anual"].sum()
+        total = he.coi_total(coi_df["Costo anual"])
         st.success(f"Costo total anual: US$ {total:,.2f}")
 
         if total > 0:
             # — Gráfico de barras horizontales original —
             df_chart = coi_df.sort_values("Costo anual", ascending=True).reset_index(drop=True)
-            max_val = df_chart["Costo anual"].max()
-            inset   = max_val * 0.02
-            colors  = plt.cm.tab10(np.arange(len(df_chart)))
-
-            fig, ax = plt.subplots(figsize=(6, 4))
-            ax.barh(df_chart["Categoría"], df_chart["Costo anual"], color=colors)
-            ax.set_xlim(0, max_val + inset)
-            for idx, val in enumerate(df_chart["Costo anual"]):
-                ax.text(val - inset, idx, f"{val:,.2f}", va="center", ha="right", color="white")
-            ax.set_xlabel("Costo anual (US$)")
-            ax.set_title("Análisis de Costos – COI")
-            fig.tight_layout()
-            st.pyplot(fig)
-
-            # — Descarga del gráfico de barras —
-            buf1 = io.BytesIO()
-            fig.savefig(buf1, format="png", bbox_inches="tight")
-            buf1.seek(0)
-            st.download_button("📥 Descargar gráfico de barras", buf1, "COI_barras.png", "image/png")
 
-            # — Análisis Tornado con variaciones individuales —
-            sens = []
-            for _, row in coi_df.iterrows():
-                cat  = row["Categoría"]
-                cost = row["Costo anual"]
-                pct  = row["Variación (%)"] / 100
-                up   = cost * (1 + pct)
-                down = cost * (1 - pct)
-                sens.append({
-                    "Categoría": cat,
-                    "Menos": down - cost,    # negativo
-                    "Más":  up - cost        # positivo
-                })
+            def barras_coi(ax, categorias, valores):
+                max_val = valores.max()
+                inset   = max_val * 0.02
+                ax.barh(categorias, valores, color=plt.cm.tab10(np.arange(len(valores))))
+                ax.set_xlim(0, max_val + inset)
+                for idx, val in enumerate(valores):
+                    ax.text(val - inset, idx, f"{val:,.2f}", va="center", ha="right", color="white")
+                ax.set_xlabel("Costo anual (US$)")
+                ax.set_title("Análisis de Costos – COI")
+
+            # — Gráfico de barras y su descarga (PNG generado solo al descargar) —
+            figuras.mostrar(
+                barras_coi, df_chart["Categoría"].astype(str).to_numpy(), df_chart["Costo anual"].to_numpy(dtype=float),
+                figsize=(6, 4), descarga="COI_barras", etiqueta="📥 Descargar gráfico de barras",
+            )
 
-            sens_df = pd.DataFrame(sens).set_index("Categoría")
-            # Ordenar por mayor magnitud de cambio
-            order = sens_df.abs().max(axis=1).sort_values(ascending=False).index
-            sens_df = sens_df.loc[order]
+            # — Análisis Tornado con variaciones individuales —
+            sens_df = coi_tornado(
+                coi_df["Categoría"].to_numpy(),
+                coi_df["Costo anual"].to_numpy(),
+                coi_df["Variación (%)"].to_numpy(),
+            )
 
             # Dibujar tornado
-            fig2, ax2 = plt.subplots(figsize=(6, 4))
-            # Barras negativas en rojo
-            ax2.barh(sens_df.index, sens_df["Menos"], color="red",   label="– Variación")
-            # Barras positivas en verde
-            ax2.barh(sens_df.index, sens_df["Más"],  color="green", label="+ Variación")
-            ax2.axvline(0, color="black", linewidth=0.8)
-            # Invertir el eje Y para que la barra de mayor magnitud quede arriba
-            ax2.invert_yaxis()
-            ax2.set_xlabel("Cambio en costo anual (US$)")
-            ax2.set_title("Análisis Tornado – COI")
-            ax2.legend()
-            fig2.tight_layout()
-            st.pyplot(fig2)
-            
-            # — Descarga del gráfico Tornado —
-            buf2 = io.BytesIO()
-            fig2.savefig(buf2, format="png", bbox_inches="tight")
-            buf2.seek(0)
-            st.download_button("📥 Descargar gráfico Tornado", buf2, "COI_tornado.png", "image/png")
+            def tornado_coi(ax2, sens_df):
+                # Barras negativas en rojo
+                ax2.barh(sens_df.index, sens_df["Menos"], color="red",   label="– Variación")
+                # Barras positivas en verde
+                ax2.barh(sens_df.index, sens_df["Más"],  color="green", label="+ Variación")
+                ax2.axvline(0, color="black", linewidth=0.8)
+                # Invertir el eje Y para que la barra de mayor magnitud quede arriba
+                ax2.invert_yaxis()
+                ax2.set_xlabel("Cambio en costo anual (US$)")
+                ax2.set_title("Análisis Tornado – COI")
+                ax2.legend()
+
+            figuras.mostrar(tornado_coi, sens_df, figsize=(6, 4), descarga="COI_tornado",
+                            etiqueta="📥 Descargar gráfico Tornado")
             
             # — Interpretación del Análisis de Tornado —
             st.markdown("""
@@ -130,6 +204,51 @@ if analisis.startswith("1️⃣"):
             - La sección **“+ Variación”** muestra cuánto aumentaría el costo total si ese parámetro se incrementa en el mismo porcentaje.  
             - En la parte superior del gráfico están los factores de costo que, al variar, influirán más en tu presupuesto.  
             """)
+
+            # — Modo probabilístico: Monte Carlo con categorías correlacionadas —
+            st.markdown("---")
+            if st.checkbox("Modo probabilístico (Monte Carlo con correlaciones)", key="coi_mc"):
+                st.subheader("Propagación Monte Carlo – COI")
+                cats = coi_df["Categoría"].astype(str).tolist()
+                c1, c2 = st.columns(2)
+                n_mc    = c1.select_slider("Iteraciones", [10_000, 100_000, 500_000, 1_000_000], value=100_000, key="coi_mc_n")
+                sem_mc  = c2.number_input("Semilla", min_value=0, value=12345, step=1, key="coi_mc_sem")
+                st.markdown("Matriz de correlación entre categorías (Variación (%) = coeficiente de variación; marginales lognormales)")
+                corr_df = st.data_editor(
+                    pd.DataFrame(np.eye(len(cats)), index=cats, columns=cats),
+                    key=f"coi_corr_{len(cats)}"
+                )
+                try:
+                    muestras = coi_montecarlo(
+                        coi_df["Costo anual"].to_numpy(dtype=float),
+                        coi_df["Variación (%)"].to_numpy(dtype=float),
+                        corr_df.to_numpy(dtype=float), int(n_mc), int(sem_mc)
+                    )
+                except ValueError as e:
+                    st.error(f"Correlaciones no válidas: {e}")
+                else:
+                    pct_mc, contrib = he.coi_resumen_mc(muestras, cats)
+                    # El histograma se pasa ya agrupado: la clave de la caché no depende de n
+                    conteos, bordes = np.histogram(muestras.sum(axis=1), bins=100)
+
+                    def histograma_mc(ax3, conteos, bordes, pct_mc):
+                        ax3.stairs(conteos, bordes, fill=True, color="steelblue")
+                        for etiqueta, estilo in (("P2.5", ":"), ("P50", "--"), ("P97.5", ":")):
+                            v = pct_mc.loc[pct_mc["Estadístico"] == etiqueta, "Costo total"].iloc[0]
+                            ax3.axvline(v, color="black", linestyle=estilo, linewidth=0.8)
+                        ax3.set_xlabel("Costo total anual (US$)")
+                        ax3.set_ylabel("Frecuencia")
+                        ax3.set_title("Distribución del costo total – Monte Carlo")
+                        ax3.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.0f}"))
+
+                    figuras.mostrar(histograma_mc, conteos, bordes, pct_mc, figsize=(6, 4))
+
+                    c1, c2 = st.columns(2)
+                    c1.dataframe(pct_mc.style.format({"Costo total": "{:,.2f}"}), hide_index=True, use_container_width=True)
+                    c2.dataframe(contrib.style.format({"Contribución a la varianza": "{:.1%}"}), hide_index=True, use_container_width=True)
+                    st.caption("Contribución a la varianza = Cov(categoría, total) / Var(total); "
+                               "incluye el efecto de las correlaciones y suma 100 %.")
+                    descarga_csv(pct_mc, "COI_montecarlo")
         else:
             st.info("Introduce valores mayores que cero para graficar.")
 
@@ -181,16 +300,8 @@ elif analisis.startswith("2️⃣"):
         )
         pim_hist.append(val)
 
-    # 3. Calcular tasa media de crecimiento anual PIM
-    growth_rates = []
-    for i in range(1, 5):
-        prev = pim_hist[i-1]
-        curr = pim_hist[i]
-        rate = (curr - prev) / prev if prev > 0 else 0.0
-        growth_rates.append(rate)
-    avg_growth = sum(growth_rates) / len(growth_rates) if growth_rates else 0.0
-    # redondear la tasa a un decimal (en porcentaje)
-    avg_growth = round(avg_growth, 3)
+    # 3. Calcular tasa media de crecimiento anual PIM (redondeada a un decimal en %)
+    avg_growth = he.pim_tasa_crecimiento(pim_hist)
     st.write(f"**Tasa media anual de crecimiento PIM:** {avg_growth:.1%}")
 
 
@@ -205,37 +316,9 @@ elif analisis.startswith("2️⃣"):
         )
         uptake_list.append(pct)
 
-    # 5. Cálculos por año
-    uso_nueva  = [math.ceil(casos_anio * pct/100) for pct in uptake_list]
-    uso_actual = [casos_anio - un for un in uso_nueva]
-    cost_inc   = [delta * un for un in uso_nueva]
-    acumulado  = np.cumsum(cost_inc)
-
-    # 6. Proyección de PIM año a año (iterativa)
-    last_pim = pim_hist[-1]
-    pim_proj = []
-    for i, ci in enumerate(cost_inc):
-        if i == 0:
-            # Año actual: presupuesto histórico + costo incremental año 0
-            pim_i = last_pim + ci
-        else:
-            # Años siguientes: presupuesto del año anterior crece y luego sumas el incremental
-            pim_i = pim_proj[i-1] * (1 + avg_growth) + ci
-        pim_proj.append(pim_i)
-
-    # 7. Construir DataFrame con Impacto en PIM por año
-    df = pd.DataFrame({
-        "Año":                    [f"Año {i+1}" for i in range(int(yrs))],
-        "Casos intervención actual": uso_actual,
-        "Casos intervención nueva":  uso_nueva,
-        "Costo incremental":      cost_inc,
-        "Acumulado Costo Incremental":              acumulado,
-        "PIM proyectado":         pim_proj,
-        "Impacto en PIM":         [
-            ac/pp if pp>0 else np.nan
-            for ac, pp in zip(acumulado, pim_proj)
-        ]
-    })
+    # 5–7. Cálculos por año, proyección de PIM e Impacto en PIM (motor vectorizado)
+    df = bia_proyeccion(casos_anio, delta, uptake_list, pim_hist[-1], avg_growth)
+    acumulado = df["Acumulado Costo Incremental"].to_numpy()
 
        # 7. Mostrar tabla centrada con formatos (manteniendo nombres largos)
     df_disp = df.loc[:, [
@@ -280,35 +363,153 @@ elif analisis.startswith("2️⃣"):
     st.info(f"Impacto relativo final en PIM: {df['Impacto en PIM'].iloc[-1]:.2%}")
 
        # 9. Gráficos de tendencia
-    fig1, ax1 = plt.subplots()
-    ax1.plot(df["Año"], df["Casos intervención actual"], marker="o", label="Casos actual")
-    ax1.plot(df["Año"], df["Casos intervención nueva"], marker="o", linestyle="--", label="Casos nuevos")
+    def tendencia_casos(ax1, df):
+        ax1.plot(df["Año"], df["Casos intervención actual"], marker="o", label="Casos actual")
+        ax1.plot(df["Año"], df["Casos intervención nueva"], marker="o", linestyle="--", label="Casos nuevos")
+        ax1.set_xlabel("Año")
+        ax1.set_ylabel("Número de casos")
+        ax1.set_title("Tendencia de Casos")
+        ax1.legend()
+        ax1.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{int(x):,}"))
+
+    def tendencia_costos(ax2, df):
+        ax2.plot(df["Año"], df["Costo incremental"], marker="o", label="Costo incremental")
+        ax2.plot(df["Año"], df["Acumulado Costo Incremental"],        marker="o", label="Costo acumulado")
+        ax2.set_xlabel("Año")
+        ax2.set_ylabel("Costo (U.M.)")
+        ax2.set_title("Tendencia de Costos")
+        ax2.legend()
+        ax2.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.2f}"))
+
+    figuras.mostrar(tendencia_casos, df[["Año", "Casos intervención actual", "Casos intervención nueva"]])
+    figuras.mostrar(tendencia_costos, df[["Año", "Costo incremental", "Acumulado Costo Incremental"]])
+
+
+    # 10. Descargar resultados
+    descarga_csv(df, "BIA_resultados")
 
-    # aquí no hay comas en estas líneas:
-    ax1.set_xlabel("Año")
-    ax1.set_ylabel("Número de casos")
-    ax1.set_title("Tendencia de Casos")
-    ax1.legend()
+    # Caso base para grillas de escenarios y de sensibilidad
+    bia_base = {"Casos/año": casos_anio, "Δ costo": delta, "Factor introducción": 1.0, "Tasa PIM": avg_growth}
+    bia_rangos = {
+        "Casos/año":           (casos_anio * 0.5, casos_anio * 1.5),
+        "Δ costo":             (delta * 0.5, delta * 1.5),
+        "Factor introducción": (0.5, 1.5),
+        "Tasa PIM":            (avg_growth - 0.05, avg_growth + 0.05),
+    }
+
+    # 11. Envolvente multi‑escenario (grilla de parámetros evaluada en bloque)
+    st.markdown("---")
+    if st.checkbox("Análisis multi‑escenario (envolvente)", key="bia_multi"):
+        st.subheader("Envolvente de escenarios BIA")
+        n_pasos = st.number_input("Valores por parámetro", min_value=2, max_value=50, value=10, step=1)
+        c1, c2 = st.columns(2)
+        if metodo == "Prevalencia (%) y población total":
+            prev_rng = c1.slider(
+                "Rango de prevalencia (%)", 0.0, 100.0,
+                (prevalencia * 0.5, min(prevalencia * 1.5, 100.0)), 0.1
+            )
+            casos_eje = np.floor(pop_total * np.linspace(*prev_rng, n_pasos) / 100.0)
+        else:
+            casos_rng = c1.slider(
+                "Rango de casos anuales", 0, max(2 * int(casos_anio), 1),
+                (int(casos_anio * 0.5), int(casos_anio * 1.5))
+            )
+            casos_eje = np.round(np.linspace(*casos_rng, n_pasos))
+        factor_rng = c2.slider("Factor sobre la curva de introducción", 0.0, 2.0, (0.5, 1.5), 0.05)
+        delta_min = c1.number_input("Δ costo mínimo (U.M.)", value=float(delta) * 0.8, step=1.0)
+        delta_max = c2.number_input("Δ costo máximo (U.M.)", value=float(delta) * 1.2, step=1.0)
+        tasa_rng = c1.slider(
+            "Rango de tasa de crecimiento PIM", -0.5, 1.0,
+            (max(avg_growth - 0.02, -0.5), min(avg_growth + 0.02, 1.0)), 0.005
+        )
 
-    ax1.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{int(x):,}"))
-    st.pyplot(fig1)
+        esc, cubo = bia_evaluar_grilla(
+            {
+                "Casos/año":           casos_eje,
+                "Δ costo":             np.linspace(delta_min, delta_max, n_pasos),
+                "Factor introducción": np.linspace(*factor_rng, n_pasos),
+                "Tasa PIM":            np.linspace(*tasa_rng, n_pasos),
+            },
+            bia_base, uptake_list, pim_hist[-1]
+        )
+        st.write(f"**Escenarios evaluados:** {len(esc):,d}")
 
-    fig2, ax2 = plt.subplots()
-    ax2.plot(df["Año"], df["Costo incremental"], marker="o", label="Costo incremental")
-    ax2.plot(df["Año"], df["Acumulado Costo Incremental"],        marker="o", label="Costo acumulado")
+        resumen = he.bia_resumen(cubo)
+        st.dataframe(
+            resumen.style.format({"Acumulado Costo Incremental": "{:,.2f}", "Impacto en PIM": "{:.2%}"}),
+            use_container_width=True
+        )
 
-    # y aquí tampoco:
-    ax2.set_xlabel("Año")
-    ax2.set_ylabel("Costo (U.M.)")
-    ax2.set_title("Tendencia de Costos")
-    ax2.legend()
+        # Abanico del costo acumulado por año
+        acum = cubo[:, :, he.BIA_METRICAS.index("Acumulado Costo Incremental")]
+        pcts = np.nanpercentile(acum, [5, 25, 50, 75, 95], axis=0)
+
+        def abanico_bia(ax3, anios, pcts, base):
+            p5, p25, p50, p75, p95 = pcts
+            ax3.fill_between(anios, p5, p95, alpha=0.2, label="P5–P95")
+            ax3.fill_between(anios, p25, p75, alpha=0.4, label="P25–P75")
+            ax3.plot(anios, p50, marker="o", label="Mediana")
+            ax3.plot(anios, base, linestyle="--", color="black", label="Caso base")
+            ax3.set_xlabel("Año")
+            ax3.set_ylabel("Costo acumulado (U.M.)")
+            ax3.set_title("Envolvente del costo incremental acumulado")
+            ax3.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.0f}"))
+            ax3.legend()
+
+        figuras.mostrar(abanico_bia, df["Año"].to_numpy(), pcts, df["Acumulado Costo Incremental"].to_numpy())
+
+        # Distribución del impacto final en PIM
+        impacto_final = cubo[:, -1, he.BIA_METRICAS.index("Impacto en PIM")]
+        conteos, bordes = np.histogram(impacto_final[np.isfinite(impacto_final)], bins=50)
+
+        def histograma_pim(ax4, conteos, bordes, anio):
+            ax4.stairs(conteos, bordes, fill=True)
+            ax4.set_xlabel(f"Impacto en PIM – Año {anio}")
+            ax4.set_ylabel("Número de escenarios")
+            ax4.set_title("Distribución del impacto final en PIM")
+            ax4.xaxis.set_major_formatter(mticker.PercentFormatter(1.0))
+
+        figuras.mostrar(histograma_pim, conteos, bordes, int(yrs))
+
+        esc["Acumulado final"] = acum[:, -1]
+        esc["Impacto en PIM final"] = impacto_final
+        descarga_csv(esc, "BIA_escenarios")
+
+    # 12. Sensibilidad bidireccional del costo acumulado / impacto en PIM
+    if st.checkbox("Sensibilidad determinística bidireccional (heatmap)", key="bia_dsa"):
+        st.subheader("Sensibilidad bidireccional – BIA")
+        c1, c2 = st.columns(2)
+        px = c1.selectbox("Parámetro eje X", he.BIA_PARAMETROS, index=0, key="bia_dsa_x")
+        py = c2.selectbox("Parámetro eje Y", [p for p in he.BIA_PARAMETROS if p != px], index=0, key="bia_dsa_y")
+        rx = (c1.number_input(f"{px} mínimo", value=float(bia_rangos[px][0]), key="bia_dsa_x0"),
+              c1.number_input(f"{px} máximo", value=float(bia_rangos[px][1]), key="bia_dsa_x1"))
+        ry = (c2.number_input(f"{py} mínimo", value=float(bia_rangos[py][0]), key="bia_dsa_y0"),
+              c2.number_input(f"{py} máximo", value=float(bia_rangos[py][1]), key="bia_dsa_y1"))
+        res_dsa = st.slider("Resolución de la grilla (puntos por eje)", 20, 500, 200, 10, key="bia_dsa_res")
+        metrica = st.radio("Resultado", ("Acumulado Costo Incremental", "Impacto en PIM"), horizontal=True, key="bia_dsa_m")
+        umbral  = st.number_input(
+            "Umbral (línea de contorno)",
+            value=float(np.nan_to_num(df[metrica].iloc[-1])),
+            key="bia_dsa_u"
+        )
 
-    ax2.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.2f}"))
-    st.pyplot(fig2)
+        gx, gy = np.linspace(*rx, res_dsa), np.linspace(*ry, res_dsa)
+        _, cubo_dsa = bia_evaluar_grilla({px: gx, py: gy}, bia_base, uptake_list, pim_hist[-1])
+        z = cubo_dsa[:, -1, he.BIA_METRICAS.index(metrica)].reshape(res_dsa, res_dsa)
 
+        def heatmap_bia(ax5, gx, gy, z, umbral, base, px, py, metrica, anio):
+            malla = ax5.pcolormesh(gx, gy, z.T, shading="auto", cmap="viridis")
+            ax5.figure.colorbar(malla, ax=ax5, label=metrica)
+            if np.nanmin(z) < umbral < np.nanmax(z):
+                ax5.contour(gx, gy, z.T, levels=[umbral], colors="white", linewidths=1.2)
+            ax5.plot(*base, marker="*", color="red", markersize=12, label="Caso base")
+            ax5.set_xlabel(px)
+            ax5.set_ylabel(py)
+            ax5.set_title(f"{metrica} – Año {anio}")
+            ax5.legend(loc="upper right")
 
-    # 10. Descargar resultados
-    descarga_csv(df, "BIA_resultados")
+        figuras.mostrar(heatmap_bia, gx, gy, z, umbral, (bia_base[px], bia_base[py]), px, py, metrica, int(yrs))
+        st.caption("La línea blanca marca las combinaciones de parámetros que igualan el umbral.")
 
 
 
@@ -317,17 +518,16 @@ elif analisis.startswith("3️⃣"):
     st.header("3️⃣ Retorno sobre la Inversión (ROI)")
     inv=st.number_input("Costo de inversión (US$)",50000.0)
     ben=st.number_input("Beneficio monetario (US$)",70000.0)
-    roi = ((ben-inv)/inv*100) if inv else np.nan
+    roi = he.roi(inv, ben)
     st.success(f"ROI: {roi:,.2f}%")
-    fig,ax=plt.subplots(); ax.bar(['Inversión','Beneficio'],[inv,ben]); st.pyplot(fig)
+    figuras.mostrar(lambda ax, inv, ben: ax.bar(['Inversión','Beneficio'],[inv,ben]), inv, ben)
 
 # 4) CC – Comparación de Costos
 elif analisis.startswith("4️⃣"):
     st.header("4️⃣ Comparación de Costos (CC)")
     df=st.data_editor(pd.DataFrame({'Alternativa':['A','B'],'Costo':[1000.0,1200.0]}),num_rows='dynamic',key='cc')
     if not df.empty:
-        base=df['Costo'].iloc[0]
-        df['Δ vs Base']=df['Costo']-base
+        df=he.cc_comparacion(df)
         st.dataframe(df,hide_index=True)
         descarga_csv(df,'CC')
 
@@ -336,7 +536,7 @@ elif analisis.startswith("5️⃣"):
     st.header("5️⃣ Minimización de Costos (CMA)")
     df=st.data_editor(pd.DataFrame({'Alt':['A','B'],'Costo':[1000.0,1200.0]}),num_rows='dynamic',key='cma')
     if not df.empty:
-        m=df.loc[df['Costo'].idxmin()]
+        m=he.cma_minimo(df)
         st.success(f"Opción mínima: {m['Alt']} US$ {m['Costo']:,.2f}")
         descarga_csv(df,'CMA')
 
@@ -355,10 +555,7 @@ elif analisis.startswith("6️⃣"):
     vlist = [v.strip() for v in vars_txt.split(",") if v.strip()]
 
     # 2. Inicializar DataFrame con n_alt filas y columnas para cada variable
-    data = {"Alternativa": [f"A{i+1}" for i in range(n_alt)]}
-    for v in vlist:
-        data[v] = [0.0] * n_alt
-    df_cca = pd.DataFrame(data)
+    df_cca = he.cca_tabla(n_alt, vlist)
 
     # 3. Editor interactivo
     df_cca = st.data_editor(
@@ -379,20 +576,391 @@ elif analisis.startswith("6️⃣"):
 else:
     # Definir tabla de tratamientos
     st.header(f"{analisis}")
-    tx0=pd.DataFrame({'Tratamiento':['A','B','C'],'Costo total':[0,10000,22000],'Efectividad':[0,0.4,0.55]})
-    tx=st.data_editor(tx0,num_rows='dynamic',key='tx')
+    if analisis.startswith("7️⃣"):
+        fuentes = ("Tabla manual", "Microsimulación (pacientes)", "Datos por paciente (ensayo)")
+    elif analisis.startswith("8️⃣"):
+        fuentes = ("Tabla manual", "Modelo de Markov (cohorte)", "Microsimulación (pacientes)", "Datos por paciente (ensayo)")
+    else:
+        fuentes = ("Tabla manual", "Datos por paciente (ensayo)")
+    fuente = st.radio("Origen de costos y efectos", fuentes, horizontal=True)
+    nube = None  # medias bootstrap (costos, efectos) para el plano CE
+
+    if fuente == "Tabla manual":
+        tx0=pd.DataFrame({'Tratamiento':['A','B','C'],'Costo total':[0,10000,22000],'Efectividad':[0,0.4,0.55]})
+        tx=st.data_editor(tx0,num_rows='dynamic',key='tx')
+    elif fuente == "Datos por paciente (ensayo)":
+        # Datos individuales de un ensayo: medias por brazo + bootstrap no paramétrico
+        st.subheader("Datos por paciente – bootstrap no paramétrico")
+        archivo = st.file_uploader("Archivo con una fila por paciente (CSV o Excel)", type=["csv", "xlsx"], key="boot_archivo")
+        if archivo is None:
+            st.info("Suba un archivo con columnas de brazo/tratamiento, costo y efecto por paciente.")
+            st.stop()
+        try:
+            datos = pd.read_csv(archivo) if archivo.name.endswith(".csv") else pd.read_excel(archivo)
+        except Exception as e:
+            st.error(f"No se pudo leer el archivo: {e}")
+            st.stop()
+        if datos.empty:
+            st.error("El archivo no tiene filas de pacientes.")
+            st.stop()
+        c1, c2, c3 = st.columns(3)
+        col_brazo  = c1.selectbox("Columna de brazo / tratamiento", datos.columns, key="boot_brazo")
+        num_cols   = datos.select_dtypes(include=np.number).columns.tolist()
+        if not num_cols:
+            st.error("El archivo no tiene columnas numéricas de costo o efecto.")
+            st.stop()
+        col_costo  = c2.selectbox("Columna de costo", num_cols, key="boot_costo")
+        col_efecto = c3.selectbox("Columna de efecto", num_cols, index=min(1, len(num_cols) - 1), key="boot_efecto")
+
+        brazos, costos_pac, efectos_pac = he_bootstrap.datos_por_brazo(datos, col_brazo, col_costo, col_efecto)
+        tx = he_bootstrap.medias_por_brazo(brazos, costos_pac, efectos_pac)
+        st.markdown("**Medias por brazo**")
+        st.dataframe(tx, hide_index=True, use_container_width=True)
+        if len(tx) >= 2:
+            c1, c2, c3, c4 = st.columns(4)
+            n_boot   = c1.select_slider("Remuestras bootstrap", [1_000, 10_000, 50_000, 100_000], value=10_000)
+            sem_boot = c2.number_input("Semilla", min_value=0, value=12345, step=1, key="boot_semilla")
+            comp     = c3.selectbox("Comparador", brazos, key="boot_comp")
+            interv   = c4.selectbox("Intervención", brazos, index=1 if brazos[0] == comp else 0, key="boot_interv")
+            wtp_boot = c1.number_input("Umbral λ para el INB", min_value=0.0, value=50000.0, step=1000.0, key="boot_wtp")
+
+            nube = bootstrap_brazos(costos_pac, efectos_pac, int(n_boot), int(sem_boot))
+            nivel_boot = 0.95
+            ic = he_bootstrap.intervalos_incrementales(*nube, tx["Costo total"].to_numpy(), tx["Efectividad"].to_numpy(),
+                                                       brazos.index(comp), brazos.index(interv), wtp_boot, nivel_boot)
+            st.markdown(f"**{interv} frente a {comp} – intervalos percentiles bootstrap ({int(n_boot):,d} remuestras)**")
+            st.dataframe(ic, hide_index=True, use_container_width=True)
+            if np.isnan(ic.set_index("Medida").at["ICER", f"IC {nivel_boot:.0%} inf."]):
+                st.caption("Las remuestras de ΔEfecto cambian de signo: el intervalo del ICER no es interpretable; use el INB.")
+            descarga_csv(ic, "Bootstrap_ICER")
+        tx = tx[["Tratamiento", "Costo total", "Efectividad"]]
+    else:
+        # Modelo de estados (cohorte o microsimulación): sus totales reemplazan la tabla manual
+        micro = fuente.startswith("Microsimulación")
+        st.subheader("Microsimulación de pacientes individuales" if micro else "Modelo de Markov de cohorte")
+        c1, c2, c3 = st.columns(3)
+        estados     = [e.strip() for e in c1.text_input("Estados (sep. por comas)", "Sano, Enfermo, Muerto").split(",") if e.strip()]
+        estrategias = [e.strip() for e in c2.text_input("Estrategias (sep. por comas)", "Estándar, Nueva").split(",") if e.strip()]
+        ciclos      = c3.number_input("Número de ciclos", min_value=1, max_value=5000, value=40, step=1)
+        ciclos_anio = c1.number_input("Ciclos por año", min_value=1, max_value=52, value=1, step=1)
+        desc_c      = c2.number_input("Descuento costos (%)", min_value=0.0, max_value=20.0, value=3.0, step=0.5) / 100
+        desc_e      = c3.number_input("Descuento QALYs (%)", min_value=0.0, max_value=20.0, value=3.0, step=0.5) / 100
+        medio_ciclo = False if micro else st.checkbox("Corrección de medio ciclo", value=True)
+
+        if len(estados) < 2 or not estrategias:
+            st.info("Defina al menos 2 estados y 1 estrategia.")
+            st.stop()
+
+        n_est = len(estados)
+        st.markdown("**Distribución inicial y utilidades por estado** (último estado = absorbente)")
+        est_df = st.data_editor(
+            pd.DataFrame({
+                "Estado":            estados,
+                "Cohorte inicial":   [1.0] + [0.0] * (n_est - 1),
+                "Utilidad (anual)":  list(np.linspace(1.0, 0.5, n_est - 1)) + [0.0],
+            }),
+            hide_index=True, disabled=["Estado"], key="mk_estados"
+        )
+
+        P_list, costos_list, entrada_list = [], [], []
+        for j, (tab, nom) in enumerate(zip(st.tabs(estrategias), estrategias)):
+            with tab:
+                st.markdown("Matriz de transición por ciclo (fila = estado de origen)")
+                P_df = st.data_editor(
+                    pd.DataFrame(he_markov.matriz_por_defecto(n_est, progresion=max(0.10 - 0.03 * j, 0.01)),
+                                 index=estados, columns=estados),
+                    key=f"mk_P_{j}"
+                )
+                c0 = pd.DataFrame({
+                    "Estado":           estados,
+                    "Costo por ciclo":  [1000.0 * (i + 1) + 500.0 * j for i in range(n_est - 1)] + [0.0],
+                })
+                if micro:
+                    c0["Costo al ingresar"] = 0.0
+                c_df = st.data_editor(c0, hide_index=True, disabled=["Estado"], key=f"mk_c_{j}")
+                P_list.append(P_df.to_numpy(dtype=float))
+                costos_list.append(c_df["Costo por ciclo"].to_numpy(dtype=float))
+                entrada_list.append(c_df["Costo al ingresar"].to_numpy(dtype=float) if micro else np.zeros(n_est))
+
+        if micro:
+            c1, c2, c3, c4 = st.columns(4)
+            n_pac    = c1.select_slider("Pacientes", [10_000, 100_000, 1_000_000], value=100_000)
+            inc_tis  = c2.number_input("Aumento del riesgo de salida por ciclo en el estado (%)", value=0.0, step=1.0) / 100
+            sem_ms   = c3.number_input("Semilla", min_value=0, value=12345, step=1, key="ms_semilla")
+            procesos = c4.number_input("Procesos", min_value=1, max_value=os.cpu_count() or 1, value=os.cpu_count() or 1, step=1)
+            try:
+                P_tis = he_microsim.transiciones_tiempo_en_estado(np.stack(P_list), int(ciclos) if inc_tis else 1, inc_tis)
+            except ValueError as e:
+                st.error(f"Microsimulación no válida: {e}")
+                st.stop()
+            args_ms = (
+                estrategias, est_df["Cohorte inicial"].to_numpy(dtype=float), P_tis,
+                np.stack(costos_list), est_df["Utilidad (anual)"].to_numpy(dtype=float), int(ciclos), int(n_pac),
+            )
+            kw_ms = dict(costos_entrada=np.stack(entrada_list), desc_costos=desc_c, desc_efectos=desc_e,
+                         ciclos_por_anio=int(ciclos_anio), semilla=int(sem_ms))
+            # Resultados guardados por contenido de entradas; el número de procesos no cambia el resultado
+            clave = hash(pickle.dumps((args_ms, kw_ms)))
+            if st.button("▶️ Ejecutar microsimulación"):
+                barra = st.progress(0.0, text="Simulando pacientes…")
+                try:
+                    res = he_microsim.microsim(
+                        *args_ms, **kw_ms, n_procesos=int(procesos),
+                        progreso=lambda f: barra.progress(f, text=f"Simulando pacientes… {f:.0%}")
+                    )
+                except ValueError as e:
+                    st.error(f"Microsimulación no válida: {e}")
+                    st.stop()
+                st.session_state["microsim"] = (clave, res)
+            guardado = st.session_state.get("microsim")
+            if guardado is None or guardado[0] != clave:
+                st.info("Pulse «Ejecutar microsimulación» para calcular con los parámetros actuales.")
+                st.stop()
+            res = guardado[1]
+            st.markdown("**Medias por paciente con error estándar Monte Carlo** (descontadas)")
+            st.dataframe(res, hide_index=True, use_container_width=True)
+            tx = res[["Tratamiento", "Costo total", "Efectividad"]]
+        else:
+            try:
+                tx, traza = markov_cohorte(
+                    estrategias, est_df["Cohorte inicial"].to_numpy(dtype=float), np.stack(P_list),
+                    np.stack(costos_list), est_df["Utilidad (anual)"].to_numpy(dtype=float), int(ciclos),
+                    desc_c, desc_e, int(ciclos_anio), medio_ciclo
+                )
+            except ValueError as e:
+                st.error(f"Modelo de Markov no válido: {e}")
+                st.stop()
+
+            # Traza de la cohorte
+            ver = st.selectbox("Traza de la cohorte – estrategia", estrategias)
+
+            def traza_markov(ax_t, traza, estados, ver):
+                ax_t.stackplot(np.arange(traza.shape[0]), traza.T, labels=estados)
+                ax_t.set_xlabel("Ciclo")
+                ax_t.set_ylabel("Proporción de la cohorte")
+                ax_t.set_title(f"Traza de Markov – {ver}")
+                ax_t.legend(loc="upper right")
+
+            figuras.mostrar(traza_markov, traza[estrategias.index(ver)], estados, ver)
+
+            st.markdown("**Totales descontados por estrategia** (Efectividad = QALYs)")
+            st.dataframe(tx, hide_index=True, use_container_width=True)
+
     if tx.shape[0]>=2:
-        df=tx.copy().reset_index(drop=True)
-        df=df.sort_values('Costo total').reset_index(drop=True)
-        df['ΔCosto']=df['Costo total'].diff()
-        df['ΔEfect']=df['Efectividad'].diff()
-        df['ICER']=df.apply(lambda r: r['ΔCosto']/r['ΔEfect'] if r['ΔEfect']>0 else np.nan,axis=1)
+        df=cea_incremental(tx)
         st.subheader("Tabla incremental")
         st.dataframe(df,hide_index=True,use_container_width=True)
-        # Gráfico CE plane
-        fig,ax=plt.subplots(); ax.scatter(df['Efectividad'],df['Costo total']);
-        for i,r in df.iterrows(): ax.annotate(r['Tratamiento'],(r['Efectividad'],r['Costo total']))
-        st.pyplot(fig)
+        st.caption("ICER calculado solo entre estrategias de la frontera eficiente; "
+                   "las dominadas (estricta o extendidamente) no tienen ICER.")
+        # Gráfico CE plane con frontera eficiente
+        def plano_ce(ax, df, nube, brazos):
+            if nube is not None:
+                # Nube bootstrap de medias por brazo
+                for j, nom in enumerate(brazos):
+                    ax.scatter(nube[1][:, j], nube[0][:, j], s=2, alpha=0.15, label=f"Bootstrap {nom}")
+            fr=df[df['Estado']==he.FRONTERA]
+            for estado,marca in [(he.FRONTERA,'o'),(he.DOMINANCIA_EXTENDIDA,'s'),(he.DOMINADO,'x')]:
+                sub=df[df['Estado']==estado]
+                if not sub.empty: ax.scatter(sub['Efectividad'],sub['Costo total'],marker=marca,label=estado)
+            ax.plot(fr['Efectividad'],fr['Costo total'],color='black',linewidth=0.8)
+            if len(df)<=30:
+                for nom,x,y in zip(df['Tratamiento'],df['Efectividad'],df['Costo total']): ax.annotate(nom,(x,y))
+            ax.set_xlabel('Efectividad'); ax.set_ylabel('Costo total'); ax.legend()
+
+        # Submuestra de la nube bootstrap para graficar
+        figuras.mostrar(plano_ce, df, None if nube is None else (nube[0][:2000], nube[1][:2000]), tx['Tratamiento'].tolist())
         descarga_csv(df,'CEA_CUA')
+
+        # Sensibilidad determinística bidireccional / multi‑vía (NMB e ICER)
+        st.markdown("---")
+        if st.checkbox("Sensibilidad determinística (bidireccional / multi‑vía)", key="cea_dsa"):
+            st.subheader("Sensibilidad determinística – CEA")
+            nombres_tx = tx['Tratamiento'].astype(str).tolist()
+            costos_tx  = tx['Costo total'].to_numpy(dtype=float)
+            efectos_tx = tx['Efectividad'].to_numpy(dtype=float)
+            wtp_base = st.number_input("WTP del caso base (U.M./unidad de efecto)", min_value=0.0, value=50000.0, step=1000.0, key="dsa_wtp")
+            opciones = ["WTP"] + [f"Costo {n}" for n in nombres_tx] + [f"Efect. {n}" for n in nombres_tx]
+            valores_base = dict(zip(opciones, [wtp_base, *costos_tx, *efectos_tx]))
+            params_dsa = st.multiselect(
+                "Parámetros a variar (2 = heatmap; 3 o más = grilla multi‑vía)", opciones,
+                default=["WTP", f"Costo {nombres_tx[-1]}"], key="dsa_params"
+            )
+            if len(params_dsa) < 2:
+                st.info("Elija al menos 2 parámetros.")
+            else:
+                puntos = 200 if len(params_dsa) == 2 else 10
+                rangos = st.data_editor(
+                    pd.DataFrame({
+                        "Parámetro": params_dsa,
+                        "Mínimo":    [0.0 if p == "WTP" else 0.5 * valores_base[p] for p in params_dsa],
+                        "Máximo":    [2.0 * valores_base[p] if p == "WTP" else 1.5 * valores_base[p] for p in params_dsa],
+                        "Puntos":    [puntos] * len(params_dsa),
+                    }),
+                    hide_index=True, disabled=["Parámetro"], key="dsa_rangos"
+                )
+                ejes = {
+                    r["Parámetro"]: np.linspace(r["Mínimo"], r["Máximo"], max(int(r["Puntos"]), 2))
+                    for _, r in rangos.iterrows()
+                }
+                nmb, pref = cea_nmb_grilla(nombres_tx, costos_tx, efectos_tx, ejes, wtp_base)
+
+                if len(ejes) == 2:
+                    (px, gx), (py, gy) = ejes.items()
+                    salida = st.radio("Resultado", ("Estrategia preferida (NMB)", "ICER de un par", "NMB incremental de un par"), horizontal=True, key="dsa_salida")
+                    z, umbral, etiqueta = pref, None, None
+                    if salida != "Estrategia preferida (NMB)":
+                        c1, c2 = st.columns(2)
+                        i_cmp = nombres_tx.index(c1.selectbox("Comparador", nombres_tx, index=0, key="dsa_i"))
+                        j_int = nombres_tx.index(c2.selectbox("Intervención", nombres_tx, index=len(nombres_tx) - 1, key="dsa_j"))
+                        if salida == "ICER de un par":
+                            z = cea_icer_grilla(nombres_tx, costos_tx, efectos_tx, ejes, i_cmp, j_int)
+                            umbral, etiqueta = wtp_base, "ICER"
+                        else:
+                            z = nmb[j_int] - nmb[i_cmp]
+                            umbral, etiqueta = 0.0, "ΔNMB"
+
+                    def heatmap_cea(ax6, gx, gy, z, umbral, etiqueta, nombres_tx, base, px, py):
+                        if etiqueta is None:
+                            # Estrategia preferida: mapa categórico con fronteras de cambio
+                            cmap = plt.get_cmap("tab10", len(nombres_tx))
+                            ax6.pcolormesh(gx, gy, z.T, shading="auto", cmap=cmap, vmin=-0.5, vmax=len(nombres_tx) - 0.5)
+                            ax6.contour(gx, gy, z.T, levels=np.arange(len(nombres_tx) - 1) + 0.5, colors="black", linewidths=1.0)
+                            handles = [plt.Rectangle((0, 0), 1, 1, color=cmap(j)) for j in range(len(nombres_tx))]
+                            ax6.legend(handles, nombres_tx, title="Preferida", loc="upper right")
+                        else:
+                            malla = ax6.pcolormesh(gx, gy, z.T, shading="auto", cmap="RdYlGn_r" if etiqueta == "ICER" else "RdYlGn")
+                            ax6.figure.colorbar(malla, ax=ax6, label=etiqueta)
+                            if np.nanmin(z) < umbral < np.nanmax(z):
+                                ax6.contour(gx, gy, z.T, levels=[umbral], colors="black", linewidths=1.2)
+                        ax6.plot(*base, marker="*", color="red", markersize=12)
+                        ax6.set_xlabel(px)
+                        ax6.set_ylabel(py)
+                        ax6.set_title("Sensibilidad bidireccional – CEA")
+
+                    figuras.mostrar(heatmap_cea, gx, gy, z, umbral, etiqueta, nombres_tx,
+                                    (valores_base[px], valores_base[py]), px, py)
+                    st.caption("Las líneas negras son umbrales: cambio de estrategia preferida, ICER = WTP del caso base o ΔNMB = 0.")
+                else:
+                    st.write(f"**Puntos evaluados:** {pref.size:,d}")
+                    prop = np.bincount(pref.ravel(), minlength=len(nombres_tx)) / pref.size
+                    st.dataframe(
+                        pd.DataFrame({"Tratamiento": nombres_tx, "% de la grilla donde es preferida": prop})
+                          .style.format({"% de la grilla donde es preferida": "{:.1%}"}),
+                        hide_index=True, use_container_width=True
+                    )
+                    if pref.size <= 1_000_000:
+                        mallas = np.meshgrid(*ejes.values(), indexing="ij")
+                        grilla = pd.DataFrame({k: m.ravel() for k, m in zip(ejes, mallas)})
+                        grilla["Preferida"] = np.asarray(nombres_tx, dtype=object)[pref.ravel()]
+                        descarga_csv(grilla, "CEA_grilla_multivia")
+
+        # PSA – Análisis de sensibilidad probabilístico
+        st.markdown("---")
+        if st.checkbox("Modo probabilístico (PSA)", key="psa_on"):
+            st.subheader("Análisis de sensibilidad probabilístico (PSA)")
+            costo_tx  = tx['Costo total'].astype(float)
+            efecto_tx = tx['Efectividad'].astype(float)
+            psa0 = pd.DataFrame({
+                'Tratamiento':  tx['Tratamiento'].astype(str),
+                'Costo total':  costo_tx,
+                'EE Costo':     0.2 * costo_tx,
+                'Dist. costo':  'gamma',
+                'Efectividad':  efecto_tx,
+                'EE Efect.':    0.1 * efecto_tx,
+                'Dist. efect.': 'beta' if efecto_tx.between(0, 1).all() else 'gamma',
+            })
+            dist_col = st.column_config.SelectboxColumn(options=list(he_psa.DISTRIBUCIONES), required=True)
+            psa_params = st.data_editor(
+                psa0, hide_index=True, key='psa_params',
+                disabled=['Tratamiento', 'Costo total', 'Efectividad'],
+                column_config={'Dist. costo': dist_col, 'Dist. efect.': dist_col}
+            )
+            c1, c2, c3 = st.columns(3)
+            n_sim   = c1.select_slider("Simulaciones", [10_000, 100_000, 1_000_000], value=100_000)
+            semilla = c2.number_input("Semilla", min_value=0, value=12345, step=1)
+            wtp_max = c3.number_input("WTP máximo (U.M./unidad de efecto)", min_value=1.0, value=100000.0, step=1000.0)
+            wtp = np.linspace(0, wtp_max, 101)
+
+            try:
+                costos, efectos = psa_muestras(psa_params, int(n_sim), int(semilla))
+            except ValueError as e:
+                st.error(f"Parámetros PSA no válidos: {e}")
+            else:
+                prob    = psa_ceac(costos, efectos, wtp)
+                nombres = psa_params['Tratamiento'].tolist()
+
+                # Plano costo‑efectividad (submuestra para graficar)
+                m = min(int(n_sim), 5000)
+
+                def plano_psa(ax3, efectos, costos, nombres, n_sim):
+                    for j, nom in enumerate(nombres):
+                        ax3.scatter(efectos[:, j], costos[:, j], s=4, alpha=0.3, label=nom)
+                    ax3.set_xlabel("Efectividad")
+                    ax3.set_ylabel("Costo total (U.M.)")
+                    ax3.set_title(f"Plano costo‑efectividad – PSA ({len(costos):,d} de {n_sim:,d} simulaciones)")
+                    ax3.legend(markerscale=3)
+
+                figuras.mostrar(plano_psa, efectos[:m], costos[:m], nombres, int(n_sim))
+
+                # Curva de aceptabilidad (CEAC)
+                def curva_ceac(ax4, wtp, prob, nombres):
+                    for j, nom in enumerate(nombres):
+                        ax4.plot(wtp, prob[:, j], label=nom)
+                    ax4.set_xlabel("Disposición a pagar (U.M./unidad de efecto)")
+                    ax4.set_ylabel("Probabilidad de ser costo‑efectivo")
+                    ax4.set_ylim(0, 1)
+                    ax4.set_title("Curva de aceptabilidad de costo‑efectividad (CEAC)")
+                    ax4.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.0f}"))
+                    ax4.legend()
+
+                figuras.mostrar(curva_ceac, wtp, prob, nombres)
+
+                st.subheader("Probabilidad de ser costo‑efectivo")
+                tabla = he_psa.tabla_prob_ce(nombres, wtp, prob, np.linspace(0, wtp_max, 6))
+                st.dataframe(
+                    tabla.style.format({"WTP": "{:,.0f}", **{nom: "{:.1%}" for nom in nombres}}),
+                    hide_index=True, use_container_width=True
+                )
+                descarga_csv(he_psa.tabla_prob_ce(nombres, wtp, prob, wtp), 'PSA_CEAC')
+
+                # Valor de la información sobre muestras PSA guardadas en disco (memmap)
+                st.markdown("---")
+                if st.checkbox("Valor de la información (EVPI / EVPPI)", key="voi_on"):
+                    st.subheader("Valor de la información")
+                    c1, c2 = st.columns(2)
+                    n_voi   = c1.select_slider("Simulaciones en disco", [100_000, 1_000_000, 10_000_000], value=1_000_000)
+                    dir_voi = c2.text_input("Carpeta del almacén PSA (.npy)", os.path.join(tempfile.gettempdir(), "psa_muestras"))
+                    clave_voi = hash(pickle.dumps((psa_params, int(n_voi), int(semilla), dir_voi)))
+                    if st.button("💾 Generar muestras PSA en disco"):
+                        with st.spinner("Escribiendo muestras por bloques…"):
+                            he_voi.generar_psa_en_disco(psa_params, int(n_voi), dir_voi, int(semilla))
+                        st.session_state["psa_disco"] = clave_voi
+                    if st.session_state.get("psa_disco") != clave_voi:
+                        st.info("Genere las muestras en disco para calcular EVPI y EVPPI con los parámetros actuales.")
+                    else:
+                        almacen  = he_voi.abrir_psa(dir_voi)
+                        grupo    = st.multiselect("Grupo de parámetros para EVPPI", almacen["parametros"])
+                        poblacion = st.number_input("Población beneficiada (EVPI poblacional)", min_value=1, value=1, step=1)
+                        ev = voi_evpi(dir_voi, clave_voi, wtp) * poblacion
+                        voi_tabla = pd.DataFrame({"WTP": wtp, "EVPI": ev})
+                        if grupo:
+                            cols = tuple(almacen["parametros"].index(g) for g in grupo)
+                            voi_tabla["EVPPI"] = voi_evppi(dir_voi, clave_voi, cols, wtp) * poblacion
+
+                        def curva_voi(ax5, voi_tabla, grupo, n):
+                            ax5.plot(voi_tabla["WTP"], voi_tabla["EVPI"], label="EVPI")
+                            if "EVPPI" in voi_tabla:
+                                ax5.plot(voi_tabla["WTP"], voi_tabla["EVPPI"], linestyle="--", label=f"EVPPI ({', '.join(grupo)})")
+                            ax5.set_xlabel("Disposición a pagar (U.M./unidad de efecto)")
+                            ax5.set_ylabel("Valor esperado de la información (U.M.)")
+                            ax5.set_title(f"EVPI / EVPPI – {n:,d} simulaciones")
+                            ax5.xaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.0f}"))
+                            ax5.yaxis.set_major_formatter(mticker.FuncFormatter(lambda x, _: f"{x:,.0f}"))
+                            ax5.legend()
+
+                        figuras.mostrar(curva_voi, voi_tabla, grupo, almacen["n"])
+                        st.caption("EVPPI estimado por regresión no paramétrica (base polinómica de grado 2) "
+                                   "sobre el grupo de parámetros; las muestras se leen por bloques desde disco.")
+                        descarga_csv(voi_tabla, "PSA_VOI")
     else:
         st.info("Agregue al menos 2 tratamientos.")
@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+import scipy.stats as stats
+from scipy.optimize import minimize
+
+from distfit import FAST_FITS, compress_sample
+
+RNG = np.random.default_rng(20240601)
+MUESTRAS = {
+    "norm": RNG.normal(10.0, 2.0, 5_000),
+    "expon": 1.5 + RNG.exponential(3.0, 5_000),
+    "uniform": RNG.uniform(-2.0, 5.0, 5_000),
+    "gamma": RNG.gamma(2.5, 3.0, 5_000),
+    "lognorm": RNG.lognormal(1.0, 0.6, 5_000),
+    "weibull_min": RNG.weibull(1.7, 5_000) * 4.0,
+}
+
+
+def _rapido(dist_name, x):
+    params, _ = FAST_FITS[dist_name](*compress_sample(x))
+    return np.array(params, dtype=float)
+
+
+@pytest.mark.parametrize("dist_name", ["norm", "expon", "uniform"])
+def test_forma_cerrada_igual_a_scipy(dist_name):
+    x = MUESTRAS[dist_name]
+    np.testing.assert_allclose(_rapido(dist_name, x), getattr(stats, dist_name).fit(x), rtol=1e-10)
+
+
+# Localización fija en 0: no reproducen el ajuste de scipy con loc libre (ni su AIC),
+# sino dist.fit(x, floc=0)
+@pytest.mark.parametrize("dist_name", ["gamma", "lognorm", "weibull_min"])
+def test_newton_igual_a_scipy_con_loc_cero(dist_name):
+    x = MUESTRAS[dist_name]
+    params = _rapido(dist_name, x)
+    assert params[1] == 0.0
+    np.testing.assert_allclose(params, getattr(stats, dist_name).fit(x, floc=0), rtol=1e-5, atol=1e-8)
+
+
+def test_poisson_es_la_media():
+    x = RNG.poisson(3.2, 5_000).astype(float)
+    np.testing.assert_allclose(_rapido("poisson", x), [x.mean()])
+
+
+def test_nbinom_minimiza_la_nll():
+    x = RNG.negative_binomial(2.0, 0.3, 5_000).astype(float)
+    r, p = _rapido("nbinom", x)
+    nll = lambda t: -stats.nbinom.logpmf(x, np.exp(t[0]), 1 / (1 + np.exp(-t[1]))).sum()
+    ref = minimize(nll, [np.log(r), np.log(p / (1 - p))], method="Nelder-Mead",
+                   options={"xatol": 1e-10, "fatol": 1e-10}).x
+    np.testing.assert_allclose([r, p], [np.exp(ref[0]), 1 / (1 + np.exp(-ref[1]))], rtol=1e-5)
+    assert nll([np.log(r), np.log(p / (1 - p))]) <= nll(ref) + 1e-8
+
+
+@pytest.mark.parametrize("dist_name", ["norm", "gamma", "weibull_min"])
+def test_frecuencias_equivalen_a_repetir(dist_name):
+    x = np.ceil(MUESTRAS[dist_name] * 10) / 10  # con empates y positiva
+    valores, conteos = compress_sample(x)
+    completo, _ = FAST_FITS[dist_name](x, np.ones_like(x))
+    np.testing.assert_allclose(FAST_FITS[dist_name](valores, conteos)[0], completo, rtol=1e-8)
+
+
+def test_datos_enteros_aic_es_la_densidad_maximizada():
+    from distfit import fit_distribution
+    x = np.round(RNG.normal(50.0, 12.0, 2_000))
+    res = fit_distribution("norm", x)
+    assert res["loglik"] == pytest.approx(stats.norm.logpdf(x, *res["params"]).sum())
+    # la escala de intervalos va aparte; en las discretas coincide con loglik
+    assert "aic_int" in res and res["aic_int"] != res["aic"]
+    pois = fit_distribution("poisson", x)
+    assert pois["aic_int"] == pytest.approx(pois["aic"])
+
+
+def test_edf_sobre_unicos_igual_a_expandir():
+    from distfit import _edf_stats, _edf_stats_pesos
+    valores, conteos = compress_sample(np.round(MUESTRAS["gamma"], 1))
+    u = stats.gamma.cdf(valores, 2.5, scale=3.0)
+    completo = _edf_stats(stats.gamma.cdf(np.repeat(valores, conteos), 2.5, scale=3.0))
+    np.testing.assert_allclose(_edf_stats_pesos(u, conteos), completo, rtol=1e-10)
+
+
+def test_gof_acotado_y_con_datos_enteros():
+    from distfit import MAX_GOF_N, fit_distribution, gof_bootstrap
+    x = np.round(RNG.normal(50.0, 12.0, 3 * MAX_GOF_N))
+    valores, conteos = compress_sample(x)
+    res = fit_distribution("norm", valores, conteos)
+    gof = gof_bootstrap("norm", res["params"], valores, conteos, res["k"], res["fast"], n_boot=99)
+    # continua sobre enteros: χ² con intervalos unitarios, en una muestra de MAX_GOF_N datos
+    assert gof["gof_n"] == MAX_GOF_N and gof["gof_boot"] == 99
+    assert gof["chi2_p"] > 0.01
+
+
+def test_gof_modelos_compuestos():
+    from distfit import MAX_BOOT_GENERICO, fit_distribution, gof_bootstrap
+    rng = np.random.default_rng(7)
+    ceros = rng.random(2000) < 0.3
+    casos = {"zip": np.where(ceros, 0, rng.poisson(4.0, 2000)),
+             "hurdle_gamma": np.where(ceros, 0, np.round(rng.gamma(2.0, 50.0, 2000), 2))}
+    for nombre, x in casos.items():
+        valores, conteos = compress_sample(x.astype(float))
+        res = fit_distribution(nombre, valores, conteos)
+        gof = gof_bootstrap(nombre, res["params"], valores, conteos, res["k"], res["fast"])
+        assert gof["gof_boot"] == MAX_BOOT_GENERICO
+        assert gof.get("chi2_p", gof.get("ks_p")) > 0.01
+    # la parte positiva lognormal no es gamma
+    x = np.where(ceros, 0, np.round(rng.lognormal(3.0, 1.2, 2000), 2))
+    valores, conteos = compress_sample(x)
+    res = fit_distribution("hurdle_gamma", valores, conteos)
+    assert gof_bootstrap("hurdle_gamma", res["params"], valores, conteos, res["k"], res["fast"])["ad_p"] < 0.05
+
+
+def test_cache_refinado_por_parametros_de_partida():
+    from distcache import FitCache
+    from distfit import _fit_tasks
+    cache = FitCache(ruta=None)
+    valores, conteos = compress_sample(np.round(RNG.normal(0.0, 1.0, 500), 3))
+    for inicio in ((0.0, 1.0), (0.5, 2.0)):
+        muestras = {None: (valores, conteos, ["norm"])}
+        list(_fit_tasks(muestras, 60, 1, 0, 12345, cache, {"norm": inicio}))
+    # otra submuestra (otros parámetros de partida) no reutiliza el refinado anterior
+    assert len(cache._memoria) == 2
+
+
+def test_screen_candidates_elige_finalistas():
+    from distfit import fit_distribution, screen_candidates
+    valores, conteos = compress_sample(np.round(RNG.gamma(3.0, 2.0, 4000), 3))
+    res = [fit_distribution(d, valores, conteos) for d in ("gamma", "lognorm", "norm", "uniform")]
+    cotas, finalistas = screen_candidates(res, valores, conteos, 10 ** 6)
+    nombres = [r["distribution"] for r in finalistas]
+    assert nombres[0] == "gamma" and "uniform" not in nombres
+    assert all(cotas[d] < 10 for d in nombres)
+    _, una = screen_candidates(res, valores, conteos, 10 ** 6, max_finalistas=1)
+    assert [r["distribution"] for r in una] == ["gamma"]
+
+
+@pytest.mark.parametrize("nombre", ["triang", "beta"])
+def test_respaldo_generico_sin_expandir_la_muestra(nombre, monkeypatch):
+    import distfit
+    monkeypatch.setattr(distfit, "MAX_EXPANDIDA", 2000)
+    x = np.round(RNG.triangular(0.0, 0.3, 1.0, 20_000) if nombre == "triang" else RNG.beta(2.0, 5.0, 20_000), 3)
+    valores, conteos = compress_sample(x)
+    res = distfit.fit_distribution(nombre, valores, conteos)
+    referencia = getattr(stats, nombre).fit(x)
+    assert res["loglik"] >= distfit.loglik_weighted(nombre, referencia, valores, conteos) - 1e-2
+
+
+def test_cero_aislado_conserva_gamma_lognorm_weibull():
+    from distfit import fit_distribution, get_candidate_distributions
+    x = np.round(RNG.gamma(3.0, 2.0, 2000), 2)
+    x[0] = 0.0
+    valores, conteos = compress_sample(x)
+    cands = get_candidate_distributions(valores, conteos)
+    assert {"gamma", "lognorm", "weibull_min", "hurdle_gamma"} <= set(cands)
+    res = fit_distribution("gamma", valores, conteos)
+    # loc = 0 no admite el cero: respaldo con loc libre (k = 3) y verosimilitud finita
+    assert res["k"] == 3 and res["params"][1] < 0 and np.isfinite(res["aic"])
+    x[:200] = 0.0
+    valores, conteos = compress_sample(x)
+    assert not {"gamma", "lognorm", "weibull_min"} & set(get_candidate_distributions(valores, conteos))
+
+
+def test_resultado_marca_loc_fija_en_cero():
+    from distfit import LOC_CERO, fit_distribution
+    valores, conteos = compress_sample(MUESTRAS["gamma"])
+    for nombre in LOC_CERO:
+        res = fit_distribution(nombre, valores, conteos)
+        assert res["loc_cero"] and res["k"] == 2
+    assert not fit_distribution("norm", valores, conteos)["loc_cero"]
+    # con un cero el respaldo de scipy deja loc libre
+    valores, conteos = compress_sample(np.r_[0.0, MUESTRAS["gamma"]])
+    assert not fit_distribution("gamma", valores, conteos)["loc_cero"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from scipy.optimize import minimize
+
+from distglm import fit_glm, fit_two_part
+
+RNG = np.random.default_rng(11)
+N = 2000
+X = RNG.normal(size=(N, 2))
+Y = np.where(RNG.random(N) < 1 / (1 + np.exp(-(0.3 + 0.8 * X[:, 0]))),
+             RNG.gamma(2.0, np.exp(2.0 + 0.5 * X[:, 1]) / 2.0), 0.0)
+
+
+def test_binomial_logit_es_maxima_verosimilitud():
+    z = (Y > 0).astype(float)
+    res = fit_glm(X, z, "binomial")
+    xd = np.column_stack([np.ones(N), X])
+    opt = minimize(lambda b: np.logaddexp(0, xd @ b).sum() - z @ (xd @ b), np.zeros(3), method="BFGS")
+    np.testing.assert_allclose(res["coef"]["Coeficiente"], opt.x, atol=1e-5)
+    assert res["loglik"] == pytest.approx(-opt.fun) and res["k"] == 3
+
+
+def test_dos_partes_suma_logit_y_parte_positiva():
+    res = fit_two_part(X, Y, "gamma", "log")
+    logit_, positiva = res["parts"]
+    assert positiva["n"] == (Y > 0).sum() and positiva["family"] == "gamma"
+    assert res["loglik"] == pytest.approx(logit_["loglik"] + positiva["loglik"])
+    assert res["aic"] == pytest.approx(2 * (logit_["k"] + positiva["k"]) - 2 * res["loglik"])
+    # con ceros estructurales el modelo de dos partes supera a un GLM gaussiano sobre Y
+    assert res["aic"] < fit_glm(X, Y, "gaussian", "identity")["aic"]
+
+
+def test_mascara_igual_a_filas_seleccionadas_sin_copiar_x(tmp_path):
+    pos = Y > 0
+    ruta = tmp_path / "X.npy"
+    np.save(ruta, X)
+    xm = np.load(ruta, mmap_mode="r")
+    for familia in ("gamma", "lognormal"):
+        con_mascara = fit_glm(xm, Y, familia, mask=pos)
+        copia = fit_glm(X[pos], Y[pos], familia)
+        np.testing.assert_allclose(con_mascara["coef"]["Coeficiente"], copia["coef"]["Coeficiente"], rtol=1e-10)
+        np.testing.assert_allclose(con_mascara["coef"]["EE robusto"], copia["coef"]["EE robusto"], rtol=1e-8)
+        assert con_mascara["loglik"] == pytest.approx(copia["loglik"]) and con_mascara["n"] == pos.sum()
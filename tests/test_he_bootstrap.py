@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from he_bootstrap import bootstrap_brazos, intervalos_incrementales, medias_por_brazo
+
+
+def test_estimacion_de_las_medias_observadas():
+    rng = np.random.default_rng(3)
+    # costos asimétricos: la media de las remuestras del ICER se aleja del cociente observado
+    costos = [rng.lognormal(7.0, 1.5, 40), rng.lognormal(7.5, 1.5, 40)]
+    efectos = [rng.normal(1.0, 0.3, 40), rng.normal(1.2, 0.3, 40)]
+    tx = medias_por_brazo(["A", "B"], costos, efectos)
+    c_boot, e_boot = bootstrap_brazos(costos, efectos, n_boot=2000)
+    ic = intervalos_incrementales(c_boot, e_boot, tx["Costo total"].to_numpy(), tx["Efectividad"].to_numpy(),
+                                  0, 1, 50_000.0).set_index("Medida")["Estimación"]
+    d_c = costos[1].mean() - costos[0].mean()
+    d_e = efectos[1].mean() - efectos[0].mean()
+    assert ic["ΔCosto"] == pytest.approx(d_c)
+    assert ic["ΔEfecto"] == pytest.approx(d_e)
+    assert ic["ICER"] == pytest.approx(d_c / d_e)
+    assert ic["INB (λ = 50,000)"] == pytest.approx(50_000.0 * d_e - d_c)
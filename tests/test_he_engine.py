@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from he_engine import DOMINADO, DOMINANCIA_EXTENDIDA, FRONTERA, SIN_DATOS, frontera_eficiente
+
+
+def test_ejemplo_con_dominancia_estricta_y_extendida():
+    #            A       B       F       C       G       H       E       D
+    costo = [10_000, 12_000, 12_500, 14_000, 14_000, 17_000, 20_000, 25_000]
+    efecto = [1.00, 0.90, 1.10, 1.50, 1.20, 1.75, 2.00, 1.60]
+    res = frontera_eficiente(costo, efecto)
+    assert res["Estado"].tolist() == [
+        FRONTERA,              # A: la más barata
+        DOMINADO,              # B: más cara y menos efectiva que A
+        DOMINANCIA_EXTENDIDA,  # F: ICER frente a A (25.000) mayor que el de C frente a F
+        FRONTERA,              # C
+        DOMINADO,              # G: mismo costo que C y menos efecto
+        FRONTERA,              # H: sobre el segmento C–E (mismo ICER): se conserva
+        FRONTERA,              # E
+        DOMINADO,              # D: más cara y menos efectiva que E
+    ]
+    icer = res["ICER"].to_numpy()
+    assert np.isnan(icer[0])
+    np.testing.assert_allclose(icer[[3, 5, 6]], [8_000.0, 12_000.0, 12_000.0])
+    np.testing.assert_allclose(res["ΔCosto"].to_numpy()[[3, 5, 6]], [4_000.0, 3_000.0, 3_000.0])
+    assert res.loc[res["Estado"] != FRONTERA, "ICER"].isna().all()
+
+
+def test_empate_exacto_se_queda_la_primera():
+    res = frontera_eficiente([100.0, 100.0, 300.0], [1.0, 1.0, 2.0])
+    assert res["Estado"].tolist() == [FRONTERA, DOMINADO, FRONTERA]
+    assert res["ICER"].iloc[2] == pytest.approx(200.0)
+
+
+def test_una_estrategia_y_datos_faltantes():
+    res = frontera_eficiente([500.0], [0.7])
+    assert res["Estado"].tolist() == [FRONTERA] and np.isnan(res["ICER"].iloc[0])
+    res = frontera_eficiente([500.0, np.nan, 800.0], [0.7, 1.0, 1.0])
+    assert res["Estado"].tolist() == [FRONTERA, SIN_DATOS, FRONTERA]
+    assert res["ICER"].iloc[2] == pytest.approx(1_000.0)
+
+
+def test_coincide_con_el_algoritmo_clasico():
+    # eliminación iterativa de dominadas y de dominancia extendida (libro de texto)
+    rng = np.random.default_rng(5)
+    for _ in range(200):
+        n = rng.integers(1, 9)
+        costo = rng.integers(0, 20, n) * 1000.0
+        efecto = rng.integers(0, 20, n) / 10
+        vivas = sorted(range(n), key=lambda i: (costo[i], -efecto[i], i))
+        vivas = [i for j, i in enumerate(vivas) if all(efecto[i] > efecto[k] for k in vivas[:j])]
+        cambio = True
+        while cambio and len(vivas) > 2:
+            cambio = False
+            icer = [(costo[b] - costo[a]) / (efecto[b] - efecto[a]) for a, b in zip(vivas, vivas[1:])]
+            for j in range(len(icer) - 1):
+                if icer[j] > icer[j + 1]:
+                    del vivas[j + 1]
+                    cambio = True
+                    break
+        estado = frontera_eficiente(costo, efecto)["Estado"].to_numpy()
+        assert sorted(np.flatnonzero(estado == FRONTERA).tolist()) == sorted(vivas)
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from he_markov import markov_cohorte
+from he_microsim import microsim
+
+
+def test_sin_medio_ciclo_cuenta_n_ciclos():
+    res, _ = markov_cohorte(["A"], [1.0, 0.0], np.eye(2), [0.0, 0.0], [1.0, 0.0], 10,
+                            desc_costos=0.0, desc_efectos=0.0, medio_ciclo=False)
+    assert res["Efectividad"].iloc[0] == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize("desc", [0.0, 0.03])
+def test_markov_coincide_con_microsimulacion(desc):
+    # modelo trivial determinista: todos permanecen sanos con costo 100 y utilidad 1
+    args = (["A", "B"], [1.0, 0.0], np.stack([np.eye(2), np.eye(2)]), [100.0, 0.0], [1.0, 0.0], 10)
+    cohorte, _ = markov_cohorte(*args, desc_costos=desc, desc_efectos=desc, medio_ciclo=False)
+    micro = microsim(*args, n_pacientes=50, desc_costos=desc, desc_efectos=desc)
+    np.testing.assert_allclose(cohorte["Costo total"], micro["Costo total"])
+    np.testing.assert_allclose(cohorte["Efectividad"], micro["Efectividad"])
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from he_microsim import microsim
+
+# Sano, Enfermo, Muerto; la estrategia B reduce la progresión
+P = np.array([
+    [[0.85, 0.10, 0.05], [0.00, 0.80, 0.20], [0.0, 0.0, 1.0]],
+    [[0.90, 0.06, 0.04], [0.00, 0.85, 0.15], [0.0, 0.0, 1.0]],
+])
+ARGS = (["A", "B"], [1.0, 0.0, 0.0], P, [[100.0, 2_000.0, 0.0], [600.0, 2_000.0, 0.0]], [1.0, 0.6, 0.0], 20)
+
+
+def test_misma_semilla_mismo_resultado_con_1_o_n_procesos():
+    kw = dict(n_pacientes=4_000, semilla=7, tam_lote=500)
+    base = microsim(*ARGS, **kw)
+    pd.testing.assert_frame_equal(microsim(*ARGS, **kw), base, check_exact=True)
+    for procesos in (2, 3):
+        pd.testing.assert_frame_equal(microsim(*ARGS, n_procesos=procesos, **kw), base, check_exact=True)
+    assert not microsim(*ARGS, n_pacientes=4_000, semilla=8, tam_lote=500).equals(base)
+
+
+def test_combinacion_de_lotes_exacta_en_un_modelo_determinista():
+    # sin azar (todos siguen sanos) el tamaño de lote solo cambia cómo se combinan los momentos
+    args = (["A"], [1.0, 0.0], np.eye(2), [100.0, 0.0], [1.0, 0.0], 10)
+    uno = microsim(*args, n_pacientes=1_000, tam_lote=1_000)
+    muchos = microsim(*args, n_pacientes=1_000, tam_lote=7)
+    np.testing.assert_allclose(muchos["Costo total"], uno["Costo total"], rtol=1e-12)
+    np.testing.assert_allclose(muchos["EE Costo"], 0.0, atol=1e-9)
@@ -0,0 +1,35 @@
+import numpy as np
+
+from he_psa import ceac, envolvente_nmb
+
+WTP = np.linspace(0.0, 100_000.0, 401)
+
+
+def _argmax(costos, efectos, wtp):
+    return (wtp[:, None, None] * efectos[None] - costos[None]).argmax(axis=2)
+
+
+def test_ceac_igual_a_argmax_por_lambda():
+    rng = np.random.default_rng(8)
+    n, k = 3000, 4
+    efectos = rng.normal([1.0, 1.1, 1.25, 1.3], 0.15, (n, k))
+    costos = rng.normal([0.0, 3_000.0, 9_000.0, 16_000.0], 2_500.0, (n, k))
+    ganador = _argmax(costos, efectos, WTP)
+    esperado = np.stack([(ganador == j).mean(axis=1) for j in range(k)], axis=1)
+    np.testing.assert_allclose(ceac(costos, efectos, WTP), esperado, atol=1e-12)
+    # sumas de E y C de las simulaciones ganadoras
+    env = envolvente_nmb(costos, efectos, WTP)
+    for j in range(k):
+        np.testing.assert_allclose(env[1][:, j], ((ganador == j) * efectos[:, j]).sum(axis=1), rtol=1e-9)
+        np.testing.assert_allclose(env[2][:, j], ((ganador == j) * costos[:, j]).sum(axis=1), rtol=1e-9)
+
+
+def test_empates_exactos_gana_el_de_mayor_efecto():
+    # NMB iguales en λ = 10.000 (1·λ − 0 = 2·λ − 10.000); 0 y 2 son rectas idénticas
+    costos = np.array([[0.0, 10_000.0, 0.0]])
+    efectos = np.array([[1.0, 2.0, 1.0]])
+    wtp = np.array([0.0, 10_000.0, 20_000.0])
+    prob = ceac(costos, efectos, wtp)
+    np.testing.assert_array_equal(prob, [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 1.0, 0.0]])
+    # argmax elegiría el menor índice en el empate; fuera de él coinciden
+    assert _argmax(costos, efectos, wtp)[1, 0] == 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import he_psa
+import he_voi
+
+PARAMS = pd.DataFrame({
+    "Tratamiento": ["A", "B", "C"],
+    "Costo total": [1_000.0, 4_000.0, 9_000.0],
+    "EE Costo": [200.0, 800.0, 1_500.0],
+    "Dist. costo": ["gamma", "gamma", "lognormal"],
+    "Efectividad": [0.60, 0.70, 0.78],
+    "EE Efect.": [0.05, 0.06, 0.08],
+    "Dist. efect.": ["beta", "beta", "normal"],
+})
+WTP = np.linspace(0.0, 150_000.0, 61)
+
+
+@pytest.fixture
+def psa(tmp_path, monkeypatch):
+    # bloques pequeños: los recorridos por bloque del memmap se ejercitan con pocas filas
+    original = he_psa.bloques
+    pequenos = lambda n, por_fila: original(n, por_fila, 3_000)  # noqa: E731
+    monkeypatch.setattr(he_psa, "bloques", pequenos)
+    monkeypatch.setattr(he_voi, "bloques", pequenos)
+    he_voi.generar_psa_en_disco(PARAMS, 20_000, str(tmp_path), semilla=3, tam_bloque=6_000)
+    return he_voi.abrir_psa(str(tmp_path))
+
+
+def test_evpi_memmap_igual_al_calculo_en_memoria(psa):
+    assert isinstance(psa["costos"], np.memmap)
+    c, e = np.array(psa["costos"]), np.array(psa["efectos"])
+    nmb = WTP[:, None, None] * e[None] - c[None]
+    directo = nmb.max(axis=2).mean(axis=1) - nmb.mean(axis=1).max(axis=1)
+    np.testing.assert_allclose(he_voi.evpi(psa["costos"], psa["efectos"], WTP), directo, rtol=1e-9, atol=1e-6)
+
+
+def test_evppi_memmap(psa):
+    c, e, x = np.array(psa["costos"]), np.array(psa["efectos"]), np.array(psa["parametros"])
+    # con todos los parámetros (costos y efectos mismos) la regresión lineal es exacta: EVPPI = EVPI
+    todos = he_voi.evppi(psa["parametros"], range(6), psa["costos"], psa["efectos"], WTP, grado=1)
+    np.testing.assert_allclose(todos, he_voi.evpi(psa["costos"], psa["efectos"], WTP), rtol=1e-6, atol=1e-3)
+    # efectos de B y C, grado 2: igual a la misma regresión resuelta en memoria
+    cols = [4, 5]
+    z = x[:, cols]
+    z0 = z[:10_000]
+    base = he_voi._base_polinomica((z - z0.mean(axis=0)) / z0.std(axis=0), 2)
+    ajuste = base @ np.linalg.lstsq(base, np.hstack([c, e]), rcond=None)[0]
+    nmb = WTP[:, None, None] * ajuste[None, :, 3:] - ajuste[None, :, :3]
+    directo = np.maximum(nmb.max(axis=2).mean(axis=1) - (WTP[:, None] * e.mean(0) - c.mean(0)).max(axis=1), 0.0)
+    parcial = he_voi.evppi(psa["parametros"], cols, psa["costos"], psa["efectos"], WTP)
+    np.testing.assert_allclose(parcial, directo, rtol=1e-6, atol=1e-3)
+    assert np.all(parcial <= todos + 1e-6)
+
+
+def test_generar_psa_reproducible(tmp_path):
+    a = he_voi.generar_psa_en_disco(PARAMS, 5_000, str(tmp_path / "a"), semilla=3, tam_bloque=2_000)
+    b = he_voi.generar_psa_en_disco(PARAMS, 5_000, str(tmp_path / "b"), semilla=3, tam_bloque=2_000)
+    np.testing.assert_array_equal(he_voi.abrir_psa(a)["costos"], he_voi.abrir_psa(b)["costos"])